@@ -1,14 +1,27 @@
-from flask import Flask, jsonify, request, render_template, g, session
+from flask import Flask, jsonify, request, render_template, g, session, Response, stream_with_context, has_app_context
 from flask_cors import CORS
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+import atexit
+import click
+import hashlib
+import json
 import mysql.connector
 import os
+import queue
+import re
+import sqlite3
 import time
 import traceback
 import threading
 
 # Run-once guards for DB init
 _db_inited = False
-_db_init_lock = threading.Lock()
+_db_init_lock = threading.RLock()  # re-entrant: setup_database() runs migrations while holding it
 
 app = Flask(__name__)
 app.secret_key = "super_secret_key_change_me"  # Needed for session management
@@ -27,19 +40,507 @@ DB_CONFIG = {
 print("🔧 DEBUG Render DB Config (at startup):", DB_CONFIG)
 
 
+# ================== DATABASE BACKENDS ==================
+# DB_BACKEND=mysql (default) talks to the server in DB_CONFIG. DB_BACKEND=sqlite runs the same
+# routes against SQLite (SQLITE_PATH: a file, opened in WAL mode, or ":memory:") so the app can be
+# exercised offline. The SQLite adapter mimics the small part of mysql.connector that app.py uses:
+# %s placeholders, dictionary cursors, MySQL DDL from c.sql and mysql.connector error numbers.
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql').lower()
+SQLITE_CONFIG = {
+    'path': os.getenv('SQLITE_PATH', ':memory:'),
+    'wal': os.getenv('SQLITE_WAL', '1') == '1',
+    'busy_timeout_ms': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+}
+
+
+BOOTSTRAP_LOCK_TIMEOUT = float(os.getenv('BOOTSTRAP_LOCK_TIMEOUT', 120))   # seconds a worker waits for another's bootstrap
+
+
+class BootstrapLockTimeout(Exception):
+    pass
+
+
+try:
+    import fcntl
+
+    def _try_lock_file(f):
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+except ImportError:         # Windows
+    import msvcrt
+
+    def _try_lock_file(f):
+        try:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class MySQLDialect:
+    name = "mysql"
+    label = "MySQL"
+
+    def __init__(self, config):
+        self.config = config
+
+    def connect(self):
+        return mysql.connector.connect(**self.config)
+
+    def index_definition(self, cursor, table, name):
+        """(unique, [columns]) of index `name` on `table`, or None when it doesn't exist"""
+        cursor.execute("""
+            SELECT NON_UNIQUE, COLUMN_NAME
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+            ORDER BY SEQ_IN_INDEX
+        """, (table, name))
+        rows = cursor.fetchall()
+        return (not rows[0][0], [r[1] for r in rows]) if rows else None
+
+    @contextmanager
+    def bootstrap_lock(self, conn, timeout):
+        """Server-side named lock, so only one process on any host bootstraps the schema"""
+        name = f"edubridge_bootstrap:{self.config.get('database')}"[:64]
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT GET_LOCK(%s, %s)", (name, timeout))
+            if cur.fetchone()[0] != 1:
+                raise BootstrapLockTimeout(f"Timed out after {timeout}s waiting for the bootstrap lock")
+            try:
+                yield
+            finally:
+                cur.execute("SELECT RELEASE_LOCK(%s)", (name,))
+                cur.fetchall()
+        finally:
+            cur.close()
+
+
+def _parse_sqlite_datetime(raw):
+    text = raw.decode()
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    return text
+
+
+sqlite3.register_adapter(datetime, lambda v: v.strftime("%Y-%m-%d %H:%M:%S"))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_converter("DATETIME", _parse_sqlite_datetime)
+sqlite3.register_converter("TIMESTAMP", _parse_sqlite_datetime)
+
+# Tokens that must never be rewritten: string literals and comments
+_SQL_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|--[^\n]*|%s|%%")
+_LEADING_COMMENTS_RE = re.compile(r"^(?:\s*--[^\n]*\n)*\s*")
+_CREATE_TABLE_RE = re.compile(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?", re.I)
+_ENUM_RE = re.compile(r"`?(\w+)`?\s+ENUM\s*\(([^)]*)\)", re.I)
+_AUTO_PK_RE = re.compile(r"\b(?:BIG)?INT(?:EGER)?\s+(?:PRIMARY\s+KEY\s+AUTO_INCREMENT|AUTO_INCREMENT\s+PRIMARY\s+KEY)", re.I)
+_TABLE_KEY_RE = re.compile(r",\s*(UNIQUE\s+)?(?:KEY|INDEX)\s+`?(\w+)`?\s*\(([^)]*)\)", re.I)
+_TABLE_OPTIONS_RE = re.compile(r"\)\s*(?:ENGINE|DEFAULT\s+CHARSET|CHARSET|COLLATE)\b[^)]*$", re.I)
+_SHOW_TABLES_RE = re.compile(r"^SHOW\s+TABLES(?:\s+LIKE\s+(.+?))?\s*;?\s*$", re.I | re.S)
+_FK_CHECKS_RE = re.compile(r"^SET\s+FOREIGN_KEY_CHECKS\s*=\s*([01])\s*;?\s*$", re.I)
+_DROP_INDEX_ON_RE = re.compile(r"^(DROP\s+INDEX\s+`?\w+`?)\s+ON\s+`?\w+`?", re.I)
+_ON_DUPLICATE_RE = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.I)
+_VALUES_FN_RE = re.compile(r"\bVALUES\s*\(\s*`?(\w+)`?\s*\)", re.I)
+
+
+def _sqlite_placeholders(sql):
+    """%s -> ?, %% -> %, leaving string literals and comments untouched"""
+    def sub(m):
+        token = m.group(0)
+        return "?" if token == "%s" else "%" if token == "%%" else token
+    return _SQL_LITERAL_RE.sub(sub, sql)
+
+
+@lru_cache(maxsize=1024)
+def sqlite_translate(sql):
+    """Rewrite one MySQL statement for SQLite; returns (statement, follow_up_statements)
+
+    Cached, so the rewrite costs nothing after the first time a statement is seen.
+    """
+    body = _LEADING_COMMENTS_RE.sub("", sql, count=1).strip()
+    extra = []
+
+    m = _FK_CHECKS_RE.match(body)
+    if m:
+        return f"PRAGMA foreign_keys = {'ON' if m.group(1) == '1' else 'OFF'}", ()
+    m = _SHOW_TABLES_RE.match(body)
+    if m:
+        stmt = "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%%'"
+        if m.group(1):
+            stmt += f" AND name LIKE {m.group(1)}"
+        return _sqlite_placeholders(stmt), ()
+    if re.match(r"EXPLAIN\s+(?!QUERY\s+PLAN)", body, re.I):
+        body = "EXPLAIN QUERY PLAN " + body[len("EXPLAIN"):].lstrip()
+
+    m = _CREATE_TABLE_RE.match(body)
+    if m:
+        table = m.group(1)
+        body = _ENUM_RE.sub(lambda e: f"{e.group(1)} TEXT CHECK ({e.group(1)} IN ({e.group(2)}))", body)
+        body = _AUTO_PK_RE.sub("INTEGER PRIMARY KEY AUTOINCREMENT", body)
+        body = re.sub(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP", "", body, flags=re.I)
+        body = _TABLE_OPTIONS_RE.sub(")", body)
+        # SQLite has no inline secondary keys; MySQL's names are kept so duplicate-key errors match
+        for unique, name, cols in _TABLE_KEY_RE.findall(body):
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            extra.append(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({cols.replace('`', '')})")
+        body = _TABLE_KEY_RE.sub("", body)
+
+    body = _DROP_INDEX_ON_RE.sub(r"\1", body)      # index names are schema-wide in SQLite
+    body = re.sub(r"^INSERT\s+IGNORE\s+INTO\b", "INSERT OR IGNORE INTO", body, flags=re.I)
+    dup = _ON_DUPLICATE_RE.search(body)
+    if dup:
+        update = _VALUES_FN_RE.sub(r"excluded.\1", body[dup.end():])
+        body = body[:dup.start()] + "ON CONFLICT DO UPDATE SET" + update
+    body = re.sub(r"\bNOW\(\)", "CURRENT_TIMESTAMP", body, flags=re.I)
+    return _sqlite_placeholders(body), tuple(extra)
+
+
+def _sqlite_unique_key(raw, table, columns):
+    """Name the MySQL key a UNIQUE violation on table(columns) corresponds to"""
+    try:
+        for _, name, unique, origin, _ in raw.execute(f"PRAGMA index_list({table})").fetchall():
+            if not unique:
+                continue
+            cols = [r[2] for r in raw.execute(f"PRAGMA index_info({name})").fetchall()]
+            if cols == columns:
+                if origin == "pk":
+                    return "PRIMARY"
+                return columns[0] if name.startswith("sqlite_autoindex") and len(columns) == 1 else name
+    except sqlite3.Error:
+        pass
+    return "PRIMARY" if not columns else columns[0]
+
+
+def _sqlite_error(exc, raw, sql):
+    """Translate a sqlite3 exception into the mysql.connector error the routes already handle"""
+    errors = mysql.connector.errors
+    msg = str(exc)
+    if isinstance(exc, sqlite3.IntegrityError):
+        if msg.startswith("UNIQUE constraint failed:"):
+            qualified = [c.strip() for c in msg.split(":", 1)[1].split(",")]
+            table = qualified[0].split(".")[0]
+            key = _sqlite_unique_key(raw, table, [c.split(".", 1)[-1] for c in qualified])
+            return errors.IntegrityError(msg=f"Duplicate entry for key '{table}.{key}'", errno=1062, sqlstate="23000")
+        if "FOREIGN KEY" in msg:
+            if sql.lstrip().upper().startswith("DELETE"):
+                return errors.IntegrityError(
+                    msg="Cannot delete or update a parent row: a foreign key constraint fails",
+                    errno=1451, sqlstate="23000")
+            return errors.IntegrityError(
+                msg="Cannot add or update a child row: a foreign key constraint fails", errno=1452, sqlstate="23000")
+        if msg.startswith("NOT NULL constraint failed:"):
+            column = msg.rsplit(".", 1)[-1]
+            return errors.IntegrityError(msg=f"Column '{column}' cannot be null", errno=1048, sqlstate="23000")
+        if msg.startswith("CHECK constraint failed:"):
+            return errors.DataError(msg=f"Data truncated: {msg}", errno=1265, sqlstate="01000")
+        return errors.IntegrityError(msg=msg, sqlstate="23000")
+    if isinstance(exc, sqlite3.OperationalError):
+        if msg.startswith("no such table:"):
+            return errors.ProgrammingError(msg=f"Table '{msg.split(':', 1)[1].strip()}' doesn't exist",
+                                           errno=1146, sqlstate="42S02")
+        if msg.startswith("no such column:"):
+            return errors.ProgrammingError(msg=f"Unknown column '{msg.split(':', 1)[1].strip()}'",
+                                           errno=1054, sqlstate="42S22")
+        if msg.startswith("index ") and msg.endswith(" already exists"):
+            return errors.ProgrammingError(msg=f"Duplicate key name '{msg.split()[1]}'", errno=1061, sqlstate="42000")
+        if msg.startswith("no such index:"):
+            return errors.ProgrammingError(msg=f"Can't DROP '{msg.split(':', 1)[1].strip()}'; check that it exists",
+                                           errno=1091, sqlstate="42000")
+        if "syntax error" in msg:
+            return errors.ProgrammingError(msg=msg, errno=1064, sqlstate="42000")
+        if "locked" in msg:
+            return errors.DatabaseError(msg=msg, errno=1205, sqlstate="HY000")
+        return errors.DatabaseError(msg=msg)
+    if isinstance(exc, (sqlite3.ProgrammingError, sqlite3.InterfaceError)):
+        return errors.ProgrammingError(msg=msg)
+    return errors.DatabaseError(msg=msg)
+
+
+class SQLiteCursor:
+    """mysql.connector-style cursor over sqlite3 (always buffered)"""
+
+    def __init__(self, conn, dictionary=False):
+        self._conn = conn
+        self._cursor = conn.raw.cursor()
+        self._dictionary = dictionary
+        self.rowcount = -1
+
+    def _run(self, operation, run):
+        sql, extra = sqlite_translate(operation)
+        try:
+            run(sql)
+            for stmt in extra:
+                self._conn.raw.execute(stmt)
+        except sqlite3.Error as e:
+            raise _sqlite_error(e, self._conn.raw, sql) from e
+        self.rowcount = self._cursor.rowcount
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._run(operation, lambda sql: self._cursor.execute(sql, tuple(params or ())))
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        self._run(operation, lambda sql: self._cursor.executemany(sql, [tuple(p) for p in seq_params]))
+
+    @property
+    def column_names(self):
+        return tuple(d[0] for d in self._cursor.description or ())
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def _shape(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self.column_names, row))
+
+    def fetchone(self):
+        return self._shape(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._shape(r) for r in self._cursor.fetchall()]
+
+    def fetchmany(self, size=1):
+        return [self._shape(r) for r in self._cursor.fetchmany(size)]
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """The subset of mysql.connector's connection API the pool and the routes use"""
+
+    unread_result = False
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def cursor(self, dictionary=False, buffered=False, **kwargs):
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    @property
+    def in_transaction(self):
+        return self.raw.in_transaction
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def consume_results(self):
+        pass
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        try:
+            self.raw.execute("SELECT 1")
+        except sqlite3.Error as e:
+            raise _sqlite_error(e, self.raw, "SELECT 1") from e
+
+    def is_connected(self):
+        try:
+            self.raw.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        self.raw.close()
+
+
+class SQLiteDialect:
+    name = "sqlite"
+    label = "SQLite"
+
+    def __init__(self, config):
+        self.config = config
+        self.memory = config['path'] in ("", ":memory:")
+        # Pooled connections must all see one in-memory database: a named shared-cache DB,
+        # kept alive by an anchor connection for as long as the process runs
+        self._target = f"file:edubridge-{os.getpid()}?mode=memory&cache=shared" if self.memory else config['path']
+        self._anchor = self._open() if self.memory else None
+
+    def _open(self):
+        raw = sqlite3.connect(
+            self._target,
+            uri=self.memory,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,       # the pool hands connections between threads
+            timeout=self.config['busy_timeout_ms'] / 1000,
+        )
+        raw.execute("PRAGMA foreign_keys = ON")     # MySQL enforces them; the cascades rely on it
+        if not self.memory and self.config['wal']:
+            raw.execute("PRAGMA journal_mode = WAL")
+            raw.execute("PRAGMA synchronous = NORMAL")
+        return raw
+
+    def connect(self):
+        return SQLiteConnection(self._open())
+
+    def index_definition(self, cursor, table, name):
+        """(unique, [columns]) of index `name` on `table`, or None when it doesn't exist"""
+        cursor.execute(f"PRAGMA index_list({table})")
+        unique = next((r[2] for r in cursor.fetchall() if r[1] == name), None)
+        if unique is None:
+            return None
+        cursor.execute(f"PRAGMA index_info({name})")
+        return bool(unique), [r[2] for r in cursor.fetchall()]
+
+    @contextmanager
+    def bootstrap_lock(self, conn, timeout):
+        """Exclusive lock on a file next to the database (an in-memory DB has a single process)"""
+        if self.memory:
+            yield
+            return
+        with open(f"{self.config['path']}.bootstrap.lock", "a+b") as lock_file:
+            deadline = time.monotonic() + timeout
+            while not _try_lock_file(lock_file):
+                if time.monotonic() > deadline:
+                    raise BootstrapLockTimeout(f"Timed out after {timeout}s waiting for {lock_file.name}")
+                time.sleep(0.05)
+            try:
+                yield
+            finally:
+                _unlock_file(lock_file)
+
+
+def _make_db_backend():
+    if DB_BACKEND == "sqlite":
+        print(f"🗄️  Using SQLite backend ({SQLITE_CONFIG['path']})")
+        return SQLiteDialect(SQLITE_CONFIG)
+    if DB_BACKEND != "mysql":
+        raise RuntimeError(f"Unknown DB_BACKEND '{DB_BACKEND}' (expected 'mysql' or 'sqlite')")
+    return MySQLDialect(DB_CONFIG)
+
+
+db_backend = _make_db_backend()
+
+
 SQL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "c.sql")
 
+def split_sql(script):
+    """Split a SQL script into statements on top-level semicolons
+
+    Semicolons inside quoted strings or identifiers and inside comments do not split; the
+    comments themselves are dropped.
+    """
+    statements, buf = [], []
+    i, n, quote = 0, len(script), None
+    while i < n:
+        ch = script[i]
+        if quote:
+            buf.append(ch)
+            if ch == "\\" and quote != "`" and i + 1 < n:
+                buf.append(script[i + 1])
+                i += 2
+                continue
+            if ch == quote:
+                if i + 1 < n and script[i + 1] == quote:     # '' inside '...'
+                    buf.append(quote)
+                    i += 2
+                    continue
+                quote = None
+        elif ch in "'\"`":
+            quote = ch
+            buf.append(ch)
+        elif ch == "#" or (script.startswith("--", i) and (i + 2 == n or script[i + 2] in " \t\r\n")):
+            end = script.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        elif script.startswith("/*", i):
+            end = script.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            buf.append(" ")
+            continue
+        elif ch == ";":
+            stmt = "".join(buf).strip()
+            if stmt:
+                statements.append(stmt)
+            buf = []
+        else:
+            buf.append(ch)
+        i += 1
+    stmt = "".join(buf).strip()
+    if stmt:
+        statements.append(stmt)
+    return statements
+
+
+def read_sql_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return split_sql(f.read())
+
+
+_SEED_PREFIXES = ("INSERT", "REPLACE", "UPDATE", "DELETE")
+
+
+def load_schema(cur):
+    """Drop and recreate every table from c.sql, dummy data included (caller commits)
+
+    DDL runs first (MySQL commits implicitly after each DDL statement); the seed rows then
+    go in as c.sql's multi-row INSERTs inside a single transaction.
+    """
+    print("⚙️  Loading schema from c.sql ...")
+    statements = read_sql_file(SQL_FILE)
+    ddl = [stmt for stmt in statements if not stmt.upper().startswith(_SEED_PREFIXES)]
+    seed = [stmt for stmt in statements if stmt.upper().startswith(_SEED_PREFIXES)]
+
+    cur.execute("SET FOREIGN_KEY_CHECKS=0;")
+    for stmt in ddl + seed:
+        try:
+            cur.execute(stmt)
+        except mysql.connector.Error as e:
+            # Ignore benign drop / constraint errors on fresh runs
+            if e.errno in (1051, 1091):
+                print(f"⚠️  Ignored drop error {e.errno}: {e.msg}")
+            else:
+                print(f"❌ SQL error {e.errno}: {e.msg}")
+                raise
+    cur.execute("SET FOREIGN_KEY_CHECKS=1;")
+    print(f"✅ Database schema and dummy data loaded from c.sql ({len(ddl)} DDL, {len(seed)} seed statements).")
+
+
 # --- Database Setup ---
+_setup_state = {"error": None}    # last setup_database() failure, for /readyz
+
+
 def setup_database():
-    """Create the DB (if missing) and load c.sql only when tables are empty."""
-    print("🔍 Checking MySQL connection...")
+    """Create the DB (if missing), load c.sql only when it has no tables, then apply migrations.
+
+    Runs under a cross-process bootstrap lock: the first worker to get it does the work and
+    the others wait, then find the schema ready. Returns True once the schema is usable.
+    """
+    print(f"🔍 Checking {db_backend.label} connection...")
+    started = time.perf_counter()
     conn = None
     cur = None
 
     try:
         # 1) Try connect to the target DB
         try:
-            conn = mysql.connector.connect(**DB_CONFIG)
+            conn = db_backend.connect()
         except mysql.connector.Error as e:
             if e.errno == 1049:  # Unknown database
                 print(f"⚠️ Database '{DB_CONFIG['database']}' not found. Creating it...")
@@ -59,77 +560,1698 @@ def setup_database():
             else:
                 raise
 
-        cur = conn.cursor(dictionary=True, buffered=True)
+        with db_backend.bootstrap_lock(conn, BOOTSTRAP_LOCK_TIMEOUT):
+            cur = conn.cursor(buffered=True)
 
-        # 2) Early-exit if tables already exist (prevents data loss)
-        cur.execute("SHOW TABLES;")
-        if cur.fetchone():
-            print("✅ Tables present; skipping rebuild.")
-            return
+            # 2) Skip the c.sql load if tables already exist (prevents data loss)
+            cur.execute("SHOW TABLES;")
+            tables = {row[0] for row in cur.fetchall()}
+            if not tables:
+                load_schema(cur)
+                conn.commit()
+            else:
+                print("✅ Tables present; skipping rebuild.")
+                if ProgressStore.TABLE not in tables:
+                    ProgressStore.ensure_table(cur)
+                    conn.commit()
 
-        print("⚙️  Loading schema from c.sql ...")
-        with open(SQL_FILE, "r", encoding="utf-8") as f:
-            sql_script = f.read()
+            # 3) Bring the schema up to date (indexes etc. live in migrations/)
+            run_migrations(conn)
 
-        cur.execute("SET FOREIGN_KEY_CHECKS=0;")
-        for raw in sql_script.split(";"):
-            stmt = raw.strip()
-            if not stmt:
-                continue
-            try:
-                cur.execute(stmt)
-            except mysql.connector.Error as e:
-                # Ignore benign drop / constraint errors on fresh runs
-                if e.errno in (1051, 1091):
-                    print(f"⚠️  Ignored drop error {e.errno}: {e.msg}")
-                else:
-                    print(f"❌ SQL error {e.errno}: {e.msg}")
-                    raise
-        cur.execute("SET FOREIGN_KEY_CHECKS=1;")
-        conn.commit()
-        print("✅ Database schema and dummy data loaded from c.sql.")
+        _setup_state["error"] = None
+        print(f"✅ Database ready in {(time.perf_counter() - started) * 1000:.0f} ms.")
+        return True
 
     except mysql.connector.Error as e:
-        print(f"❌ MySQL setup failed ({e.errno}): {e.msg}")
+        _setup_state["error"] = f"{e.errno}: {e.msg}"
+        print(f"❌ {db_backend.label} setup failed ({e.errno}): {e.msg}")
+    except BootstrapLockTimeout as e:
+        _setup_state["error"] = str(e)
+        print(f"❌ {db_backend.label} setup failed: {e}")
     finally:
         if cur:
             cur.close()
         if conn:
             conn.close()
+    return False
+
+
+def ensure_database():
+    """setup_database() at most once per process (until it succeeds); returns whether the DB is ready"""
+    global _db_inited
+    if not _db_inited:
+        with _db_init_lock:
+            if not _db_inited:
+                _db_inited = setup_database()
+    return _db_inited
 
 
+# ================== MIGRATIONS ==================
+# Files in migrations/ are named NNN_description.sql and applied once each, in order.
+# schema_version records what has been applied.
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
 
-def get_db():
-    if "db" not in g:
-        g.db = mysql.connector.connect(**DB_CONFIG)
-    else:
+
+def _migration_files():
+    """[(version, name, path)] sorted by version"""
+    found = []
+    if not os.path.isdir(MIGRATIONS_DIR):
+        return found
+    for filename in os.listdir(MIGRATIONS_DIR):
+        stem, ext = os.path.splitext(filename)
+        version, _, name = stem.partition("_")
+        if ext == ".sql" and version.isdigit():
+            found.append((int(version), name, os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(found)
+
+
+_MIGRATION_INDEX_RE = re.compile(
+    r"^CREATE\s+(UNIQUE\s+)?INDEX\s+`?(\w+)`?\s+ON\s+`?(\w+)`?\s*\(([^)]*)\)\s*;?\s*$", re.I)
+
+
+def _run_migration_statement(cur, stmt):
+    """Run one migration statement; CREATE TABLE / CREATE INDEX that already exist are skipped
+
+    MySQL commits each DDL statement on its own, so a migration that failed halfway leaves its
+    first tables and indexes behind without a schema_version row. A table is skipped when it
+    exists (IF NOT EXISTS semantics, without MySQL's warning), an index only when one with the
+    same name, columns and uniqueness exists; a different definition under that name is an error.
+    """
+    table = _CREATE_TABLE_RE.match(stmt)
+    if table:
+        cur.execute("SHOW TABLES LIKE %s", (table.group(1),))
+        if cur.fetchall():
+            print(f"⚠️  Skipped CREATE TABLE {table.group(1)}: the table already exists")
+            return
+
+    index = _MIGRATION_INDEX_RE.match(stmt)
+    if index:
+        unique, name, table_name, cols = index.groups()
+        wanted = (bool(unique), [c.strip().strip("`").split()[0].lower() for c in cols.split(",")])
+        found = db_backend.index_definition(cur, table_name, name)
+        if found is not None:
+            found = (found[0], [c.lower() for c in found[1]])
+            if found != wanted:
+                raise mysql.connector.errors.ProgrammingError(
+                    msg=f"Index '{name}' on {table_name} exists as {found}, the migration expects {wanted}",
+                    errno=1061, sqlstate="42000")
+            print(f"⚠️  Skipped CREATE INDEX {name}: already present on {table_name}")
+            return
+
+    cur.execute(stmt)
+
+
+def run_migrations(conn):
+    """Apply pending migrations on `conn`; returns the versions applied"""
+    applied = []
+    with _db_init_lock:
+        cur = conn.cursor()
+        try:
+            cur.execute("SHOW TABLES LIKE 'schema_version'")
+            if not cur.fetchall():
+                cur.execute("""
+                    CREATE TABLE schema_version (
+                        version INT PRIMARY KEY,
+                        name VARCHAR(255) NOT NULL,
+                        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+            cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+            current = cur.fetchone()[0]
+
+            for version, name, path in _migration_files():
+                if version <= current:
+                    continue
+                print(f"⚙️  Applying migration {version:03d}_{name} ...")
+                for stmt in read_sql_file(path):
+                    _run_migration_statement(cur, stmt)
+                cur.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)", (version, name))
+                conn.commit()
+                applied.append(version)
+        finally:
+            cur.close()
+    if applied:
+        print(f"✅ Applied migrations: {applied}")
+    return applied
+
+
+# ================== CONNECTION POOL ==================
+# Each gunicorn worker keeps its own pool. Every request thread may hold a connection, and a few
+# more are borrowed beside them (events poller, completion flusher, /api/events setup, cache
+# generation reads and bumps), so per worker
+#     DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW >= GUNICORN_THREADS + 4
+# DB_POOL_MAX_OVERFLOW defaults to the value that makes this hold (Procfile: 5 + 31 = 32 + 4),
+# and GUNICORN_WORKERS * (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW) must stay under the server's
+# max_connections. A request that still finds the pool empty after DB_POOL_TIMEOUT gets a 503.
+GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', 32))      # same variable (and default) as the Procfile
+_POOL_EXTRA_CONNECTIONS = 4
+_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+POOL_CONFIG = {
+    'size': _POOL_SIZE,                                               # idle connections kept open
+    'max_overflow': int(os.getenv(                                    # extra connections allowed under load
+        'DB_POOL_MAX_OVERFLOW', max(GUNICORN_THREADS + _POOL_EXTRA_CONNECTIONS - _POOL_SIZE, 0))),
+    'idle_timeout': float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),    # seconds before an idle connection is closed
+    'check_after': float(os.getenv('DB_POOL_CHECK_AFTER', 30)),       # ping on borrow only if idle this long
+    'acquire_timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),       # seconds to wait when the pool is exhausted
+}
+
+
+class PoolExhausted(Exception):
+    """Raised when no connection could be borrowed within acquire_timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of database connections for one worker process"""
+
+    def __init__(self, connect, size=5, max_overflow=10, idle_timeout=300.0,
+                 check_after=30.0, acquire_timeout=10.0):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = []          # [(conn, last_returned_at)], most recently returned last
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._counters = {
+            "created": 0,
+            "closed": 0,
+            "borrowed": 0,
+            "returned": 0,
+            "health_check_failures": 0,
+            "timeouts": 0,
+        }
+
+    @property
+    def _open(self):
+        return len(self._idle) + self._in_use
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._counters["closed"] += 1
+
+    def _prune_idle(self, now):
+        """Close connections that sat idle longer than idle_timeout (caller holds the lock)"""
+        keep = []
+        for conn, last_used in self._idle:
+            if now - last_used > self.idle_timeout:
+                self._close_quietly(conn)
+            else:
+                keep.append((conn, last_used))
+        self._idle = keep
+
+    def _is_healthy(self, conn):
+        try:
+            conn.ping(reconnect=False, attempts=1, delay=0)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout=None):
+        """Borrow a connection, opening a new one while under size + max_overflow"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._prune_idle(now)
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._open < self.size + self.max_overflow:
+                    conn, last_used = None, now
+                    self._in_use += 1
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolExhausted(
+                        f"No database connection available after {timeout}s "
+                        f"({self._in_use} in use)"
+                    )
+                self._cond.wait(remaining)
+
+        # Connect / health-check outside the lock so slow network calls don't block other threads
         try:
-            g.db.ping(reconnect=True, attempts=1, delay=0)
+            if conn is not None and time.monotonic() - last_used > self.check_after:
+                if not self._is_healthy(conn):
+                    with self._cond:
+                        self._counters["health_check_failures"] += 1
+                        self._close_quietly(conn)
+                    conn = None
+            if conn is None:
+                conn = self._connect()
+                with self._cond:
+                    self._counters["created"] += 1
         except Exception:
-            g.db = mysql.connector.connect(**DB_CONFIG)
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._counters["borrowed"] += 1
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a borrowed connection; anything beyond `size` idle connections is closed"""
+        if not discard:
+            try:
+                # A half-read result set would break the next borrower's first query
+                if getattr(conn, "unread_result", False):
+                    conn.consume_results()
+                # Never hand the next borrower an open transaction (or its stale snapshot)
+                if getattr(conn, "in_transaction", True):
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            self._counters["returned"] += 1
+            if discard or len(self._idle) >= self.size:
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            for conn, _ in self._idle:
+                self._close_quietly(conn)
+            self._idle = []
+
+    def stats(self):
+        with self._cond:
+            return {
+                "pid": os.getpid(),
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "idle_timeout": self.idle_timeout,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                **self._counters,
+            }
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return this process's pool, creating it lazily (and again after a fork)"""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                # Connections inherited from a parent process must not be reused; just drop them
+                _pool = ConnectionPool(db_backend.connect, **POOL_CONFIG)
+                _pool_pid = pid
+    return _pool
+
+
+# ================== QUERY INSTRUMENTATION ==================
+QUERY_LOG_CONFIG = {
+    'slow_ms': float(os.getenv('SLOW_QUERY_MS', 200)),                 # log statements slower than this
+    'n_plus_one': int(os.getenv('N_PLUS_ONE_THRESHOLD', 10)),          # same statement shape this often = N+1
+    'log_summary': os.getenv('QUERY_LOG_SUMMARY', '0') == '1',         # log every request, not just flagged ones
+    'debug_header': os.getenv('QUERY_DEBUG_HEADER', '0') == '1',       # add X-Query-* response headers
+}
+
+_SQL_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_SQL_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SQL_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*")
+
+
+def sql_shape(sql):
+    """Normalise a statement so the same query with different values maps to one shape"""
+    shape = _SQL_STRING_RE.sub("?", sql)
+    shape = shape.replace("%s", "?")
+    shape = _SQL_NUMBER_RE.sub("?", shape)
+    shape = _SQL_PLACEHOLDER_LIST_RE.sub("(?+)", shape)   # IN (...) lists and multi-row VALUES
+    return " ".join(shape.split())
+
+
+def params_fingerprint(params):
+    """Short stable digest of bound parameters: enough to spot repeats without logging values"""
+    if not params:
+        return "-"
+    values = params.values() if isinstance(params, dict) else params
+    types = ",".join(type(v).__name__ for v in values)
+    digest = hashlib.sha1(repr(params).encode("utf-8", "replace")).hexdigest()[:10]
+    return f"{digest}[{types}]"
+
+
+class QueryStats:
+    """Statements, time and rows issued by one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.shapes = Counter()
+        self.slow = []
+
+    def record(self, sql, params, seconds, rowcount):
+        shape = sql_shape(sql)
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[shape] += 1
+        if rowcount and rowcount > 0 and not shape.lstrip().upper().startswith(("SELECT", "SHOW", "EXPLAIN")):
+            self.rows += rowcount          # rows written; rows read are counted as they are fetched
+        if seconds * 1000 >= QUERY_LOG_CONFIG['slow_ms']:
+            self.slow.append((shape, params_fingerprint(params), seconds))
+            print(f"🐢 Slow query ({seconds * 1000:.1f} ms) params={params_fingerprint(params)}: {shape}")
+
+    def repeated(self, threshold=None):
+        """Statement shapes issued at least `threshold` times: likely a query inside a loop"""
+        threshold = threshold or QUERY_LOG_CONFIG['n_plus_one']
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def summary(self):
+        return {
+            "queries": self.count,
+            "query_ms": round(self.seconds * 1000, 2),
+            "rows": self.rows,
+            "distinct_shapes": len(self.shapes),
+            "n_plus_one": [{"shape": shape, "count": n} for shape, n in self.repeated()],
+            "slow": len(self.slow),
+        }
+
+
+class InstrumentedCursor:
+    """Wraps a DB-API cursor and reports every statement to a QueryStats"""
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._stats.record(operation, params, time.perf_counter() - started, self._cursor.rowcount)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._stats.record(operation, None, time.perf_counter() - started, self._cursor.rowcount)
+
+    def _timed_fetch(self, method, *args):
+        started = time.perf_counter()
+        result = getattr(self._cursor, method)(*args)
+        self._stats.seconds += time.perf_counter() - started
+        return result
+
+    def fetchone(self):
+        row = self._timed_fetch("fetchone")
+        if row is not None:
+            self._stats.rows += 1
+        return row
+
+    def fetchall(self):
+        rows = self._timed_fetch("fetchall")
+        self._stats.rows += len(rows)
+        return rows
+
+    def fetchmany(self, size=1):
+        rows = self._timed_fetch("fetchmany", size)
+        self._stats.rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Wraps a pooled connection so every cursor it hands out is instrumented"""
+
+    def __init__(self, conn, stats):
+        self.raw = conn
+        self.stats = stats
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self.raw.cursor(*args, **kwargs), self.stats)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+def get_db():
+    if "db" not in g:
+        g.query_stats = QueryStats()
+        g.db = InstrumentedConnection(get_pool().acquire(), g.query_stats)
     return g.db
 
 @app.teardown_appcontext
 def close_db(exc):
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        get_pool().release(db.raw)
+
+
+@app.errorhandler(PoolExhausted)
+def _pool_exhausted(e):
+    """No connection within DB_POOL_TIMEOUT: the routes only catch mysql.connector.Error"""
+    print(f"⚠️  {e}")
+    return jsonify({"status": "error", "message": "The database is busy; please retry."}), 503, \
+        {"Retry-After": "1"}
+
+
+@app.after_request
+def _query_debug_headers(response):
+    stats = g.get("query_stats")
+    if stats is not None and QUERY_LOG_CONFIG['debug_header']:
+        response.headers["X-Query-Count"] = str(stats.count)
+        response.headers["X-Query-Time-Ms"] = f"{stats.seconds * 1000:.2f}"
+        response.headers["X-Query-Rows"] = str(stats.rows)
+        repeated = stats.repeated()
+        if repeated:
+            response.headers["X-Query-N-Plus-One"] = f"{repeated[0][1]}x {repeated[0][0][:120]}"
+    return response
+
+
+@app.teardown_request
+def _log_query_summary(exc):
+    # teardown_request still has the request context (and sees queries made while streaming)
+    stats = g.get("query_stats")
+    if stats is None:
+        return
+    repeated = stats.repeated()
+    if repeated:
+        for shape, n in repeated[:3]:
+            print(f"⚠️  N+1 suspect on {request.method} {request.path}: {n}x {shape}")
+    if repeated or stats.slow or QUERY_LOG_CONFIG['log_summary']:
+        print(f"🧮 {request.method} {request.path}: {stats.count} queries, "
+              f"{stats.seconds * 1000:.1f} ms, {stats.rows} rows, {len(stats.shapes)} shapes")
+
+
+@app.route("/api/db/pool_stats", methods=["GET"])
+def db_pool_stats():
+    """Connection pool counters for this worker (poll it per worker for monitoring)."""
+    return jsonify({"ok": True, "pool": get_pool().stats()})
+
+
+# ================== REQUEST METRICS ==================
+# Each worker aggregates its own requests and, when METRICS_DIR is set, periodically writes
+# a snapshot there; /metrics merges every worker's snapshot into Prometheus text format.
+# Snapshots of exited workers are folded into one retired.json (so their counts survive
+# restarts and redeploys) and deleted.
+METRICS_CONFIG = {
+    'dir': os.getenv('METRICS_DIR'),
+    'flush_interval': float(os.getenv('METRICS_FLUSH_INTERVAL', 5)),
+}
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 1024, 8192, 65536, 524288, 4194304)
+
+
+def _observe(buckets, counts, value):
+    """Add one observation to cumulative-style bucket counts (last slot is +Inf)"""
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            counts[i] += 1
+            return
+    counts[-1] += 1
+
+
+class RequestMetrics:
+    """Per-endpoint request counters and histograms for one worker process"""
+
+    RETIRED_FILE = "retired.json"
+
+    def __init__(self, metrics_dir=None, flush_interval=5.0):
+        self.metrics_dir = metrics_dir
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._series = {}       # "endpoint|method" -> counters
+        self._in_flight = 0
+        self._last_flush = 0.0
+        self._flushed_pid = None
+
+    def _new_series(self):
+        return {
+            "count": 0,
+            "errors": 0,
+            "status": {},
+            "latency": [0] * (len(LATENCY_BUCKETS) + 1),
+            "latency_sum": 0.0,
+            "response_bytes": [0] * (len(SIZE_BUCKETS) + 1),
+            "response_bytes_sum": 0,
+            "request_bytes_sum": 0,
+        }
+
+    def start(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def finish(self, endpoint, method, status, seconds, request_bytes, response_bytes):
+        key = f"{endpoint}|{method}"
+        with self._lock:
+            self._in_flight -= 1
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = self._new_series()
+            series["count"] += 1
+            series["status"][str(status)] = series["status"].get(str(status), 0) + 1
+            if status >= 500:
+                series["errors"] += 1
+            _observe(LATENCY_BUCKETS, series["latency"], seconds)
+            series["latency_sum"] += seconds
+            _observe(SIZE_BUCKETS, series["response_bytes"], response_bytes)
+            series["response_bytes_sum"] += response_bytes
+            series["request_bytes_sum"] += request_bytes
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "in_flight": self._in_flight,
+                "series": json.loads(json.dumps(self._series)),
+            }
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.metrics_dir, f"worker-{pid}.json")
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write(path, snap):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snap, f)
+        os.replace(tmp, path)   # readers never see a half-written file
+
+    def _merge(self, merged, series_map):
+        for key, series in series_map.items():
+            total = merged.setdefault(key, self._new_series())
+            for name in ("count", "errors", "latency_sum", "response_bytes_sum", "request_bytes_sum"):
+                total[name] += series[name]
+            for name in ("latency", "response_bytes"):
+                total[name] = [a + b for a, b in zip(total[name], series[name])]
+            for code, n in series["status"].items():
+                total["status"][code] = total["status"].get(code, 0) + n
+
+    @contextmanager
+    def _dir_lock(self, timeout=2.0):
+        """Cross-process lock on metrics_dir; yields False if it could not be taken in time"""
+        with open(os.path.join(self.metrics_dir, "metrics.lock"), "a+b") as lock_file:
+            deadline = time.monotonic() + timeout
+            while not _try_lock_file(lock_file):
+                if time.monotonic() > deadline:
+                    yield False
+                    return
+                time.sleep(0.01)
+            try:
+                yield True
+            finally:
+                _unlock_file(lock_file)
+
+    def _retire(self, paths):
+        """Fold exited workers' snapshots into retired.json, then delete them (hold _dir_lock)"""
+        snaps = [snap for snap in map(self._read, paths) if snap]
+        if snaps:
+            retired_path = os.path.join(self.metrics_dir, self.RETIRED_FILE)
+            retired = self._read(retired_path) or {"pid": None, "in_flight": 0, "series": {}}
+            for snap in snaps:
+                self._merge(retired["series"], snap["series"])
+            self._write(retired_path, retired)
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def maybe_flush(self, force=False):
+        if not self.metrics_dir:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            path = self._snapshot_path(os.getpid())
+            if self._flushed_pid != os.getpid():
+                # A file under our pid before our first flush is an exited worker's (pid reused)
+                with self._dir_lock() as locked:
+                    if locked and os.path.exists(path):
+                        self._retire([path])
+                self._flushed_pid = os.getpid()
+            self._write(path, self.snapshot())
+        except OSError as e:
+            print(f"⚠️  Could not write metrics snapshot: {e}")
+
+    @staticmethod
+    def _pid_alive(pid):
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+    def collect(self):
+        """Merge this worker's live numbers with every other worker's last snapshot
+
+        Returns (series, in-flight requests, live workers). Exited workers' snapshots are
+        retired on the way, so their counters stay in the totals without a file each.
+        """
+        live, exited = [self.snapshot()], []
+        if self.metrics_dir and os.path.isdir(self.metrics_dir):
+            me = os.getpid()
+            with self._dir_lock() as locked:
+                dead = []
+                for filename in os.listdir(self.metrics_dir):
+                    if not (filename.startswith("worker-") and filename.endswith(".json")):
+                        continue
+                    path = os.path.join(self.metrics_dir, filename)
+                    snap = self._read(path)
+                    if snap is None or snap.get("pid") == me:
+                        continue
+                    if self._pid_alive(snap["pid"]):
+                        live.append(snap)
+                    elif locked:
+                        dead.append(path)
+                    else:
+                        exited.append(snap)     # counted this time, retired by a later scrape
+                if dead:
+                    self._retire(dead)
+                retired = self._read(os.path.join(self.metrics_dir, self.RETIRED_FILE))
+                if retired:
+                    exited.append(retired)
+
+        merged = {}
+        for snap in live + exited:
+            self._merge(merged, snap["series"])
+        in_flight = sum(snap.get("in_flight", 0) for snap in live)
+        return merged, in_flight, len(live)
+
+    def render_prometheus(self):
+        merged, in_flight, workers = self.collect()
+
+        def labels(**kv):
+            return "{" + ",".join(
+                f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                for k, v in kv.items()
+            ) + "}"
+
+        def histogram(name, buckets, counts, total_sum, **kv):
+            out, running = [], 0
+            for bound, n in zip(list(buckets) + ["+Inf"], counts):
+                running += n
+                out.append(f"{name}_bucket{labels(**kv, le=bound)} {running}")
+            out.append(f"{name}_sum{labels(**kv)} {total_sum}")
+            out.append(f"{name}_count{labels(**kv)} {running}")
+            return out
+
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {in_flight}",
+            "# HELP app_metrics_workers Live workers merged into this scrape.",
+            "# TYPE app_metrics_workers gauge",
+            f"app_metrics_workers {workers}",
+            "# HELP http_requests_total Requests served, by endpoint, method and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        items = sorted((key.split("|", 1), series) for key, series in merged.items())
+        for (endpoint, method), series in items:
+            for code, n in sorted(series["status"].items()):
+                lines.append(f"http_requests_total{labels(endpoint=endpoint, method=method, status=code)} {n}")
+        lines += ["# HELP http_request_errors_total Requests that ended in a 5xx or an unhandled exception.",
+                  "# TYPE http_request_errors_total counter"]
+        for (endpoint, method), series in items:
+            lines.append(f"http_request_errors_total{labels(endpoint=endpoint, method=method)} {series['errors']}")
+        lines += ["# HELP http_request_duration_seconds Request latency.",
+                  "# TYPE http_request_duration_seconds histogram"]
+        for (endpoint, method), series in items:
+            lines += histogram("http_request_duration_seconds", LATENCY_BUCKETS, series["latency"],
+                               series["latency_sum"], endpoint=endpoint, method=method)
+        lines += ["# HELP http_response_size_bytes Response body size.",
+                  "# TYPE http_response_size_bytes histogram"]
+        for (endpoint, method), series in items:
+            lines += histogram("http_response_size_bytes", SIZE_BUCKETS, series["response_bytes"],
+                               series["response_bytes_sum"], endpoint=endpoint, method=method)
+        lines += ["# HELP http_request_size_bytes_total Request body bytes received.",
+                  "# TYPE http_request_size_bytes_total counter"]
+        for (endpoint, method), series in items:
+            lines.append(f"http_request_size_bytes_total{labels(endpoint=endpoint, method=method)} "
+                         f"{series['request_bytes_sum']}")
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics(METRICS_CONFIG['dir'], METRICS_CONFIG['flush_interval'])
 
 
 @app.before_request
-def _init_db_once():
-    global _db_inited
-    if not _db_inited:
-        with _db_init_lock:
-            if not _db_inited:
+def _metrics_start():
+    # The request context is already gone by teardown_appcontext, so capture labels now
+    g._metrics_labels = (request.endpoint or "unmatched", request.method, request.content_length or 0)
+    g._metrics_started = time.perf_counter()
+    request_metrics.start()
+
+
+@app.after_request
+def _metrics_response(response):
+    g._metrics_status = response.status_code
+    # Streamed responses have no length up front; they count as 0 bytes. Asking one for its
+    # length would read the whole generator here, before a single chunk reaches the client.
+    g._metrics_bytes = 0 if response.is_streamed else (response.calculate_content_length() or 0)
+    return response
+
+
+@app.teardown_appcontext
+def _metrics_finish(exc):
+    started = g.pop("_metrics_started", None)
+    if started is None:      # app context without a request (CLI commands, background work)
+        return
+    endpoint, method, request_bytes = g.pop("_metrics_labels")
+    status = 500 if exc is not None else g.pop("_metrics_status", 500)
+    request_metrics.finish(
+        endpoint=endpoint,
+        method=method,
+        status=status,
+        seconds=time.perf_counter() - started,
+        request_bytes=request_bytes,
+        response_bytes=g.pop("_metrics_bytes", 0),
+    )
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus scrape endpoint, merged across every worker sharing METRICS_DIR."""
+    request_metrics.maybe_flush(force=True)
+    return Response(request_metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+# ================== BOOTSTRAP & HEALTH ==================
+# Importing the app never touches the database: schema checks and pool warm-up run in a
+# background thread per worker, retrying with backoff. /healthz says the process is alive,
+# /readyz says it can serve (load balancers should route on it); until then requests wait
+# briefly for the bootstrap and get a 503 if it does not finish.
+BOOTSTRAP_CONFIG = {
+    'request_wait': float(os.getenv('BOOTSTRAP_REQUEST_WAIT', 5)),     # seconds a request waits for readiness
+    'retry_max': float(os.getenv('BOOTSTRAP_RETRY_MAX', 30)),          # cap on the retry backoff
+    'ready_timeout': float(os.getenv('READYZ_TIMEOUT', 2)),            # /readyz DB probe budget
+}
+
+# Routes that must answer while the database is still unavailable
+BOOTSTRAP_EXEMPT_ENDPOINTS = {"healthz", "readyz", "metrics", "static"}
+
+
+class Bootstrap:
+    """Runs ensure_database() and pool warm-up off the request path, once per process"""
+
+    def __init__(self, request_wait, retry_max):
+        self.request_wait = request_wait
+        self.retry_max = retry_max
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._pid = None
+        self._thread = None
+        self.phase = "pending"      # pending -> schema -> pool_warmup -> ready
+        self.attempts = 0
+        self.started_at = time.time()
+        self.ready_in_ms = None
+
+    def start(self):
+        """Start the bootstrap thread for this process (again after a fork: threads do not survive it)"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._ready.clear()
+            self.phase, self.attempts, self.ready_in_ms = "pending", 0, None
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="db-bootstrap", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        delay = 1.0
+        while True:
+            self.attempts += 1
+            self.phase = "schema"
+            try:
+                if ensure_database():
+                    self.phase = "pool_warmup"
+                    self._warm_pool()
+                    break
+            except Exception:
+                _setup_state["error"] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+                print("DB init error:\n", traceback.format_exc())
+            self.phase = "retrying"
+            time.sleep(delay)
+            delay = min(delay * 2, self.retry_max)
+        self.ready_in_ms = round((time.time() - self.started_at) * 1000)
+        self.phase = "ready"
+        self._ready.set()
+        print(f"✅ Worker {os.getpid()} ready after {self.ready_in_ms} ms ({self.attempts} attempt(s)).")
+
+    @staticmethod
+    def _warm_pool():
+        """Open the pool's steady-state connections now rather than on the first requests"""
+        pool = get_pool()
+        conns = []
+        try:
+            for _ in range(pool.size):
+                conns.append(pool.acquire())
+        finally:
+            for conn in conns:
+                pool.release(conn)
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        self.start()
+        return self._ready.wait(timeout)
+
+    def status(self):
+        return {
+            "phase": self.phase,
+            "ready": self.ready,
+            "attempts": self.attempts,
+            "ready_in_ms": self.ready_in_ms,
+            "last_error": None if self.ready else _setup_state["error"],
+        }
+
+
+bootstrap = Bootstrap(BOOTSTRAP_CONFIG['request_wait'], BOOTSTRAP_CONFIG['retry_max'])
+
+
+@app.before_request
+def _wait_for_bootstrap():
+    if bootstrap.ready or request.endpoint in BOOTSTRAP_EXEMPT_ENDPOINTS:
+        return None
+    if bootstrap.wait(bootstrap.request_wait):
+        return None
+    resp = jsonify({"status": "error", "message": "Service is starting; the database is not ready yet.",
+                    "bootstrap": bootstrap.status()})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = "5"
+    return resp
+
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness: the worker is up and serving. Never touches the database."""
+    bootstrap.start()
+    return jsonify({"status": "ok", "pid": os.getpid(),
+                    "uptime_s": round(time.time() - bootstrap.started_at, 1),
+                    "bootstrap": bootstrap.phase})
+
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness: bootstrap finished and a pooled connection answers within READYZ_TIMEOUT."""
+    bootstrap.start()
+    body = {"bootstrap": bootstrap.status(), "database": {"backend": db_backend.name, "reachable": False}}
+    if not bootstrap.ready:
+        body["status"] = "starting"
+        return jsonify(body), 503
+
+    pool = get_pool()
+    started = time.perf_counter()
+    conn = None
+    try:
+        conn = pool.acquire(timeout=BOOTSTRAP_CONFIG['ready_timeout'])
+        cur = conn.cursor()
+        cur.execute("SELECT 1")
+        cur.fetchall()
+        cur.close()
+        body["database"].update(reachable=True, latency_ms=round((time.perf_counter() - started) * 1000, 2))
+    except (PoolExhausted, mysql.connector.Error) as e:
+        body["database"]["error"] = str(e)
+        if conn is not None:
+            pool.release(conn, discard=True)
+            conn = None
+    finally:
+        if conn is not None:
+            pool.release(conn)
+    body["pool"] = pool.stats()
+    body["status"] = "ready" if body["database"]["reachable"] else "unavailable"
+    return jsonify(body), 200 if body["database"]["reachable"] else 503
+
+
+def _placeholders(values):
+    """Comma-separated %s list for an IN (...) clause"""
+    return ', '.join(['%s'] * len(values))
+
+
+class CompletionEngine:
+    """Set-based lesson completion: answers for many students/lessons in a couple of queries.
+
+    A lesson is complete for a student when every material in it is marked completed;
+    a lesson without materials counts as complete (same rule as check_lesson_completion).
+    """
+
+    @staticmethod
+    def lesson_material_totals(lesson_ids=None, unit_id=None):
+        """Map lesson_id -> number of materials, for the given lessons and/or a whole unit"""
+        if lesson_ids is not None and not lesson_ids:
+            return {}
+
+        where, params = [], []
+        if unit_id is not None:
+            where.append("l.unit_id = %s"); params.append(unit_id)
+        if lesson_ids is not None:
+            where.append(f"l.lesson_id IN ({_placeholders(lesson_ids)})"); params.extend(lesson_ids)
+
+        cur = get_db().cursor(dictionary=True)
+        cur.execute(f"""
+            SELECT l.lesson_id, COUNT(lm.material_id) AS total_materials
+            FROM Lessons l
+            LEFT JOIN Lesson_Materials lm ON lm.lesson_id = l.lesson_id
+            WHERE {' AND '.join(where) if where else '1=1'}
+            GROUP BY l.lesson_id
+        """, tuple(params))
+        return {r["lesson_id"]: int(r["total_materials"]) for r in cur.fetchall()}
+
+    @staticmethod
+    def completed_material_counts(student_ids, lesson_ids=None, unit_id=None):
+        """Map (student_id, lesson_id) -> completed materials; pairs with none are omitted"""
+        if not student_ids or (lesson_ids is not None and not lesson_ids):
+            return {}
+
+        joins = ""
+        where = [f"p.student_id IN ({_placeholders(student_ids)})", "p.completed_materials > 0"]
+        params = list(student_ids)
+        if unit_id is not None:
+            joins = "JOIN Lessons l ON l.lesson_id = p.lesson_id"
+            where.append("l.unit_id = %s"); params.append(unit_id)
+        if lesson_ids is not None:
+            where.append(f"p.lesson_id IN ({_placeholders(lesson_ids)})"); params.extend(lesson_ids)
+
+        # Counts come from the materialized Student_Lesson_Progress rows (see ProgressStore)
+        cur = get_db().cursor(dictionary=True)
+        cur.execute(f"""
+            SELECT p.student_id, p.lesson_id, p.completed_materials
+            FROM Student_Lesson_Progress p
+            {joins}
+            WHERE {' AND '.join(where)}
+        """, tuple(params))
+        return {(r["student_id"], r["lesson_id"]): int(r["completed_materials"]) for r in cur.fetchall()}
+
+    @staticmethod
+    def completed_pairs(student_ids, lesson_ids=None, unit_id=None, totals=None):
+        """Set of (student_id, lesson_id) pairs that are complete.
+
+        Pass `totals` (from lesson_material_totals) when the caller already has them.
+        """
+        if totals is None:
+            totals = CompletionEngine.lesson_material_totals(lesson_ids=lesson_ids, unit_id=unit_id)
+        if not totals or not student_ids:
+            return set()
+
+        counts = CompletionEngine.completed_material_counts(student_ids, lesson_ids=list(totals))
+        return {
+            (sid, lid)
+            for sid in student_ids
+            for lid, total in totals.items()
+            if counts.get((sid, lid), 0) >= total
+        }
+
+    @staticmethod
+    def completed_lesson_counts(student_ids, unit_id):
+        """Map student_id -> number of completed lessons in the unit (students with none map to 0)"""
+        totals = CompletionEngine.lesson_material_totals(unit_id=unit_id)
+        result = {sid: 0 for sid in student_ids}
+        for sid, _ in CompletionEngine.completed_pairs(student_ids, totals=totals):
+            result[sid] += 1
+        return result
+
+
+class ProgressStore:
+    """Maintains Student_Lesson_Progress, the materialized (student, lesson) material counts
+    (all materials, plus the assignment and reading ones the student report shows).
+
+    Every write that changes completion or a lesson's materials calls one of these with
+    its own cursor, before committing, so the counts land in the same transaction.
+    """
+
+    TABLE = "Student_Lesson_Progress"
+
+    @staticmethod
+    def _refresh(cursor, student_id, lesson_scope, scope_params):
+        """Recompute one student's rows for the lessons matched by `lesson_id IN (<lesson_scope>)`"""
+        cursor.execute(f"""
+            DELETE FROM Student_Lesson_Progress
+            WHERE student_id = %s AND lesson_id IN ({lesson_scope})
+        """, (student_id, *scope_params))
+        cursor.execute(f"""
+            INSERT INTO Student_Lesson_Progress
+                (student_id, lesson_id, completed_materials, total_materials,
+                 completed_assignments, completed_reading)
+            SELECT %s, lm.lesson_id,
+                   COUNT(CASE WHEN smc.completed THEN 1 END),
+                   COUNT(lm.material_id),
+                   COUNT(CASE WHEN smc.completed AND lm.material_type = 'assignment' THEN 1 END),
+                   COUNT(CASE WHEN smc.completed AND lm.material_type = 'reading' THEN 1 END)
+            FROM Lesson_Materials lm
+            LEFT JOIN Student_Material_Completion smc
+                   ON smc.material_id = lm.material_id AND smc.student_id = %s
+            WHERE lm.lesson_id IN ({lesson_scope})
+            GROUP BY lm.lesson_id
+        """, (student_id, student_id, *scope_params))
+
+    @staticmethod
+    def refresh(cursor, student_id, lesson_ids):
+        """Recompute one student's rows for the given lessons from Student_Material_Completion"""
+        lesson_ids = list(lesson_ids)
+        if lesson_ids:
+            ProgressStore._refresh(cursor, student_id, _placeholders(lesson_ids), lesson_ids)
+
+    @staticmethod
+    def refresh_for_materials(cursor, student_id, material_ids):
+        """Refresh the lessons that own the given materials"""
+        material_ids = list(material_ids)
+        if material_ids:
+            ProgressStore._refresh(
+                cursor, student_id,
+                f"SELECT lesson_id FROM Lesson_Materials WHERE material_id IN ({_placeholders(material_ids)})",
+                material_ids,
+            )
+
+    @staticmethod
+    def refresh_lesson(cursor, lesson_id):
+        """Recount every student's row for a lesson after a material was added or removed"""
+        cursor.execute("""
+            UPDATE Student_Lesson_Progress
+            SET total_materials = (
+                    SELECT COUNT(*) FROM Lesson_Materials lm
+                    WHERE lm.lesson_id = Student_Lesson_Progress.lesson_id
+                ),
+                completed_materials = (
+                    SELECT COUNT(*)
+                    FROM Lesson_Materials lm
+                    JOIN Student_Material_Completion smc
+                      ON smc.material_id = lm.material_id
+                     AND smc.student_id = Student_Lesson_Progress.student_id
+                     AND smc.completed = TRUE
+                    WHERE lm.lesson_id = Student_Lesson_Progress.lesson_id
+                ),
+                completed_assignments = (
+                    SELECT COUNT(*)
+                    FROM Lesson_Materials lm
+                    JOIN Student_Material_Completion smc
+                      ON smc.material_id = lm.material_id
+                     AND smc.student_id = Student_Lesson_Progress.student_id
+                     AND smc.completed = TRUE
+                    WHERE lm.lesson_id = Student_Lesson_Progress.lesson_id
+                      AND lm.material_type = 'assignment'
+                ),
+                completed_reading = (
+                    SELECT COUNT(*)
+                    FROM Lesson_Materials lm
+                    JOIN Student_Material_Completion smc
+                      ON smc.material_id = lm.material_id
+                     AND smc.student_id = Student_Lesson_Progress.student_id
+                     AND smc.completed = TRUE
+                    WHERE lm.lesson_id = Student_Lesson_Progress.lesson_id
+                      AND lm.material_type = 'reading'
+                ),
+                date_updated = NOW()
+            WHERE lesson_id = %s
+        """, (lesson_id,))
+
+    @staticmethod
+    def reset_unit(cursor, student_id, unit_id):
+        """Drop a student's rows for a unit (progress reset on re-enrollment)"""
+        cursor.execute("""
+            DELETE FROM Student_Lesson_Progress
+            WHERE student_id = %s
+              AND lesson_id IN (SELECT lesson_id FROM Lessons WHERE unit_id = %s)
+        """, (student_id, unit_id))
+
+    @staticmethod
+    def rebuild(cursor, student_id=None):
+        """Backfill from Student_Material_Completion; returns the number of rows written"""
+        scope, params = ("WHERE student_id = %s", (student_id,)) if student_id is not None else ("", ())
+        cursor.execute(f"DELETE FROM Student_Lesson_Progress {scope}", params)
+        scope = "WHERE smc.student_id = %s" if student_id is not None else ""
+        cursor.execute(f"""
+            INSERT INTO Student_Lesson_Progress
+                (student_id, lesson_id, completed_materials, total_materials,
+                 completed_assignments, completed_reading)
+            SELECT smc.student_id, lm.lesson_id,
+                   COUNT(CASE WHEN smc.completed THEN 1 END),
+                   totals.total_materials,
+                   COUNT(CASE WHEN smc.completed AND lm.material_type = 'assignment' THEN 1 END),
+                   COUNT(CASE WHEN smc.completed AND lm.material_type = 'reading' THEN 1 END)
+            FROM Student_Material_Completion smc
+            JOIN Lesson_Materials lm ON lm.material_id = smc.material_id
+            JOIN (
+                SELECT lesson_id, COUNT(*) AS total_materials
+                FROM Lesson_Materials
+                GROUP BY lesson_id
+            ) totals ON totals.lesson_id = lm.lesson_id
+            {scope}
+            GROUP BY smc.student_id, lm.lesson_id, totals.total_materials
+        """, params)
+        return cursor.rowcount
+
+    @staticmethod
+    def ensure_table(cursor):
+        """Create the table on databases built before it existed, then backfill it"""
+        cursor.execute("SHOW TABLES LIKE %s", (ProgressStore.TABLE,))
+        if cursor.fetchall():
+            return False
+
+        ddl = next(stmt for stmt in read_sql_file(SQL_FILE)
+                   if stmt.startswith(f"CREATE TABLE IF NOT EXISTS {ProgressStore.TABLE}"))
+        cursor.execute(ddl)
+        rows = ProgressStore.rebuild(cursor)
+        print(f"✅ Created {ProgressStore.TABLE} and backfilled {rows} rows.")
+        return True
+
+
+# ================== CHANGE LOG & SYNC ==================
+# change_id is taken when a write inserts its log row, not when it commits, so on MySQL a row can
+# become visible after later ids were already read. /api/sync/changes re-sends the last
+# settle_seconds of rows (by date_changed, i.e. insert time) to cover that. A transaction that
+# stays open longer than that after its log insert (lock waits, a long multi-row unenroll) can
+# still land below a cursor already handed out; the client then only sees it on a full resync.
+# Keep SYNC_SETTLE_SECONDS above the longest write transaction. SQLite runs one writer at a time,
+# so ids are always in commit order there.
+SYNC_CONFIG = {
+    'max_changes': int(os.getenv('SYNC_MAX_CHANGES', 1000)),         # log rows read per /api/sync/changes call
+    'settle_seconds': int(os.getenv('SYNC_SETTLE_SECONDS', 2)),       # re-send changes this recent on the next call
+    'retention_days': int(os.getenv('CHANGE_LOG_RETENTION_DAYS', 30)),
+}
+
+
+class ChangeLog:
+    """Appends to Change_Log, the row-version feed behind /api/sync/changes.
+
+    Write routes call record() with their own cursor before committing, so a change and its
+    log row land (or roll back) together. entity_id is the row's key as a string and unit_id
+    the course it belongs to (looked up from the key while the row still exists, so deletes
+    are recorded before the DELETE). student_id is set for rows only that student sees.
+    Rows removed by ON DELETE CASCADE are implied by their parent's delete: a deleted
+    enrollment drops the whole unit on the client, a deleted lesson drops its materials.
+    Bulk removals (a withdrawing student, a deleted classroom) log each row first with the
+    record_*_enrollments helpers, which INSERT ... SELECT the keys inside the same transaction.
+    """
+
+    # entity -> (key column, key type, SELECT of current rows by key, per-student rows?)
+    ENTITIES = {
+        "enrollments": ("unit_id", str, """
+            SELECT e.Unit_id AS unit_id, c.Title AS title, e.Status AS status,
+                   e.Date_enroll AS date_enroll, e.Credit_earned AS credit_earned
+            FROM Enrollment e JOIN Courses c ON c.Unit_id = e.Unit_id
+            WHERE e.Student_id = %s AND e.Unit_id IN ({ids})
+        """, True),
+        "classroom_enrollments": ("classroom_id", int, """
+            SELECT ce.classroom_id, c.classroom_name, c.unit_id, ce.date_enrolled
+            FROM Classroom_Enrollment ce JOIN Classroom c ON c.classroom_id = ce.classroom_id
+            WHERE ce.student_id = %s AND ce.classroom_id IN ({ids})
+        """, True),
+        "lessons": ("lesson_id", int, """
+            SELECT lesson_id, unit_id, title, description, objectives, estimated_time_hours,
+                   prerequisite_lesson_id, credits, date_updated
+            FROM Lessons WHERE lesson_id IN ({ids})
+        """, False),
+        "materials": ("material_id", int, """
+            SELECT material_id, lesson_id, title, material_type, content_url, estimated_time_minutes
+            FROM Lesson_Materials WHERE material_id IN ({ids})
+        """, False),
+        "completions": ("material_id", int, """
+            SELECT material_id, completed FROM Student_Material_Completion
+            WHERE student_id = %s AND material_id IN ({ids})
+        """, True),
+    }
+
+    # entity -> unit_id of the row with that key
+    UNIT_OF = {
+        "enrollments": "%s",
+        "classroom_enrollments": "(SELECT unit_id FROM Classroom WHERE classroom_id = %s)",
+        "lessons": "(SELECT unit_id FROM Lessons WHERE lesson_id = %s)",
+        "materials": """(SELECT l.unit_id FROM Lesson_Materials lm JOIN Lessons l ON l.lesson_id = lm.lesson_id
+                         WHERE lm.material_id = %s)""",
+    }
+    UNIT_OF["completions"] = UNIT_OF["materials"]
+
+    @staticmethod
+    def record(cursor, entity, entity_ids, op="upsert", student_id=None):
+        """Log `op` for every key in entity_ids (caller commits)"""
+        entity_ids = [str(k) for k in entity_ids]
+        if not entity_ids:
+            return
+        rows = ", ".join([f"(%s, %s, %s, {ChangeLog.UNIT_OF[entity]}, %s)"] * len(entity_ids))
+        cursor.execute(
+            f"INSERT INTO Change_Log (entity, entity_id, op, unit_id, student_id) VALUES {rows}",
+            [v for key in entity_ids for v in (entity, key, op, key, student_id)],
+        )
+        ChangeLog._recorded()
+
+    @staticmethod
+    def _recorded():
+        if has_app_context():
+            g._changes_recorded = True      # wake the event streams once the request is done
+
+    @staticmethod
+    def record_unit_enrollments(cursor, unit_id, op="delete"):
+        """Log `op` on the enrollment of every student in a unit (before the course is deleted)"""
+        cursor.execute("""
+            INSERT INTO Change_Log (entity, entity_id, op, unit_id, student_id)
+            SELECT 'enrollments', Unit_id, %s, Unit_id, Student_id FROM Enrollment WHERE Unit_id = %s
+        """, (op, unit_id))
+        ChangeLog._recorded()
+
+    @staticmethod
+    def record_student_enrollments(cursor, student_id, op="delete"):
+        """Log `op` on every unit enrollment of one student (before they are deleted)"""
+        cursor.execute("""
+            INSERT INTO Change_Log (entity, entity_id, op, unit_id, student_id)
+            SELECT 'enrollments', Unit_id, %s, Unit_id, Student_id FROM Enrollment WHERE Student_id = %s
+        """, (op, student_id))
+        ChangeLog._recorded()
+
+    @staticmethod
+    def record_classroom_enrollments(cursor, op="delete", classroom_id=None, student_id=None):
+        """Log `op` on the classroom enrollments of one classroom, or of one student (before deleting them)"""
+        column, value = ("ce.classroom_id", classroom_id) if classroom_id is not None else ("ce.student_id", student_id)
+        cursor.execute(f"""
+            INSERT INTO Change_Log (entity, entity_id, op, unit_id, student_id)
+            SELECT 'classroom_enrollments', ce.classroom_id, %s, c.unit_id, ce.student_id
+            FROM Classroom_Enrollment ce JOIN Classroom c ON c.classroom_id = ce.classroom_id
+            WHERE {column} = %s
+        """, (op, value))
+        ChangeLog._recorded()
+
+    @staticmethod
+    def changes_since(cursor, student_id, since, limit):
+        """Log rows after `since` visible to the student: their own rows and those of their units"""
+        cursor.execute("""
+            SELECT cl.change_id, cl.entity, cl.entity_id, cl.op, cl.date_changed,
+                   CURRENT_TIMESTAMP AS db_now
+            FROM Change_Log cl
+            WHERE cl.change_id > %s
+              AND (cl.student_id = %s
+                   OR (cl.student_id IS NULL
+                       AND cl.unit_id IN (SELECT Unit_id FROM Enrollment WHERE Student_id = %s)))
+            ORDER BY cl.change_id
+            LIMIT %s
+        """, (since, student_id, student_id, limit))
+        return cursor.fetchall()
+
+    @staticmethod
+    def bounds(cursor):
+        """(oldest, newest) change_id still in the log, (None, None) when it is empty"""
+        cursor.execute("SELECT MIN(change_id) AS oldest, MAX(change_id) AS newest FROM Change_Log")
+        row = cursor.fetchone()
+        return row["oldest"], row["newest"]
+
+    @staticmethod
+    def prune(cursor, older_than_days):
+        """Delete rows older than the retention window, always keeping the newest one"""
+        _, newest = ChangeLog.bounds(cursor)
+        if newest is None:
+            return 0
+        cursor.execute(
+            "DELETE FROM Change_Log WHERE change_id < %s AND date_changed < %s",
+            (newest, datetime.now() - timedelta(days=older_than_days)),
+        )
+        return cursor.rowcount
+
+
+def _as_datetime(value):
+    """DATETIME from either backend (SQLite hands back computed columns as text)"""
+    if isinstance(value, str):
+        return _parse_sqlite_datetime(value.encode())
+    return value
+
+
+@app.route("/api/sync/changes", methods=["GET"])
+def sync_changes():
+    """
+    Everything that changed for the logged-in student since `since` (a cursor from a previous call).
+    Without `since` it only returns the current cursor with full_resync=true: take it, load the
+    full state, then poll with the cursor. Each call returns
+      {"cursor", "has_more", "full_resync",
+       "changes": {entity: {"upserted": [current rows], "deleted": [keys]}}}
+    Changes logged in the last SYNC_SETTLE_SECONDS are sent again on the next call, so a write
+    that commits within that long of its log insert is not skipped even if a later id was read
+    first; upserts are safe to re-apply. A write left open longer can be missed (see SYNC_CONFIG).
+    """
+    student_id = session.get("user_id")
+    if not student_id or session.get("user_type") != "student":
+        return jsonify({"status": "error", "message": "Not logged in as a student"}), 401
+    since = request.args.get("since", type=int)
+
+    cursor = get_db().cursor(dictionary=True)
+    try:
+        oldest, newest = ChangeLog.bounds(cursor)
+        if since is None or (oldest is not None and since < oldest - 1) or (newest or 0) < since:
+            return jsonify({"status": "success", "cursor": newest or 0, "has_more": False,
+                            "full_resync": True, "changes": {}}), 200
+
+        rows = ChangeLog.changes_since(cursor, student_id, since, SYNC_CONFIG['max_changes'])
+        has_more = len(rows) == SYNC_CONFIG['max_changes']
+        next_cursor = rows[-1]["change_id"] if rows else since
+        if rows and not has_more:
+            settle_from = _as_datetime(rows[-1]["db_now"]) - timedelta(seconds=SYNC_CONFIG['settle_seconds'])
+            recent = [r["change_id"] for r in rows if _as_datetime(r["date_changed"]) > settle_from]
+            if recent:
+                next_cursor = max(since, recent[0] - 1)
+
+        # Last op per row wins; upserts are answered with the row as it is now
+        latest = {}
+        for r in rows:
+            latest[(r["entity"], r["entity_id"])] = r["op"]
+
+        changes = {}
+        for entity, (key, key_type, select_sql, per_student) in ChangeLog.ENTITIES.items():
+            upserts = [key_type(k) for (e, k), op in latest.items() if e == entity and op == "upsert"]
+            deleted = [key_type(k) for (e, k), op in latest.items() if e == entity and op == "delete"]
+            current = []
+            if upserts:
+                cursor.execute(select_sql.format(ids=_placeholders(upserts)),
+                               ([student_id] if per_student else []) + upserts)
+                current = cursor.fetchall()
+                found = {r[key] for r in current}
+                deleted += [k for k in upserts if k not in found]      # gone again since the upsert
+            if current or deleted:
+                if entity == "completions":
+                    for r in current:
+                        r["completed"] = bool(r["completed"])
+                changes[entity] = {"upserted": current, "deleted": deleted}
+    except mysql.connector.Error as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+    return jsonify({"status": "success", "cursor": next_cursor, "has_more": has_more,
+                    "full_resync": False, "changes": changes}), 200
+
+
+# ================== LIVE EVENTS ==================
+# /api/events streams new Change_Log rows to the browser as server-sent events. Each worker runs
+# one poller thread that reads the log and hands every row to the streams allowed to see it.
+# A request that recorded changes wakes this worker's poller when it ends; other workers see the
+# rows on their next poll, or straight away when EVENTS_URL (redis://...) is set.
+# Events are hints: on one, the page pulls the rows themselves from /api/sync/changes.
+#
+# Capacity: an open stream holds one gthread thread for up to max_stream_seconds, so per worker
+#     GUNICORN_THREADS >= EVENTS_MAX_STREAMS + EVENTS_RESERVED_THREADS
+# and the deployment holds GUNICORN_WORKERS x EVENTS_MAX_STREAMS streams (one per open student
+# page). Past the cap /api/events answers 503, and pages fall back to refreshing on popup close.
+# EVENTS_MAX_STREAMS defaults to GUNICORN_THREADS - EVENTS_RESERVED_THREADS (Procfile: 32 - 8 = 24).
+_EVENTS_RESERVED_THREADS = int(os.getenv('EVENTS_RESERVED_THREADS', 8))
+EVENTS_CONFIG = {
+    'url': os.getenv('EVENTS_URL'),
+    'poll_interval': float(os.getenv('EVENTS_POLL_INTERVAL', 2)),            # seconds between log reads
+    'heartbeat': float(os.getenv('EVENTS_HEARTBEAT', 15)),                   # keep-alive comment interval
+    'max_stream_seconds': float(os.getenv('EVENTS_MAX_STREAM_SECONDS', 300)),  # then the browser reconnects
+    'queue_max': int(os.getenv('EVENTS_QUEUE_MAX', 256)),                    # per stream, before a resync
+    'retry_ms': int(os.getenv('EVENTS_RETRY_MS', 3000)),
+    'reserved_threads': _EVENTS_RESERVED_THREADS,    # request threads streams may never take
+    'max_streams': int(os.getenv(
+        'EVENTS_MAX_STREAMS', max(GUNICORN_THREADS - _EVENTS_RESERVED_THREADS, 0))),
+}
+
+
+class LocalEventBackend:
+    """No cross-worker signal: other workers pick changes up on their next poll"""
+
+    def publish(self):
+        pass
+
+    def listen(self, callback):
+        pass
+
+
+class RedisEventBackend:
+    """Wakes every worker's poller through Redis pub/sub (needs the optional `redis` package)"""
+
+    CHANNEL = "edubridge:changes"
+
+    def __init__(self, url):
+        import redis  # optional dependency, only needed when EVENTS_URL is set
+        self._redis = redis.Redis.from_url(url)
+
+    def publish(self):
+        self._redis.publish(self.CHANNEL, os.getpid())
+
+    def listen(self, callback):
+        def _run():
+            while True:
                 try:
-                    setup_database()
-                    _db_inited = True
-                    print("✅ DB initialized (run-once before_request)")
-                except Exception:
-                    print("DB init error:\n", traceback.format_exc())
-    # return None implicitly (continue request)
+                    pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(self.CHANNEL)
+                    for _ in pubsub.listen():
+                        callback()
+                except Exception as e:
+                    print(f"⚠️  Event listener lost Redis ({e}); retrying in 5 s")
+                    time.sleep(5)
+        threading.Thread(target=_run, name="events-redis", daemon=True).start()
+
+
+class EventSubscription:
+    """One open stream: whose it is, which units it follows and its queue of pending events"""
+
+    def __init__(self, user_type, user_id, units, queue_max):
+        self.user_type = user_type
+        self.user_id = user_id
+        self.units = frozenset(units)
+        self.queue = queue.Queue(maxsize=queue_max)
+        self.overflowed = False
+
+    def matches(self, event):
+        # Students get their own rows and the unit-wide rows of their units;
+        # instructors get every row of the units they own, students' completions included
+        if self.user_type == "student" and event["student_id"] is not None:
+            return event["student_id"] == self.user_id
+        return event["unit_id"] in self.units
+
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.overflowed = True
+            return False
+
+
+class EventBroker:
+    """Per-worker fan-out of new Change_Log rows to the subscribed streams"""
+
+    BATCH = 500
+
+    def __init__(self, backend, poll_interval):
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+        self._last_id = None
+        self.stats = {"polls": 0, "events": 0, "delivered": 0, "overflows": 0, "errors": 0, "rejected": 0}
+
+    def subscribe(self, subscription, limit=None):
+        """Add a stream; False (and nothing added) when this worker already has `limit` streams"""
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                self.stats["rejected"] += 1
+                return False
+            self._subscribers.add(subscription)
+            if self._pid != os.getpid():     # first stream in this worker (threads do not survive fork)
+                self._pid = os.getpid()
+                self._last_id = None
+                self.backend.listen(self._wake.set)
+                threading.Thread(target=self._run, name="events-poller", daemon=True).start()
+        self._wake.set()
+        return True
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def notify(self):
+        """Changes were committed: poll now, and wake the other workers"""
+        self._wake.set()
+        try:
+            self.backend.publish()
+        except Exception:
+            self.stats["errors"] += 1
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self._lock:
+                subscribers = list(self._subscribers)
+            if not subscribers:
+                self._last_id = None         # nobody listening: start from the tip next time
+                continue
+            try:
+                for event in self._poll():
+                    self.stats["events"] += 1
+                    for sub in subscribers:
+                        if sub.matches(event):
+                            self.stats["delivered" if sub.offer(event) else "overflows"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️  Event poll failed: {e}")
+
+    def _poll(self):
+        """Log rows after the last one seen (the first poll only finds the current tip)"""
+        pool = get_pool()
+        conn = pool.acquire()
+        cur = conn.cursor(dictionary=True)
+        try:
+            self.stats["polls"] += 1
+            if self._last_id is None:
+                self._last_id = ChangeLog.bounds(cur)[1] or 0
+                return []
+            cur.execute("""
+                SELECT change_id, entity, entity_id, op, unit_id, student_id
+                FROM Change_Log WHERE change_id > %s ORDER BY change_id LIMIT %s
+            """, (self._last_id, self.BATCH))
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+            pool.release(conn)
+        if rows:
+            self._last_id = rows[-1]["change_id"]
+            if len(rows) == self.BATCH:
+                self._wake.set()             # more to read
+        return rows
+
+    def status(self):
+        with self._lock:
+            subscribers = len(self._subscribers)
+        return {**self.stats, "pid": os.getpid(), "backend": type(self.backend).__name__,
+                "subscribers": subscribers, "max_streams": EVENTS_CONFIG['max_streams'],
+                "last_change_id": self._last_id}
+
+
+def _make_event_backend():
+    if EVENTS_CONFIG['url']:
+        try:
+            return RedisEventBackend(EVENTS_CONFIG['url'])
+        except ImportError:
+            print("⚠️  EVENTS_URL is set but the redis package is missing; other workers will poll.")
+    return LocalEventBackend()
+
+
+event_broker = EventBroker(_make_event_backend(), EVENTS_CONFIG['poll_interval'])
+
+
+@app.teardown_request
+def _notify_event_streams(exc):
+    if g.pop("_changes_recorded", False):
+        event_broker.notify()
+
+
+def _followed_units(user_type, user_id):
+    """Units whose unit-wide events a user receives: enrolled in (students) or owned (instructors)"""
+    if user_type == "student":
+        sql = "SELECT Unit_id FROM Enrollment WHERE Student_id = %s"
+    else:
+        sql = "SELECT Unit_id FROM Courses WHERE Course_made_by = %s"
+    pool = get_pool()
+    conn = pool.acquire()      # not get_db(): the stream must not hold a connection while it is open
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, (user_id,))
+        return {row[0] for row in cur.fetchall()}
+    finally:
+        cur.close()
+        pool.release(conn)
+
+
+def _sse(event, data, event_id=None):
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.route("/api/events", methods=["GET"])
+def event_stream():
+    """
+    Server-sent events for the logged-in student or instructor.
+    Each event is named after the entity that changed (enrollments, classroom_enrollments,
+    lessons, materials, completions) with data {"change_id", "entity", "id", "op", "unit_id"}.
+    "ready" opens the stream; "resync" means this stream fell behind and was closed. Streams
+    close after EVENTS_MAX_STREAM_SECONDS and the browser reconnects by itself. Each stream
+    holds a request thread, so a worker serves at most EVENTS_MAX_STREAMS and answers 503 past it.
+    """
+    user_id, user_type = session.get("user_id"), session.get("user_type")
+    if not user_id or user_type not in ("student", "instructor"):
+        return jsonify({"status": "error", "message": "Not logged in"}), 401
 
+    try:
+        sub = EventSubscription(user_type, user_id, _followed_units(user_type, user_id),
+                                EVENTS_CONFIG['queue_max'])
+    except mysql.connector.Error as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+    if not event_broker.subscribe(sub, EVENTS_CONFIG['max_streams']):
+        return jsonify({"status": "error", "message": "Live updates are at capacity"}), 503, \
+            {"Retry-After": str(int(EVENTS_CONFIG['max_stream_seconds']))}
+
+    def generate():
+        deadline = time.monotonic() + EVENTS_CONFIG['max_stream_seconds']
+        try:
+            yield f"retry: {EVENTS_CONFIG['retry_ms']}\n" + _sse("ready", {"pid": os.getpid()})
+            while (remaining := deadline - time.monotonic()) > 0:
+                if sub.overflowed:
+                    yield _sse("resync", {})
+                    return
+                try:
+                    event = sub.queue.get(timeout=min(EVENTS_CONFIG['heartbeat'], remaining))
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if event["entity"] == "enrollments" and user_type == "student":
+                    sub.units = frozenset(_followed_units(user_type, user_id))
+                yield _sse(event["entity"], {
+                    "change_id": event["change_id"],
+                    "entity": event["entity"],
+                    "id": event["entity_id"],
+                    "op": event["op"],
+                    "unit_id": event["unit_id"],
+                }, event_id=event["change_id"])
+        finally:
+            event_broker.unsubscribe(sub)
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/api/events/stats", methods=["GET"])
+def event_stats():
+    """Event broker counters for this worker."""
+    return jsonify({"ok": True, "events": event_broker.status()})
 
 
 class PrerequisiteManager:
@@ -161,31 +2283,7 @@ class PrerequisiteManager:
     @staticmethod
     def check_lesson_completion(student_id, lesson_id):
         """Check if a student has completed a specific lesson"""
-        db = get_db()
-        cur = db.cursor(dictionary=True)
-        
-        cur.execute("""
-            SELECT material_id
-            FROM Lesson_Materials
-            WHERE lesson_id = %s
-        """, (lesson_id,))
-        materials_in_lesson = cur.fetchall()
-
-        if not materials_in_lesson:
-            return True  
-
-        total_materials = len(materials_in_lesson)
-        completed_materials_count = 0
-
-        for material in materials_in_lesson:
-            cur.execute("""
-                SELECT completed FROM Student_Material_Completion WHERE student_id = %s AND material_id = %s
-            """, (student_id, material['material_id']))
-            material_completion_status = cur.fetchone()
-            if material_completion_status and material_completion_status['completed']:
-                completed_materials_count += 1
-
-        return completed_materials_count == total_materials
+        return (student_id, lesson_id) in CompletionEngine.completed_pairs([student_id], lesson_ids=[lesson_id])
     
     @staticmethod
     def get_prerequisite_status(student_id, lesson_id):
@@ -222,27 +2320,440 @@ class PrerequisiteManager:
     @staticmethod
     def get_lessons_with_status(student_id, unit_id):
         """Get all lessons for a unit with their prerequisite status"""
-        db = get_db()
-        cur = db.cursor(dictionary=True)
-        
+        graph = PrerequisiteGraph.load(student_id, unit_id)
+        return [
+            {
+                "lesson_id": lesson_id,
+                "title": graph.lessons[lesson_id]["title"],
+                "prerequisite_lesson_id": graph.lessons[lesson_id]["prerequisite_lesson_id"],
+                **graph.status(lesson_id),
+            }
+            for lesson_id in graph.unit_lesson_ids
+        ]
+
+
+class PrerequisiteGraph:
+    """A unit's prerequisite edges plus one student's completion, resolved in memory.
+
+    Loading costs at most three queries however many lessons the unit has:
+    the unit's lessons with material totals, any prerequisites that live outside
+    the unit, and the student's completed-material counts.
+    """
+
+    def __init__(self, student_id, unit_lesson_ids, lessons, totals, completed_counts):
+        self.student_id = student_id
+        self.unit_lesson_ids = unit_lesson_ids  # ordered by lesson_id
+        self.lessons = lessons                  # lesson_id -> {title, prerequisite_lesson_id}
+        self.totals = totals                    # lesson_id -> material count
+        self.completed_counts = completed_counts
+
+    @classmethod
+    def load(cls, student_id, unit_id):
+        cur = get_db().cursor(dictionary=True)
         cur.execute("""
-            SELECT lesson_id, title, prerequisite_lesson_id
-            FROM Lessons 
-            WHERE unit_id = %s 
-            ORDER BY lesson_id
+            SELECT l.lesson_id, l.title, l.prerequisite_lesson_id,
+                   COUNT(lm.material_id) AS total_materials
+            FROM Lessons l
+            LEFT JOIN Lesson_Materials lm ON lm.lesson_id = l.lesson_id
+            WHERE l.unit_id = %s
+            GROUP BY l.lesson_id, l.title, l.prerequisite_lesson_id
+            ORDER BY l.lesson_id
         """, (unit_id,))
-        
-        lessons = cur.fetchall()
-        
-        for lesson in lessons:
-            status = PrerequisiteManager.get_prerequisite_status(student_id, lesson['lesson_id'])
-            lesson['locked'] = status['locked']
-            lesson['prerequisite_lesson'] = status['prerequisite_lesson']
-            
-            # Also check if this lesson itself is completed
-            lesson['completed'] = PrerequisiteManager.check_lesson_completion(student_id, lesson['lesson_id'])
-            
-        return lessons
+        rows = cur.fetchall()
+
+        # Prerequisites normally sit in the same unit, but a lesson moved between units keeps its edge
+        missing = sorted({
+            r["prerequisite_lesson_id"] for r in rows if r["prerequisite_lesson_id"]
+        } - {r["lesson_id"] for r in rows})
+        if missing:
+            cur.execute(f"""
+                SELECT l.lesson_id, l.title, l.prerequisite_lesson_id,
+                       COUNT(lm.material_id) AS total_materials
+                FROM Lessons l
+                LEFT JOIN Lesson_Materials lm ON lm.lesson_id = l.lesson_id
+                WHERE l.lesson_id IN ({_placeholders(missing)})
+                GROUP BY l.lesson_id, l.title, l.prerequisite_lesson_id
+            """, tuple(missing))
+            extra = cur.fetchall()
+        else:
+            extra = []
+
+        lessons = {
+            r["lesson_id"]: {"title": r["title"], "prerequisite_lesson_id": r["prerequisite_lesson_id"]}
+            for r in rows + extra
+        }
+        totals = {r["lesson_id"]: int(r["total_materials"]) for r in rows + extra}
+        completed_counts = CompletionEngine.completed_material_counts([student_id], lesson_ids=list(totals))
+
+        return cls(student_id, [r["lesson_id"] for r in rows], lessons, totals, completed_counts)
+
+    def is_completed(self, lesson_id):
+        if lesson_id not in self.totals:
+            return False
+        return self.completed_counts.get((self.student_id, lesson_id), 0) >= self.totals[lesson_id]
+
+    def status(self, lesson_id):
+        """Same fields get_prerequisite_status returns, plus the lesson's own completion"""
+        prerequisite_id = self.lessons[lesson_id]["prerequisite_lesson_id"]
+        if not prerequisite_id:
+            locked, prerequisite = False, None
+        else:
+            prereq = self.lessons.get(prerequisite_id)
+            locked = not self.is_completed(prerequisite_id)
+            prerequisite = {"id": prerequisite_id, "title": prereq["title"] if prereq else "Unknown"}
+        return {
+            "locked": locked,
+            "prerequisite_lesson": prerequisite,
+            "completed": self.is_completed(lesson_id),
+        }
+
+# ================== CATALOG CACHE ==================
+# Read-through cache for catalog data that changes rarely (courses, lessons, classrooms,
+# instructors). Entries are grouped into namespaces; a write bumps the namespace's
+# generation, which makes every key built on the old generation unreachable.
+# Set CACHE_URL (redis://...) to share entries and generations between gunicorn workers.
+# Without it entries stay in each worker, but the generations live in the Cache_Generation
+# table, so an invalidation reaches every worker within CACHE_GENERATION_POLL seconds.
+CACHE_CONFIG = {
+    'ttl': float(os.getenv('CACHE_TTL', 300)),
+    'max_entries': int(os.getenv('CACHE_MAX_ENTRIES', 2048)),   # in-process backend only
+    'generation_poll': float(os.getenv('CACHE_GENERATION_POLL', 1)),  # in-process backend only
+    'url': os.getenv('CACHE_URL'),
+}
+
+
+class DatabaseGenerations:
+    """Namespace generations in the Cache_Generation table, shared by every worker
+
+    A worker re-reads the table (one row per namespace) at most every `poll` seconds, so it
+    sees other workers' invalidations within that window and its own immediately.
+    """
+
+    def __init__(self, poll):
+        self.poll = poll
+        self._values = {}
+        self._read_at = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _run(work):
+        pool = get_pool()
+        conn = pool.acquire()
+        cur = conn.cursor()
+        try:
+            result = work(cur)
+            conn.commit()
+            return result
+        finally:
+            cur.close()
+            pool.release(conn)
+
+    @staticmethod
+    def _read_all(cur):
+        cur.execute("SELECT name, generation FROM Cache_Generation")
+        return {name: int(generation) for name, generation in cur.fetchall()}
+
+    def counters(self, keys):
+        with self._lock:
+            fresh = self._read_at is not None and time.monotonic() - self._read_at < self.poll
+        if not fresh:
+            values = self._run(self._read_all)
+            with self._lock:
+                self._values, self._read_at = values, time.monotonic()
+        with self._lock:
+            return [self._values.get(key, 0) for key in keys]
+
+    def incr(self, key):
+        def bump(cur):
+            cur.execute("""
+                INSERT INTO Cache_Generation (name, generation) VALUES (%s, 1)
+                ON DUPLICATE KEY UPDATE generation = generation + 1
+            """, (key,))
+            cur.execute("SELECT generation FROM Cache_Generation WHERE name = %s", (key,))
+            return int(cur.fetchone()[0])
+
+        value = self._run(bump)
+        with self._lock:
+            self._values[key] = value
+        return value
+
+
+class LocalCacheBackend:
+    """TTL + LRU store inside this worker process; generations come from a shared DatabaseGenerations"""
+
+    def __init__(self, max_entries, generations):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._generations = generations
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or entry[0] < now:
+                    self._entries.pop(key, None)
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    values.append(entry[1])
+        return values
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def counters(self, keys):
+        return self._generations.counters(keys)
+
+    def incr(self, key):
+        return self._generations.incr(key)
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Shared store (needs the optional `redis` package); eviction is left to Redis' maxmemory policy"""
+
+    def __init__(self, url):
+        import redis  # optional dependency, only needed when CACHE_URL is set
+        self._redis = redis.Redis.from_url(url)
+
+    def get_many(self, keys):
+        return [None if raw is None else json.loads(raw) for raw in self._redis.mget(keys)]
+
+    def set(self, key, value, ttl):
+        self._redis.setex(key, max(int(ttl), 1), json.dumps(value, default=str))
+
+    def counters(self, keys):
+        return [int(raw or 0) for raw in self._redis.mget(keys)]
+
+    def incr(self, key):
+        return self._redis.incr(key)
+
+    def size(self):
+        return None
+
+
+class CatalogCache:
+    """Read-through cache with namespace invalidation and hit/miss counters.
+
+    Backend failures are treated as misses so a cache outage only costs speed.
+    """
+
+    KEY_PREFIX = "edubridge:"
+
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "errors": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def generations(self, namespaces):
+        try:
+            return tuple(self.backend.counters([f"{self.KEY_PREFIX}gen:{ns}" for ns in namespaces]))
+        except Exception:
+            self._count("errors")
+            return None
+
+    def get_or_load(self, key, loader, namespaces, ttl=None):
+        """Return the cached value for key, calling loader() on a miss"""
+        generations = self.generations(namespaces)
+        if generations is None:
+            return loader()
+        full_key = self.KEY_PREFIX + key + "|" + ",".join(
+            f"{ns}{gen}" for ns, gen in zip(namespaces, generations)
+        )
+
+        try:
+            value = self.backend.get_many([full_key])[0]
+        except Exception:
+            self._count("errors")
+            value = None
+        if value is not None:
+            self._count("hits")
+            return value
+
+        self._count("misses")
+        value = loader()
+        try:
+            self.backend.set(full_key, value, self.ttl if ttl is None else ttl)
+        except Exception:
+            self._count("errors")
+        return value
+
+    def invalidate(self, *namespaces):
+        for ns in namespaces:
+            try:
+                self.backend.incr(f"{self.KEY_PREFIX}gen:{ns}")
+            except Exception:
+                self._count("errors")
+        self._count("invalidations")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "pid": os.getpid(),
+            "backend": type(self.backend).__name__,
+            "hit_rate": round(stats["hits"] / lookups, 3) if lookups else None,
+            "entries": self.backend.size(),
+            "evictions": getattr(self.backend, "evictions", None),
+        })
+        return stats
+
+
+def _make_cache_backend():
+    if CACHE_CONFIG['url']:
+        try:
+            return RedisCacheBackend(CACHE_CONFIG['url'])
+        except ImportError:
+            print("⚠️  CACHE_URL is set but the redis package is missing; using the in-process cache.")
+    return LocalCacheBackend(CACHE_CONFIG['max_entries'], DatabaseGenerations(CACHE_CONFIG['generation_poll']))
+
+
+catalog_cache = CatalogCache(_make_cache_backend(), CACHE_CONFIG['ttl'])
+
+
+@app.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    """Catalog cache hit/miss counters for this worker."""
+    return jsonify({"ok": True, "cache": catalog_cache.stats()})
+
+
+# ================== COURSE SEARCH ==================
+SEARCH_CONFIG = {
+    'ttl': float(os.getenv('SEARCH_INDEX_TTL', 60)),           # seconds before a worker reloads the index
+    'result_cap': int(os.getenv('SEARCH_RESULT_CAP', 200)),    # most results /courses will ever rank
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(text):
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class CourseSearchIndex:
+    """In-process inverted index over unit id, title, description and lesson titles.
+
+    Every query term must match (exactly or as a token prefix, for type-ahead); matches in
+    the unit id and title weigh more than matches in the description or lesson titles.
+    The index is rebuilt when the catalog cache's "courses"/"lessons" generations move
+    (so writes in any worker are seen once the cache backend is shared) or after
+    SEARCH_INDEX_TTL seconds.
+    """
+
+    NAMESPACES = ("courses", "lessons")
+
+    FIELD_WEIGHTS = {"unit_id": 8.0, "title": 4.0, "lessons": 2.0, "description": 1.0}
+    PREFIX_FACTOR = 0.5       # a prefix match scores half an exact one
+    SUBSTRING_FACTOR = 0.25   # "0001" still finds FIT0001, like the old LIKE '%q%'
+
+    def __init__(self, cache, ttl):
+        self.cache = cache
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._built_generation = None
+        self._built_at = 0.0
+        self._courses = {}    # unit_id -> {"unit_id", "name", "active"}
+        self._postings = {}   # token -> {unit_id: best field weight}
+        self._tokens = []     # sorted keys of _postings, for prefix lookups
+
+    def _is_fresh(self, generation):
+        return (generation is not None
+                and self._built_generation == generation
+                and time.monotonic() - self._built_at < self.ttl)
+
+    def _ensure_fresh(self, cursor):
+        generation = self.cache.generations(self.NAMESPACES)
+        if self._is_fresh(generation):
+            return
+        with self._lock:
+            if not self._is_fresh(generation):
+                self._build(cursor, generation)
+
+    def _build(self, cursor, generation):
+        cursor.execute("SELECT Unit_id, Title, Course_description, Activity FROM Courses")
+        course_rows = cursor.fetchall()
+        cursor.execute("SELECT unit_id, title FROM Lessons")
+        lesson_rows = cursor.fetchall()
+
+        courses, postings = {}, {}
+
+        def add(token, unit_id, weight):
+            per_course = postings.setdefault(token, {})
+            per_course[unit_id] = max(per_course.get(unit_id, 0.0), weight)
+
+        for r in course_rows:
+            uid = r["Unit_id"]
+            courses[uid] = {"unit_id": uid, "name": r["Title"], "active": r["Activity"] == "active"}
+            for field, text in (("unit_id", uid), ("title", r["Title"]), ("description", r["Course_description"])):
+                for token in _tokenize(text):
+                    add(token, uid, self.FIELD_WEIGHTS[field])
+        for r in lesson_rows:
+            if r["unit_id"] in courses:
+                for token in _tokenize(r["title"]):
+                    add(token, r["unit_id"], self.FIELD_WEIGHTS["lessons"])
+
+        # Swap in the new structures in one go so concurrent searches never see a half-built index
+        self._courses, self._postings, self._tokens = courses, postings, sorted(postings)
+        self._built_generation = generation
+        self._built_at = time.monotonic()
+
+    def _term_scores(self, term):
+        """unit_id -> best score for one query term"""
+        scores = {}
+        start = bisect_left(self._tokens, term)
+        for token in self._tokens[start:]:
+            if not token.startswith(term):
+                break
+            factor = 1.0 if token == term else self.PREFIX_FACTOR
+            for uid, weight in self._postings[token].items():
+                scores[uid] = max(scores.get(uid, 0.0), weight * factor)
+        for uid in self._courses:
+            if term in uid.lower() and uid not in scores:
+                scores[uid] = self.FIELD_WEIGHTS["unit_id"] * self.SUBSTRING_FACTOR
+        return scores
+
+    def search(self, cursor, query, is_visible, limit):
+        """[(course, score)] best first; an empty query lists every visible course by unit id"""
+        self._ensure_fresh(cursor)
+        courses = self._courses
+        terms = list(dict.fromkeys(_tokenize(query)))
+
+        if not terms:
+            ranked = [(courses[uid], 0.0) for uid in sorted(courses)]
+        else:
+            totals = None
+            for term in terms:
+                scores = self._term_scores(term)
+                if totals is None:
+                    totals = scores
+                else:
+                    totals = {uid: totals[uid] + score for uid, score in scores.items() if uid in totals}
+                if not totals:
+                    return []
+            ranked = sorted(((courses[uid], score) for uid, score in totals.items()),
+                            key=lambda item: (-item[1], item[0]["unit_id"]))
+
+        return [(course, score) for course, score in ranked if is_visible(course)][:limit]
+
+
+course_search = CourseSearchIndex(catalog_cache, SEARCH_CONFIG['ttl'])
 
 # --- Routes ---
 
@@ -344,10 +2855,9 @@ def instructor_courses():
 @app.route("/fetch_classroom_lessons", methods = ["GET"])
 def classroom_lessons():
     classroom_id = request.args.get("classroom_id", "")
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
-    print("haro")
-    try:
+
+    def load():
+        cursor = get_db().cursor(dictionary=True)
         cursor.execute("""
             SELECT 
                 l.lesson_id,
@@ -361,8 +2871,12 @@ def classroom_lessons():
         lessons = cursor.fetchall()
         
         # Transform for frontend
-        results = [{"lesson_id": l["lesson_id"], "title": l["name"], "credit": l["credit"]} for l in lessons]
-        print(results)
+        return [{"lesson_id": l["lesson_id"], "title": l["name"], "credit": l["credit"]} for l in lessons]
+
+    try:
+        results = catalog_cache.get_or_load(
+            f"classroom_lessons:{classroom_id}", load, namespaces=("classrooms", "lessons")
+        )
         return jsonify({"found": True, "results": results})
     except mysql.connector.Error:
         return jsonify({"found": False, "results": []})
@@ -378,36 +2892,42 @@ def fetch_course_details():
     if not ins_id or not unitId:
         return jsonify({"status": "error", "message": "Missing instructor or unit ID"}), 400
 
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
-
     try:
-        cursor.execute("""
-            SELECT c.Title, c.Unit_id, c.Course_director, c.Activity, c.Total_credit, i.Ins_name, c.Active_Classrooms_Count
-            FROM Courses c
-            JOIN Instructors i ON c.Course_made_by = i.Ins_id
-            WHERE c.Unit_id = %s
-        """, (unitId,))
-        course_row = cursor.fetchone()
+        results = _course_details(unitId)
     except mysql.connector.Error as e:
         print(f"Error fetching course details: {e}")
         return jsonify({"status": "error", "message": "Failed to fetch course details"}), 500
 
-    if not course_row:
+    if not results:
         return jsonify({"found": False, "results": []})
 
-    active_classrooms = course_row["Active_Classrooms_Count"]
-    course_details = {
-        "title": course_row["Title"],
-        "unitId": course_row["Unit_id"],
-        "courseDirector": course_row["Course_director"],
-        "status": course_row["Activity"],
-        "instructorName": course_row["Ins_name"],
-        "totalCredit": course_row["Total_credit"],
-        "activeClassrooms": active_classrooms
-    }
+    return jsonify({"found": True, "results": results})
+
 
-    return jsonify({"found": True, "results": [course_details]})
+def _course_details(unit_id):
+    """Course header for the instructor pages (cached); [] when the course doesn't exist"""
+    def load():
+        cursor = get_db().cursor(dictionary=True)
+        cursor.execute("""
+            SELECT c.Title, c.Unit_id, c.Course_director, c.Activity, c.Total_credit, i.Ins_name, c.Active_Classrooms_Count
+            FROM Courses c
+            JOIN Instructors i ON c.Course_made_by = i.Ins_id
+            WHERE c.Unit_id = %s
+        """, (unit_id,))
+        course_row = cursor.fetchone()
+        if not course_row:
+            return []
+        return [{
+            "title": course_row["Title"],
+            "unitId": course_row["Unit_id"],
+            "courseDirector": course_row["Course_director"],
+            "status": course_row["Activity"],
+            "instructorName": course_row["Ins_name"],
+            "totalCredit": course_row["Total_credit"],
+            "activeClassrooms": course_row["Active_Classrooms_Count"]
+        }]
+
+    return catalog_cache.get_or_load(f"course:{unit_id}", load, namespaces=("courses", "instructors"))
 
 @app.route("/fetch_students", methods = ["GET"])
 def fetch_students():
@@ -435,31 +2955,20 @@ def fetch_students():
 @app.route("/fetch_lessons_and_students", methods=["GET"])
 def fetch_lessons_and_students():
     unitId = request.args.get("unit_id", "").strip()
-    user_type = session.get("user_type")
-    student_id = session.get("user_id")
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
 
     if not unitId:
         return jsonify({"status": "error", "message": "Missing unit ID or student ID"}), 400
 
-    lessons = PrerequisiteManager.get_available_lessons(unitId)
-    # Convert lessons to expected format
-    lessons_formatted = []
-    for lesson in lessons:
-        # status = "available"  # Default status
-        # if lesson.get('locked'):
-        #     status = "locked"
-        # elif lesson.get('completed'):
-        #     status = "completed"
-            
-        lessons_formatted.append({
+    def load():
+        lessons = PrerequisiteManager.get_available_lessons(unitId)
+        # Convert lessons to expected format
+        return [{
             "name": lesson["title"],
             "credit": lesson.get("credits", 2),
             "lesson_id": lesson["lesson_id"],
-            # "status": status,
-            # "prerequisite_lesson": lesson.get('prerequisite_lesson')
-        })
+        } for lesson in lessons]
+
+    lessons_formatted = catalog_cache.get_or_load(f"unit_lessons:{unitId}", load, namespaces=("lessons",))
 
     return jsonify({
         "found": True,
@@ -501,48 +3010,48 @@ def get_lessons_2():
   
 @app.route("/courses", methods=["GET"])
 def search_course():
+    """
+    Ranked course search. Query params: q (prefix-matched against unit id, title,
+    description and lesson titles), page (1), per_page (default: every match up to the cap).
+    Only active courses and courses the student is enrolled in are visible.
+    """
     student_id = session.get('user_id')
     query = request.args.get("q", "").strip()
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = request.args.get("per_page", type=int)
+    cap = SEARCH_CONFIG['result_cap']
+
     db = get_db()
     cursor = db.cursor(dictionary=True)
     cursor.execute("SELECT Unit_id FROM Enrollment WHERE Student_id = %s", (student_id,))
     enrolled_course_unit_ids = {row["Unit_id"] for row in cursor.fetchall()}
 
-    sql_params = []
-    where_clauses = []
-    where_clauses.append("Activity = 'active'")
-
-    if enrolled_course_unit_ids:
-        placeholders = ', '.join(['%s'] * len(enrolled_course_unit_ids))
-        where_clauses.append(f"Unit_id IN ({placeholders})")
-        sql_params.extend(list(enrolled_course_unit_ids)) 
-
-    combined_activity_enrollment_clause = f"({' OR '.join(where_clauses)})"
-
-    final_where_parts = [combined_activity_enrollment_clause]
-
-    if query:
-        final_where_parts.append("(LOWER(Unit_id) LIKE LOWER(%s) OR LOWER(Title) LIKE LOWER(%s))")
-        sql_params.insert(0, f"%{query}%") 
-        sql_params.insert(1, f"%{query}%")
-
-    final_where_clause = " AND ".join(final_where_parts)
-    
-    sql_query = f"""
-        SELECT Unit_id AS id, Title AS name, Unit_id
-        FROM Courses
-        WHERE {final_where_clause}
-    """
-    cursor.execute(sql_query, tuple(sql_params))
+    ranked = course_search.search(
+        cursor, query,
+        is_visible=lambda course: course["active"] or course["unit_id"] in enrolled_course_unit_ids,
+        limit=cap,
+    )
+    total = len(ranked)
+    if per_page:
+        per_page = min(max(per_page, 1), cap)
+        ranked = ranked[(page - 1) * per_page: page * per_page]
 
-    rows = cursor.fetchall()
- 
-    if not rows:
+    if not ranked:
         return jsonify({"found": False, "message": "No courses found"}), 404
 
-    courses = [{"unit_id": r["Unit_id"], "name": r["name"], "id": r["id"], "is_enrolled" : r["id"] in enrolled_course_unit_ids} for r in rows]
+    courses = _course_results(ranked, enrolled_course_unit_ids)
+    return jsonify({"found": True, "results": courses, "total": total, "page": page})
 
-    return jsonify({"found": True, "results": courses})
+
+def _course_results(ranked, enrolled_unit_ids):
+    """Shape course_search hits for the student course lists"""
+    return [{
+        "unit_id": course["unit_id"],
+        "name": course["name"],
+        "id": course["unit_id"],
+        "is_enrolled": course["unit_id"] in enrolled_unit_ids,
+        "score": round(score, 2),
+    } for course, score in ranked]
 
 @app.route("/create_course")
 def create_course_page():
@@ -582,6 +3091,7 @@ def create_course():
         """, (unit_id, title, description, director, credits, status, ins_id, active_classrooms_count))
 
         db.commit()
+        catalog_cache.invalidate("courses")
 
         cursor.execute("SELECT Date_created, Date_updated FROM Courses WHERE Unit_id = %s", (unit_id,))
         row = cursor.fetchone()
@@ -599,7 +3109,6 @@ def create_course():
 
     finally:
         cursor.close()
-        db.close()
 @app.route("/lesson_page_instructor")
 def render_lesson_page_instructor():
     return render_template("lesson_page_instructor.html")
@@ -608,6 +3117,61 @@ def render_lesson_page_instructor():
 def render_lesson_page_student():
     return render_template("lesson_page_student.html")
 
+def _lesson_header(cursor, student_id, lesson_id):
+    """Lesson metadata, instructor and the student's prerequisite lock state in one query"""
+    cursor.execute("""
+        SELECT
+            l.lesson_id AS lesson_id,
+            l.title AS title,
+            l.estimated_time_hours AS estimated_time,
+            l.objectives AS objective,
+            l.description AS description,
+            l.designer_id AS designer_id,
+            l.prerequisite_lesson_id AS prerequisite_lesson_id,
+            i.Ins_name AS instructor,
+            l.date_created AS date_created,
+            l.date_updated AS last_updated,
+            l.unit_id AS unit_id,
+            prereq.title AS prerequisite_title,
+            (SELECT COUNT(*) FROM Lesson_Materials pm
+             WHERE pm.lesson_id = l.prerequisite_lesson_id) AS prerequisite_total,
+            COALESCE(pp.completed_materials, 0) AS prerequisite_completed
+        FROM Lessons l
+        LEFT JOIN Instructors i ON l.designer_id = i.Ins_id
+        LEFT JOIN Lessons prereq ON l.prerequisite_lesson_id = prereq.lesson_id
+        LEFT JOIN Student_Lesson_Progress pp
+               ON pp.lesson_id = l.prerequisite_lesson_id AND pp.student_id = %s
+        WHERE l.lesson_id = %s
+    """, (student_id, lesson_id))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+
+    # Same rule as CompletionEngine: complete once every material is (a lesson without any is)
+    prerequisite = None
+    locked = False
+    if row["prerequisite_lesson_id"]:
+        prerequisite = {"id": row["prerequisite_lesson_id"], "title": row["prerequisite_title"] or "Unknown"}
+        locked = (row["prerequisite_title"] is None
+                  or int(row["prerequisite_completed"]) < int(row["prerequisite_total"]))
+    return {
+        "lesson_id": row["lesson_id"],
+        "title": row["title"],
+        "estimated_time": row["estimated_time"],
+        "objective": row["objective"],
+        "description": row["description"],
+        "designer_id": row["designer_id"],
+        "prerequisite_lesson_id": row["prerequisite_lesson_id"],
+        "prerequisite_title": row["prerequisite_title"],
+        "instructor": row["instructor"] or "Unknown",
+        "date_created": row["date_created"].strftime("%Y-%m-%d %H:%M:%S") if row["date_created"] else None,
+        "last_updated": row["last_updated"].strftime("%Y-%m-%d %H:%M:%S") if row["last_updated"] else None,
+        "unit_id": row["unit_id"],
+        "locked": locked,
+        "prerequisite_lesson": prerequisite,
+    }
+
+
 @app.route("/get_lesson_details", methods=["GET"])
 def get_lesson_details():
     lesson_id = request.args.get("lesson_id")
@@ -616,62 +3180,83 @@ def get_lesson_details():
     try:
         db = get_db()
         cursor = db.cursor(dictionary=True)
+        lesson = _lesson_header(cursor, student_id, lesson_id)
 
-        cursor.execute("""
-            SELECT 
-                l.lesson_id AS lesson_id,
-                l.title AS title,
-                l.estimated_time_hours AS estimated_time,
-                l.objectives AS objective,
-                l.description AS description,
-                l.designer_id AS designer_id,
-                l.prerequisite_lesson_id AS prerequisite_lesson_id,
-                i.Ins_name AS instructor,
-                l.date_created AS date_created,
-                l.date_updated AS last_updated,
-                l.unit_id AS unit_id,
-                prereq.title AS prerequisite_title
-            FROM Lessons l
-            LEFT JOIN Instructors i ON l.designer_id = i.Ins_id
-            LEFT JOIN Lessons prereq ON l.prerequisite_lesson_id = prereq.lesson_id
-            WHERE l.lesson_id = %s
-        """, (lesson_id,))
-
-        lessons_rows = cursor.fetchall()
-
-        lessons = []
-        for row in lessons_rows:
-            # Get prerequisite status for this student
-            prereq_status = PrerequisiteManager.get_prerequisite_status(student_id, lesson_id)
-            
-            lesson_data = {
-                "lesson_id": row["lesson_id"],
-                "title": row["title"],
-                "estimated_time": row["estimated_time"],
-                "objective": row["objective"],
-                "description": row["description"],
-                "designer_id": row["designer_id"],
-                "prerequisite_lesson_id": row["prerequisite_lesson_id"],
-                "prerequisite_title": row["prerequisite_title"],
-                "instructor": row["instructor"] or "Unknown",
-                "date_created": row["date_created"].strftime("%Y-%m-%d %H:%M:%S") if row["date_created"] else None,
-                "last_updated": row["last_updated"].strftime("%Y-%m-%d %H:%M:%S") if row["last_updated"] else None,
-                "unit_id": row["unit_id"],
-                "locked": prereq_status["locked"],
-                "prerequisite_lesson": prereq_status["prerequisite_lesson"]
-            }
-            lessons.append(lesson_data)
-
-        if lessons:
-            return jsonify({"status": "success", "lessons": lessons}), 200
+        if lesson:
+            return jsonify({"status": "success", "lessons": [lesson]}), 200
         else:
             return jsonify({"status": "success", "message": "No lessons found"}), 200
 
     except Exception as err:
         return jsonify({"status": "error", "message": str(err)}), 500
-    
 
 
+def _lesson_bundle_etag(cursor, student_id, lesson_id):
+    """Validator for a student's lesson bundle, or None when the lesson does not exist.
+
+    Built from database state only, so every worker computes the same one. Anything the bundle
+    shows changes one of: the unit's latest unit-wide Change_Log row (lesson and material
+    edits), the prerequisite's unit's latest one (its title and materials, when it lives in
+    another unit), the student's latest own row (completions), or the designer's name.
+    """
+    cursor.execute("""
+        SELECT l.unit_id,
+               (SELECT MAX(cl.change_id) FROM Change_Log cl
+                WHERE cl.unit_id = l.unit_id AND cl.student_id IS NULL) AS unit_version,
+               (SELECT MAX(cl.change_id) FROM Change_Log cl
+                WHERE cl.unit_id = prereq.unit_id AND cl.student_id IS NULL) AS prerequisite_version,
+               (SELECT MAX(cl.change_id) FROM Change_Log cl WHERE cl.student_id = %s) AS student_version,
+               i.Ins_name AS instructor
+        FROM Lessons l
+        LEFT JOIN Lessons prereq ON prereq.lesson_id = l.prerequisite_lesson_id
+        LEFT JOIN Instructors i ON i.Ins_id = l.designer_id
+        WHERE l.lesson_id = %s
+    """, (student_id, lesson_id))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    raw = "|".join(str(v) for v in (lesson_id, student_id, row["unit_version"], row["prerequisite_version"],
+                                    row["student_version"], row["instructor"]))
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+@app.route("/api/lessons/<int:lesson_id>/bundle", methods=["GET"])
+def lesson_bundle(lesson_id):
+    """
+    Everything the student lesson page shows, in one round trip: lesson metadata, instructor,
+    prerequisite lock state, and every material grouped by type with the student's completion.
+    Three queries (validator, header, materials); a matching If-None-Match costs only the first.
+    """
+    student_id = session.get('user_id')
+    cursor = get_db().cursor(dictionary=True)
+    try:
+        etag = _lesson_bundle_etag(cursor, student_id, lesson_id)
+        if etag is None:
+            return jsonify({"status": "error", "message": "Lesson not found"}), 404
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            lesson = _lesson_header(cursor, student_id, lesson_id)
+            materials = fetch_materials(cursor, student_id, lesson_ids=[lesson_id]).get(lesson_id, {})
+            items = [m for group in materials.values() for m in group]
+            done = sum(1 for m in items if m["completed"])
+            lesson["completed"] = done >= len(items)
+            response = jsonify({
+                "status": "success",
+                "lesson": lesson,
+                "materials": materials,
+                "progress": {"total": len(items), "completed": done},
+            })
+    except mysql.connector.Error as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"    # per student; always revalidate
+    response.headers["Vary"] = "Cookie"
+    return response
+
 
 @app.route("/create_lesson_ins", methods=["POST"])
 def create_lesson_instructors():
@@ -722,7 +3307,9 @@ def create_lesson_instructors():
         """, (unit_id, title, description, objectives, estimated_time_hours, prerequisite_lesson_id, ins_id))
 
         new_id = cur.lastrowid
+        ChangeLog.record(cur, "lessons", [new_id])
         db.commit()
+        catalog_cache.invalidate("lessons")
         return jsonify({"status": "success", "message": "Lesson created successfully.", "lesson_id": new_id}), 201
 
     except mysql.connector.Error as e:
@@ -748,10 +3335,13 @@ def delete_lesson(lesson_id):
             error_message = f"Cannot delete. This lesson is a prerequisite for: {', '.join(lesson_titles)}."
             return jsonify({"ok": False, "error": error_message}), 409 # 409 Conflict
 
+        ChangeLog.record(cur, "lessons", [lesson_id], "delete")
         cur.execute("DELETE FROM Lessons WHERE lesson_id = %s", (lesson_id,))
-        db.commit()
         if cur.rowcount == 0:
+            db.rollback()
             return jsonify({"ok": False, "error": "Lesson not found"}), 404
+        db.commit()
+        catalog_cache.invalidate("lessons", "classrooms")
         return jsonify({"ok": True, "message": "Lesson deleted successfully"})
     
     except mysql.connector.Error as e:
@@ -768,10 +3358,16 @@ def delete_course():
     cursor = db.cursor(dictionary=True)
 
     try:
+        ChangeLog.record_unit_enrollments(cursor, unit_id, "delete")
         cursor.execute("DELETE FROM Courses WHERE Unit_id = %s AND Course_made_by = %s", (unit_id, ins_id))
-        db.commit()
+        if cursor.rowcount == 0:
+            db.rollback()      # not this instructor's course: drop the log rows too
+        else:
+            db.commit()
+        catalog_cache.invalidate("courses", "lessons", "classrooms")
         return jsonify({"status": "success", "message": "Course Deleted"}), 200
     except mysql.connector.Error as e:
+        db.rollback()
         return jsonify({"status": "error", "message": str(e)}), 400
 
 
@@ -784,6 +3380,8 @@ def unenroll_course():
 
     try:
         cursor.execute("DELETE FROM Enrollment WHERE Student_id = %s AND Unit_id = %s", (student_id, course_id))
+        if cursor.rowcount:
+            ChangeLog.record(cursor, "enrollments", [course_id], "delete", student_id=student_id)
         db.commit() # <--- Make sure this is called!
         return jsonify({"status": "success", "message": f"Unenrolled from course {course_id}."})
     except mysql.connector.Error as e:
@@ -812,19 +3410,23 @@ def enroll_in_course():
             return jsonify({"status": "error", "message": "Student is not active."}), 400
 
         cursor.execute("""
-            DELETE smc
-            FROM Student_Material_Completion smc
-            JOIN Lesson_Materials lm ON smc.material_id = lm.material_id
-            JOIN Lessons l ON lm.lesson_id = l.lesson_id
-            WHERE smc.student_id = %s AND l.unit_id = %s
+            DELETE FROM Student_Material_Completion
+            WHERE student_id = %s AND material_id IN (
+                SELECT lm.material_id
+                FROM Lesson_Materials lm
+                JOIN Lessons l ON lm.lesson_id = l.lesson_id
+                WHERE l.unit_id = %s
+            )
         """, (student_id, course_id))
         print(f"Reset progress for student {student_id} in course {course_id}. Deleted {cursor.rowcount} material completion records.")
+        ProgressStore.reset_unit(cursor, student_id, course_id)
         
         # proceed only if active
         cursor.execute(
             "INSERT INTO Enrollment (Student_id, Unit_id) VALUES (%s, %s)",
             (student_id, course_id)
         )
+        ChangeLog.record(cursor, "enrollments", [course_id], student_id=student_id)
         db.commit()
         return jsonify({"status": "success", "message": f"Enrolled in course {course_id}."}), 200
 
@@ -923,6 +3525,7 @@ def courses_update():
         sql_update = f"UPDATE Courses SET {', '.join(set_clauses)} WHERE Unit_id=%s"
         cur.execute(sql_update, params + [unit_id])
         db.commit()
+        catalog_cache.invalidate("courses", "lessons", "classrooms")
 
         # If Unit_id was renamed, use the new one to fetch
         unit_id_to_fetch = data.get("unit_id_new") or unit_id
@@ -956,95 +3559,419 @@ def courses_update():
         db.rollback()
         return jsonify({"ok": False, "error": f"MySQL error: {e}"}), 400
     
-@app.route("/assignment_get", methods=["GET"])
-def fetch_assignments():
-    lesson_id = request.args.get("lesson_id")
+# ================== LESSON MATERIALS ==================
+MATERIAL_TYPES = ("reading", "video", "file", "link", "assignment")   # Lesson_Materials.material_type ENUM
+MATERIALS_MAX_LESSONS = 500
 
-    if not lesson_id:
-        return jsonify({"error": "lesson_id is required"}), 400
 
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
+def fetch_materials(cursor, student_id, lesson_ids=None, unit_id=None, material_types=None):
+    """Every material of the given lessons (or of a whole unit) with the student's completion flag.
 
-    query = """
-        SELECT lm.material_id, lm.title, lm.material_type, lm.content_url,
-               COALESCE(smc.completed, FALSE) AS completed
-        FROM Lesson_Materials lm
-        LEFT JOIN Student_Material_Completion smc
-               ON lm.material_id = smc.material_id AND smc.student_id = %s
-        WHERE lm.lesson_id = %s AND lm.material_type = 'assignment'
+    One query. Returns {lesson_id: {material_type: [material, ...]}} with every requested lesson
+    present (and every type key present) even when it has no materials.
     """
-    cursor.execute(query, (session.get('user_id'), lesson_id,))
-    lesson_mat = cursor.fetchall()
+    type_filter, type_params = "", []
+    if material_types:
+        type_filter = f"AND lm.material_type IN ({_placeholders(material_types)})"
+        type_params = list(material_types)
+    if unit_id is not None:
+        scope, scope_params = "l.unit_id = %s", [unit_id]
+    else:
+        scope, scope_params = f"l.lesson_id IN ({_placeholders(lesson_ids)})", list(lesson_ids)
 
-    mat = [
-        {
+    cursor.execute(f"""
+        SELECT l.lesson_id, lm.material_id, lm.title, lm.material_type, lm.content_url,
+               lm.estimated_time_minutes, COALESCE(smc.completed, FALSE) AS completed
+        FROM Lessons l
+        LEFT JOIN Lesson_Materials lm
+               ON lm.lesson_id = l.lesson_id {type_filter}
+        LEFT JOIN Student_Material_Completion smc
+               ON smc.material_id = lm.material_id AND smc.student_id = %s
+        WHERE {scope}
+        ORDER BY l.lesson_id, lm.material_id
+    """, (*type_params, student_id, *scope_params))
+
+    types = material_types or MATERIAL_TYPES
+    grouped = {}
+    for r in cursor.fetchall():
+        by_type = grouped.setdefault(r["lesson_id"], {t: [] for t in types})
+        if r["material_id"] is None:
+            continue
+        by_type.setdefault(r["material_type"], []).append({
             "id": r["material_id"],
             "title": r["title"],
+            "type": r["material_type"],
             "content_url": r["content_url"],
-            "completed": bool(r["completed"])
-        }
-        for r in lesson_mat
-    ]
+            "estimated_time_minutes": r["estimated_time_minutes"],
+            "completed": bool(r["completed"]),
+        })
+    return grouped
+
+
+@app.route("/materials_get", methods=["GET"])
+def materials_get():
+    """
+    Materials of one or many lessons, or of a whole unit, grouped by lesson and type.
+    Query: lesson_id=1 | lesson_ids=1,2,3 | unit_id=FIT0001, optional types=reading,video
+    """
+    unit_id = (request.args.get("unit_id") or "").strip() or None
+    raw_ids = request.args.get("lesson_ids") or request.args.get("lesson_id") or ""
+    try:
+        lesson_ids = sorted({int(x) for x in raw_ids.split(",") if x.strip()})
+    except ValueError:
+        return jsonify({"status": "error", "message": "lesson_ids must be integers"}), 400
+    if not lesson_ids and unit_id is None:
+        return jsonify({"status": "error", "message": "lesson_id, lesson_ids or unit_id is required"}), 400
+    if len(lesson_ids) > MATERIALS_MAX_LESSONS:
+        return jsonify({"status": "error", "message": f"At most {MATERIALS_MAX_LESSONS} lessons per request"}), 400
+
+    types = [t.strip() for t in request.args.get("types", "").split(",") if t.strip()]
+    unknown = sorted(set(types) - set(MATERIAL_TYPES))
+    if unknown:
+        return jsonify({"status": "error", "message": f"Unknown material type(s): {unknown}"}), 400
+
+    cursor = get_db().cursor(dictionary=True)
+    try:
+        grouped = fetch_materials(cursor, session.get('user_id'),
+                                  lesson_ids=None if unit_id else lesson_ids,
+                                  unit_id=unit_id, material_types=types or None)
+    except mysql.connector.Error as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+    lessons = []
+    for lesson_id, by_type in grouped.items():
+        items = [m for group in by_type.values() for m in group]
+        lessons.append({
+            "lesson_id": lesson_id,
+            "materials": by_type,
+            "total": len(items),
+            "completed": sum(1 for m in items if m["completed"]),
+        })
+    return jsonify({"status": "success", "types": types or list(MATERIAL_TYPES), "lessons": lessons}), 200
+
+
+def _materials_of_type(material_type):
+    """Legacy single-lesson, single-type list: [{id, title, content_url, completed}]"""
+    lesson_id = request.args.get("lesson_id", type=int)
+
+    if not lesson_id:
+        return jsonify({"error": "lesson_id is required"}), 400
 
+    cursor = get_db().cursor(dictionary=True)
+    try:
+        grouped = fetch_materials(cursor, session.get('user_id'), lesson_ids=[lesson_id],
+                                  material_types=[material_type])
+    finally:
+        cursor.close()
+    mat = [
+        {"id": m["id"], "title": m["title"], "content_url": m["content_url"], "completed": m["completed"]}
+        for m in grouped.get(lesson_id, {}).get(material_type, [])
+    ]
     return jsonify(mat), 200
 
 
+@app.route("/assignment_get", methods=["GET"])
+def fetch_assignments():
+    return _materials_of_type("assignment")
+
+
 @app.route("/reading_get", methods=["GET"])
 def fetch_reading():
-    lesson_id = request.args.get("lesson_id")
+    return _materials_of_type("reading")
 
-    if not lesson_id:
-        return jsonify({"error": "lesson_id is required"}), 400
 
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
+# ================== MATERIAL COMPLETION WRITES ==================
+COMPLETION_CONFIG = {
+    'batch_max': int(os.getenv('COMPLETION_BATCH_MAX', 500)),          # most pairs one batch request may carry
+    'coalesce_ms': float(os.getenv('COMPLETION_COALESCE_MS', 0)),      # 0 disables the write-coalescing buffer
+    'flush_retries': int(os.getenv('COMPLETION_FLUSH_RETRIES', 5)),    # failed flushes of a batch before it is dropped
+}
 
-    query = """
-        SELECT lm.material_id, lm.title, lm.material_type, lm.content_url,
-               COALESCE(smc.completed, FALSE) AS completed
-        FROM Lesson_Materials lm
-        LEFT JOIN Student_Material_Completion smc
-               ON lm.material_id = smc.material_id AND smc.student_id = %s
-        WHERE lm.lesson_id = %s AND lm.material_type = 'reading'
+
+def apply_completions(cursor, student_id, updates):
+    """Upsert {material_id: completed} for one student and refresh their lesson progress (caller commits)
+
+    One multi-row INSERT ... ON DUPLICATE KEY UPDATE per target value (at most two statements),
+    so the update clause is a constant rather than the deprecated VALUES() function.
     """
-    cursor.execute(query, (session.get('user_id'), lesson_id,))
-    lesson_mat = cursor.fetchall()
+    if not updates:
+        return
+    for value in (1, 0):
+        ids = [mid for mid, done in updates.items() if done == value]
+        if not ids:
+            continue
+        rows = ", ".join(["(%s, %s, %s)"] * len(ids))
+        cursor.execute(f"""
+            INSERT INTO Student_Material_Completion (student_id, material_id, completed)
+            VALUES {rows} ON DUPLICATE KEY UPDATE completed = {value}
+        """, [v for mid in ids for v in (student_id, mid, value)])
+    ProgressStore.refresh_for_materials(cursor, student_id, list(updates))
+    ChangeLog.record(cursor, "completions", list(updates), student_id=student_id)
 
-    mat = [
-        {
-            "id": r["material_id"],
-            "title": r["title"],
-            "content_url": r["content_url"],
-            "completed": bool(r["completed"])
-        }
-        for r in lesson_mat
-    ]
 
-    return jsonify(mat), 200
+def _parse_completion(item):
+    """(material_id, 0|1) from one {"id", "completed"} object, or None if it is malformed"""
+    if not isinstance(item, dict) or item.get("id") is None or item.get("completed") is None:
+        return None
+    try:
+        return int(item["id"]), int(bool(item["completed"]))
+    except (TypeError, ValueError):
+        return None
 
-@app.route("/update_material_completion", methods=["POST"])
-def update_material_completion():
-    data = request.get_json()
-    material_id = data.get("id")
-    completed = data.get("completed")
-    student_id = session.get('user_id') 
 
-    if material_id is None or completed is None or student_id is None:
-        return jsonify({"status": "error", "message": "id, completed, and student_id are required"}), 400
+class CompletionCoalescer:
+    """Per-student buffer that merges rapid completion toggles into one write
+
+    Toggles are held for `window` seconds after the first one, then written together (last value
+    per material wins). Pending writes are flushed early whenever the same student makes a GET,
+    so their own reads never see stale progress. Flushes of one student run one at a time, from
+    taking the buffer to the commit, so an older batch can never commit after a newer one, and a
+    GET during a flush waits for it. The buffer is per worker process: use it with sticky
+    sessions, and keep the window short since a crashed worker loses what it holds.
+    A flush that fails is put back and retried with backoff, up to `retries` times.
+    """
+
+    def __init__(self, window, retries):
+        self.window = window
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._pending = {}       # student_id -> {material_id: completed}
+        self._timers = {}
+        self._flushing = {}      # student_id -> [flush lock, flushes running or waiting]
+        self._failures = {}      # student_id -> failed flushes in a row
+        self.stats = {"queued": 0, "merged": 0, "flushes": 0, "rows_written": 0, "errors": 0,
+                      "requeued": 0, "dropped": 0}
+
+    @property
+    def enabled(self):
+        return self.window > 0
+
+    def add(self, student_id, updates):
+        with self._lock:
+            pending = self._pending.setdefault(student_id, {})
+            self.stats["queued"] += len(updates)
+            self.stats["merged"] += sum(1 for mid in updates if mid in pending)
+            pending.update(updates)
+            self._schedule(student_id, self.window)
+
+    def _schedule(self, student_id, delay):
+        """Start the student's flush timer unless one is running (caller holds _lock)"""
+        if student_id not in self._timers:
+            timer = threading.Timer(delay, self.flush, args=(student_id,))
+            timer.daemon = True
+            self._timers[student_id] = timer
+            timer.start()
+
+    def has_pending(self, student_id):
+        """Toggles still buffered, or a flush of them not yet committed"""
+        with self._lock:
+            return student_id in self._pending or student_id in self._flushing
+
+    @property
+    def pending_students(self):
+        return len(self._pending)
+
+    def flush(self, student_id):
+        """Write one student's pending toggles on a connection of its own; returns rows written"""
+        with self._lock:
+            entry = self._flushing.setdefault(student_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                return self._flush_locked(student_id)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._flushing[student_id]
+
+    def _flush_locked(self, student_id):
+        with self._lock:
+            updates = self._pending.pop(student_id, None)
+            timer = self._timers.pop(student_id, None)
+        if timer is not None:
+            timer.cancel()
+        if not updates:
+            return 0
+
+        try:
+            self._write(student_id, updates)
+        except Exception as e:
+            self._flush_failed(student_id, updates, e)
+            return 0
+        event_broker.notify()
+        with self._lock:
+            self._failures.pop(student_id, None)
+            self.stats["flushes"] += 1
+            self.stats["rows_written"] += len(updates)
+        return len(updates)
+
+    @staticmethod
+    def _write(student_id, updates):
+        pool = get_pool()
+        conn = pool.acquire()
+        cur = conn.cursor()
+        try:
+            apply_completions(cur, student_id, updates)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            pool.release(conn)
+
+    @staticmethod
+    def _missing_materials(material_ids):
+        pool = get_pool()
+        conn = pool.acquire()
+        cur = conn.cursor()
+        try:
+            cur.execute(f"SELECT material_id FROM Lesson_Materials WHERE material_id IN ({_placeholders(material_ids)})",
+                        material_ids)
+            return set(material_ids) - {row[0] for row in cur.fetchall()}
+        finally:
+            cur.close()
+            pool.release(conn)
+
+    def _flush_failed(self, student_id, updates, error):
+        """Drop what can never be written and put the rest back in the buffer
+
+        An integrity error means a material was deleted after the request was accepted (only
+        those ids are dropped) or, if none was, the student is gone. Anything else (pool
+        timeout, deadlock, lost connection) is retried until `retries` flushes have failed.
+        """
+        dropped = {}
+        if isinstance(error, mysql.connector.IntegrityError):
+            try:
+                missing = self._missing_materials(list(updates))
+            except Exception:
+                missing = None           # can't tell which; retry the whole batch
+            if missing is not None:
+                dropped = {mid: updates[mid] for mid in missing} if missing else dict(updates)
+        kept = {mid: done for mid, done in updates.items() if mid not in dropped}
+
+        with self._lock:
+            self.stats["errors"] += 1
+            failures = self._failures.get(student_id, 0) + (0 if dropped else 1)
+            if kept and failures > self.retries:
+                dropped, kept = updates, {}
+            if kept:
+                self._failures[student_id] = failures
+                pending = self._pending.setdefault(student_id, {})
+                for material_id, completed in kept.items():
+                    pending.setdefault(material_id, completed)     # a toggle queued since is newer
+                self._schedule(student_id, self.window * 2 ** failures)
+                self.stats["requeued"] += len(kept)
+            else:
+                self._failures.pop(student_id, None)
+            self.stats["dropped"] += len(dropped)
+        if dropped:
+            print(f"❌ Dropped {len(dropped)} buffered completion(s) for student {student_id}: {error}")
+        if kept:
+            print(f"⚠️  Flush for student {student_id} failed ({error}); requeued {len(kept)} completion(s)")
+
+    def flush_all(self):
+        with self._lock:
+            students = list(self._pending)
+        for student_id in students:
+            self.flush(student_id)
+
+
+completion_buffer = CompletionCoalescer(COMPLETION_CONFIG['coalesce_ms'] / 1000, COMPLETION_CONFIG['flush_retries'])
+atexit.register(completion_buffer.flush_all)
+
+
+@app.before_request
+def _flush_completions_before_read():
+    # A student's own reads must see the toggles still sitting in the buffer
+    if completion_buffer.enabled and request.method == "GET" and session.get("user_type") == "student":
+        student_id = session.get("user_id")
+        if student_id is not None and completion_buffer.has_pending(student_id):
+            completion_buffer.flush(student_id)
+
+
+def _record_completions(student_id, updates):
+    """Buffer or write `updates`; returns the JSON response for the completion routes"""
+    if completion_buffer.enabled:
+        # Reject unknown materials now: one bad id at flush time would fail the whole buffered write
+        cursor = get_db().cursor()
+        try:
+            ids = list(updates)
+            cursor.execute(f"SELECT material_id FROM Lesson_Materials WHERE material_id IN ({_placeholders(ids)})", ids)
+            unknown = set(ids) - {row[0] for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+        if unknown:
+            return jsonify({"status": "error", "message": f"Unknown material id(s): {sorted(unknown)}"}), 400
+        completion_buffer.add(student_id, updates)
+        return jsonify({"status": "success", "updated": len(updates), "queued": True})
 
     db = get_db()
     cursor = db.cursor()
     try:
-        query = """
-            INSERT INTO Student_Material_Completion (student_id, material_id, completed)
-            VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE completed = %s"""
-        cursor.execute(query, (student_id, material_id, int(bool(completed)), int(bool(completed))))
+        apply_completions(cursor, student_id, updates)
         db.commit()
-        return jsonify({"status": "success"})  # <<--- MUST return a response
+        return jsonify({"status": "success", "updated": len(updates)})
+    except mysql.connector.IntegrityError as e:
+        db.rollback()
+        return jsonify({"status": "error", "message": f"Unknown material: {e.msg}"}), 400
     except Exception as e:
         db.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        cursor.close()
+
+
+@app.route("/update_material_completion", methods=["POST"])
+def update_material_completion():
+    data = request.get_json(silent=True) or {}
+    student_id = session.get('user_id')
+    parsed = _parse_completion(data)
+
+    if parsed is None or student_id is None:
+        return jsonify({"status": "error", "message": "id, completed, and student_id are required"}), 400
+    material_id, completed = parsed
+    return _record_completions(student_id, {material_id: completed})
+
+
+@app.route("/update_material_completion/batch", methods=["POST"])
+def update_material_completion_batch():
+    """
+    Apply many completion toggles in one transaction.
+    Body: {"items": [{"id": <material_id>, "completed": true|false}, ...]} (or the bare list).
+    Later entries for the same material win.
+    """
+    student_id = session.get('user_id')
+    if student_id is None:
+        return jsonify({"status": "error", "message": "User not logged in"}), 401
+
+    data = request.get_json(silent=True)
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"status": "error", "message": "items must be a non-empty list"}), 400
+    if len(items) > COMPLETION_CONFIG['batch_max']:
+        return jsonify({"status": "error",
+                        "message": f"At most {COMPLETION_CONFIG['batch_max']} items per batch"}), 400
+
+    updates = {}
+    for index, item in enumerate(items):
+        parsed = _parse_completion(item)
+        if parsed is None:
+            return jsonify({"status": "error", "message": f"items[{index}] needs id and completed"}), 400
+        updates[parsed[0]] = parsed[1]
+    return _record_completions(student_id, updates)
+
+
+@app.route("/api/completion_buffer/stats", methods=["GET"])
+def completion_buffer_stats():
+    """Coalescing buffer counters for this worker."""
+    return jsonify({"ok": True, "enabled": completion_buffer.enabled,
+                    "window_ms": COMPLETION_CONFIG['coalesce_ms'],
+                    "pending_students": completion_buffer.pending_students, **completion_buffer.stats})
+
 
 @app.route("/add_assignment", methods=["POST"])
 def add_assignment():
@@ -1065,9 +3992,11 @@ def add_assignment():
             """,
             (lesson_id, title, "assignment")
         )
+        new_id = cursor.lastrowid
+        ProgressStore.refresh_lesson(cursor, lesson_id)
+        ChangeLog.record(cursor, "materials", [new_id])
         db.commit()
 
-        new_id = cursor.lastrowid
         cursor.execute(
             "SELECT material_id, title FROM Lesson_Materials WHERE material_id = %s",
             (new_id,)
@@ -1095,6 +4024,7 @@ def edit_material():
     db = get_db()
     cursor = db.cursor()
     cursor.execute("UPDATE Lesson_Materials SET title = %s WHERE material_id = %s", (title, material_id))
+    ChangeLog.record(cursor, "materials", [material_id])
     db.commit()
     return jsonify({"status": "success"})
 
@@ -1109,7 +4039,13 @@ def delete_material():
 
     db = get_db()
     cursor = db.cursor()
+    cursor.execute("SELECT lesson_id FROM Lesson_Materials WHERE material_id = %s", (material_id,))
+    owner = cursor.fetchone()
+    if owner:
+        ChangeLog.record(cursor, "materials", [material_id], "delete")
     cursor.execute("DELETE FROM Lesson_Materials WHERE material_id = %s", (material_id,))
+    if owner:
+        ProgressStore.refresh_lesson(cursor, owner[0])
     db.commit()
     return jsonify({"status": "success"})
 @app.route("/add_reading", methods=["POST"])
@@ -1131,9 +4067,11 @@ def add_reading():
             """,
             (lesson_id, title, "reading")
         )
+        new_id = cursor.lastrowid
+        ProgressStore.refresh_lesson(cursor, lesson_id)
+        ChangeLog.record(cursor, "materials", [new_id])
         db.commit()
 
-        new_id = cursor.lastrowid
         cursor.execute(
             "SELECT material_id, title FROM Lesson_Materials WHERE material_id = %s",
             (new_id,)
@@ -1232,6 +4170,7 @@ def create_classroom():
             (unit_id, classroom_name, instructor_id,)
         )
         db.commit()
+        catalog_cache.invalidate("classrooms")
         new_id = cursor.lastrowid
 
         details = {"classroom_name" : classroom_name, "classroom_id":new_id, "unit_id" : unit_id}
@@ -1248,12 +4187,17 @@ def delete_classroom(classroom_id):
     db = get_db()
     cursor = db.cursor()
     try:
+        # The cascade removes the classroom's enrollments: log them while they still exist
+        ChangeLog.record_classroom_enrollments(cursor, "delete", classroom_id=classroom_id)
         cursor.execute("DELETE FROM Classroom WHERE classroom_id = %s", (classroom_id,))
-        db.commit()
         if cursor.rowcount == 0:
+            db.rollback()
             return jsonify({"status": "error", "message": "Classroom not found"}), 404
+        db.commit()
+        catalog_cache.invalidate("classrooms")
         return jsonify({"status": "success", "message": "Classroom deleted"})
     except mysql.connector.Error as e:
+        db.rollback()
         return jsonify({"status": "error", "message": str(e)}), 500
     
 @app.route("/available_classrooms", methods=["GET"])
@@ -1311,7 +4255,9 @@ def enroll_in_classroom():
 
     try:
         cursor.execute("INSERT INTO Classroom_Enrollment (student_id, classroom_id) VALUES (%s, %s)", (student_id, classroom_id))
+        ChangeLog.record(cursor, "classroom_enrollments", [classroom_id], student_id=student_id)
         db.commit()
+        catalog_cache.invalidate("classrooms")
         return jsonify({"status": "success", "message": f"Successfully enrolled in classroom {classroom_id}."})
     except mysql.connector.IntegrityError:
         return jsonify({"status": "error", "message": "Already enrolled in this classroom."}), 409
@@ -1378,10 +4324,15 @@ def update_lesson(lesson_id):
         
 
     if updates:
+        if unit_id is not None:
+            # Moving units: students of the old unit see a delete, those of the new one an upsert
+            ChangeLog.record(cur, "lessons", [lesson_id], "delete")
         sql = f"UPDATE Lessons SET {', '.join(updates)}, date_updated=NOW() WHERE lesson_id=%s"
         params.append(lesson_id)
         cur.execute(sql, tuple(params))
+        ChangeLog.record(cur, "lessons", [lesson_id])
         db.commit()
+        catalog_cache.invalidate("lessons")
 
     # Return updated row (including instructor name)
     cur.execute("""
@@ -1469,7 +4420,10 @@ def unenroll_from_classroom():
 
     try:
         cursor.execute("DELETE FROM Classroom_Enrollment WHERE student_id = %s AND classroom_id = %s", (student_id, classroom_id))
+        if cursor.rowcount:
+            ChangeLog.record(cursor, "classroom_enrollments", [classroom_id], "delete", student_id=student_id)
         db.commit()
+        catalog_cache.invalidate("classrooms")
         return jsonify({"status": "success", "message": f"Successfully unenrolled from classroom {classroom_id}."})
     except mysql.connector.Error as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -1486,6 +4440,7 @@ def add_lesson_to_classroom():
 
         cursor.execute("INSERT INTO Classroom_Lessons (lesson_id,classroom_id) VALUES (%s,%s)",(lesson_id,class_id[0],))
         db.commit()
+        catalog_cache.invalidate("classrooms")
                
         return jsonify({
             "status": "success", 
@@ -1569,7 +4524,9 @@ def update_lesson_prerequisite(lesson_id):
             SET prerequisite_lesson_id = %s, date_updated = NOW() 
             WHERE lesson_id = %s
         """, (prerequisite_id, lesson_id))
+        ChangeLog.record(cur, "lessons", [lesson_id])
         db.commit()
+        catalog_cache.invalidate("lessons")
         
         return jsonify({"ok": True, "message": "Prerequisite updated successfully"})
     
@@ -1594,49 +4551,81 @@ def get_course_lessons_status(unit_id, student_id):  # add student_id
                     "student_id": student_id, "lessons": lessons})
 
 
+def _lesson_completion_stats(cursor, lesson_ids=None, unit_id=None):
+    """total/completed/rate per lesson over actively enrolled students, in one GROUP BY
+
+    With both filters, only the given lessons that belong to the unit are counted.
+    """
+    where, params = [], []
+    if unit_id is not None:
+        where.append("l.unit_id = %s")
+        params.append(unit_id)
+    if lesson_ids or unit_id is None:
+        where.append(f"l.lesson_id IN ({_placeholders(lesson_ids)})")
+        params.extend(lesson_ids)
+
+    cursor.execute(f"""
+        SELECT lt.lesson_id,
+               COUNT(e.Student_id) AS total_students,
+               COUNT(CASE WHEN lt.total_materials = 0
+                            OR p.completed_materials >= lt.total_materials
+                          THEN e.Student_id END) AS completed_students
+        FROM (
+            SELECT l.lesson_id, l.unit_id, COUNT(lm.material_id) AS total_materials
+            FROM Lessons l
+            LEFT JOIN Lesson_Materials lm ON lm.lesson_id = l.lesson_id
+            WHERE {' AND '.join(where)}
+            GROUP BY l.lesson_id, l.unit_id
+        ) lt
+        LEFT JOIN Enrollment e ON e.Unit_id = lt.unit_id AND e.Status = 'active'
+        LEFT JOIN Student_Lesson_Progress p ON p.lesson_id = lt.lesson_id AND p.student_id = e.Student_id
+        GROUP BY lt.lesson_id
+        ORDER BY lt.lesson_id
+    """, tuple(params))
+
+    stats = {}
+    for r in cursor.fetchall():
+        total, completed = int(r["total_students"]), int(r["completed_students"])
+        stats[r["lesson_id"]] = {
+            "total_students": total,
+            "completed_students": completed,
+            "completion_rate": round(completed / total * 100, 1) if total > 0 else 0,
+        }
+    return stats
+
+
+@app.route("/api/lessons/completion-stats", methods=["GET"])
+def get_lessons_completion_stats():
+    """
+    Completion stats for many lessons at once.
+    Expects ?unit_id=... and/or ?lesson_ids=1,2,3 (both: the unit's lessons among those ids);
+    returns {"stats": {lesson_id: {...}}}
+    """
+    unit_id = (request.args.get("unit_id") or "").strip() or None
+    raw_ids = request.args.get("lesson_ids", "")
+    try:
+        lesson_ids = [int(x) for x in raw_ids.split(",") if x.strip()]
+    except ValueError:
+        return jsonify({"ok": False, "error": "lesson_ids must be a comma-separated list of integers"}), 400
+    if unit_id is None and not lesson_ids:
+        return jsonify({"ok": False, "error": "unit_id or lesson_ids is required"}), 400
+
+    try:
+        cur = get_db().cursor(dictionary=True)
+        stats = _lesson_completion_stats(cur, lesson_ids=lesson_ids, unit_id=unit_id)
+        return jsonify({"ok": True, "stats": stats})
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
 @app.route("/api/lessons/<int:lesson_id>/completion-stats", methods=["GET"])
 def get_lesson_completion_stats(lesson_id):
     try:
-        db = get_db()
-        cur = db.cursor(dictionary=True)
-        
-        # Get students enrolled in the course this lesson belongs to
-        cur.execute("""
-            SELECT COUNT(DISTINCT s.Student_id) as total_students
-            FROM Students s
-            JOIN Enrollment e ON s.Student_id = e.Student_id
-            JOIN Lessons l ON e.Unit_id = l.unit_id
-            WHERE l.lesson_id = %s AND e.Status = 'active'
-        """, (lesson_id,))
-        
-        total_result = cur.fetchone()
-        total_students = total_result['total_students'] if total_result else 0
-        
-        # Count students who have completed this lesson
-        completed_students = 0
-        if total_students > 0:
-            cur.execute("""
-                SELECT s.Student_id
-                FROM Students s
-                JOIN Enrollment e ON s.Student_id = e.Student_id
-                JOIN Lessons l ON e.Unit_id = l.unit_id
-                WHERE l.lesson_id = %s AND e.Status = 'active'
-            """, (lesson_id,))
-            
-            students = cur.fetchall()
-            for student in students:
-                if PrerequisiteManager.check_lesson_completion(student['Student_id'], lesson_id):
-                    completed_students += 1
-        
-        completion_rate = (completed_students / total_students * 100) if total_students > 0 else 0
-        
+        cur = get_db().cursor(dictionary=True)
+        stats = _lesson_completion_stats(cur, lesson_ids=[lesson_id]).get(lesson_id)
         return jsonify({
             "ok": True,
-            "stats": {
-                "total_students": total_students,
-                "completed_students": completed_students,
-                "completion_rate": round(completion_rate, 1)
-            }
+            "stats": stats or {"total_students": 0, "completed_students": 0, "completion_rate": 0}
         })
         
     except Exception as e:
@@ -1657,11 +4646,15 @@ def _to_int_or_none(v):
 @app.route("/api/instructors", methods=["GET"])
 def api_get_instructors():
     """Return list of instructors for dropdown."""
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-    cur.execute("SELECT Ins_id AS id, Ins_name AS name FROM Instructors ORDER BY Ins_name")
-    rows = cur.fetchall()
-    return jsonify({"ok": True, "instructors": rows})
+    return jsonify({"ok": True, "instructors": _instructor_list()})
+
+
+def _instructor_list():
+    def load():
+        cur = get_db().cursor(dictionary=True)
+        cur.execute("SELECT Ins_id AS id, Ins_name AS name FROM Instructors ORDER BY Ins_name")
+        return cur.fetchall()
+    return catalog_cache.get_or_load("instructors", load, namespaces=("instructors",))
 
 @app.route("/indi_classroom", methods=["GET"])
 def indi_classroom():
@@ -1675,63 +4668,70 @@ def indi_classroom():
     except (TypeError, ValueError):
         return jsonify({"found": False, "results": []}), 400
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    # Base classroom row (add duration)
-    cur.execute("""
-        SELECT c.classroom_id,
-               c.classroom_name,
-               c.unit_id,
-               c.instructor_id,
-               c.duration,
-               COALESCE(i.Ins_name, '') AS instructor_name
-        FROM Classroom c
-        LEFT JOIN Instructors i ON c.instructor_id = i.Ins_id
-        WHERE c.classroom_id=%s
-    """, (cid,))
-    row = cur.fetchone()
-    if not row:
-        return jsonify({"found": False, "results": []}), 404
+    def load():
+        cur = get_db().cursor(dictionary=True)
 
-    # Students in this classroom
-    cur.execute("""
-        SELECT s.Student_id, s.First_name, s.Last_name
-        FROM Classroom_Enrollment ce
-        JOIN Students s ON s.Student_id = ce.student_id
-        WHERE ce.classroom_id = %s
-        ORDER BY s.Last_name, s.First_name
-    """, (cid,))
-    studs = cur.fetchall()
-    students = [
-        {"student_id": r["Student_id"], "full_name": f'{r["First_name"]} {r["Last_name"]}'}
-        for r in studs
-    ]
+        # Base classroom row (add duration)
+        cur.execute("""
+            SELECT c.classroom_id,
+                   c.classroom_name,
+                   c.unit_id,
+                   c.instructor_id,
+                   c.duration,
+                   COALESCE(i.Ins_name, '') AS instructor_name
+            FROM Classroom c
+            LEFT JOIN Instructors i ON c.instructor_id = i.Ins_id
+            WHERE c.classroom_id=%s
+        """, (cid,))
+        row = cur.fetchone()
+        if not row:
+            return {}
 
-    # Lessons linked to this classroom
-    cur.execute("""
-        SELECT l.lesson_id, l.title, l.credits
-        FROM Classroom_Lessons cl
-        JOIN Lessons l ON l.lesson_id = cl.lesson_id
-        WHERE cl.classroom_id = %s
-        ORDER BY l.lesson_id
-    """, (cid,))
-    less = cur.fetchall()
-    lessons = [
-        {"lesson_id": r["lesson_id"], "title": r["title"], "credit": r["credits"]}
-        for r in less
-    ]
+        # Students in this classroom
+        cur.execute("""
+            SELECT s.Student_id, s.First_name, s.Last_name
+            FROM Classroom_Enrollment ce
+            JOIN Students s ON s.Student_id = ce.student_id
+            WHERE ce.classroom_id = %s
+            ORDER BY s.Last_name, s.First_name
+        """, (cid,))
+        studs = cur.fetchall()
+        students = [
+            {"student_id": r["Student_id"], "full_name": f'{r["First_name"]} {r["Last_name"]}'}
+            for r in studs
+        ]
+
+        # Lessons linked to this classroom
+        cur.execute("""
+            SELECT l.lesson_id, l.title, l.credits
+            FROM Classroom_Lessons cl
+            JOIN Lessons l ON l.lesson_id = cl.lesson_id
+            WHERE cl.classroom_id = %s
+            ORDER BY l.lesson_id
+        """, (cid,))
+        less = cur.fetchall()
+        lessons = [
+            {"lesson_id": r["lesson_id"], "title": r["title"], "credit": r["credits"]}
+            for r in less
+        ]
+
+        result = {
+            "classroom_id": row["classroom_id"],
+            "classroom_name": row["classroom_name"],
+            "unit_id": row["unit_id"],
+            "instructor_id": row["instructor_id"],
+            "instructor_name": row["instructor_name"],
+            "duration": row["duration"],           # ← now included
+            "students": students,                   # ← now included
+            "lessons": lessons                      # ← included too (optional)
+        }
+        return result
 
-    result = {
-        "classroom_id": row["classroom_id"],
-        "classroom_name": row["classroom_name"],
-        "unit_id": row["unit_id"],
-        "instructor_id": row["instructor_id"],
-        "instructor_name": row["instructor_name"],
-        "duration": row["duration"],           # ← now included
-        "students": students,                   # ← now included
-        "lessons": lessons                      # ← included too (optional)
-    }
+    result = catalog_cache.get_or_load(
+        f"classroom:{cid}", load, namespaces=("classrooms", "lessons", "instructors", "students")
+    )
+    if not result:
+        return jsonify({"found": False, "results": []}), 404
     return jsonify({"found": True, "results": [result]})
 @app.route("/durations", methods=["GET"])
 def get_durations():
@@ -1745,6 +4745,25 @@ def get_durations():
     except mysql.connector.Error as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+def _rekey_classroom(cur, old_id, new_id):
+    """Give a classroom a new id, moving its enrollments and lessons along (caller commits)
+
+    The child foreign keys have no ON UPDATE CASCADE, so the row is copied under the new id
+    (named apart while both exist), the children are pointed at the copy, and the old row goes.
+    """
+    cur.execute("SELECT classroom_name FROM Classroom WHERE classroom_id=%s", (old_id,))
+    name = cur.fetchone()
+    name = name["classroom_name"] if isinstance(name, dict) else name[0]
+    cur.execute("""
+        INSERT INTO Classroom (classroom_id, unit_id, classroom_name, instructor_id, duration, date_created)
+        SELECT %s, unit_id, %s, instructor_id, duration, date_created FROM Classroom WHERE classroom_id=%s
+    """, (new_id, f"{name} [{new_id}]", old_id))
+    for table in ("Classroom_Enrollment", "Classroom_Lessons"):
+        cur.execute(f"UPDATE {table} SET classroom_id=%s WHERE classroom_id=%s", (new_id, old_id))
+    cur.execute("DELETE FROM Classroom WHERE classroom_id=%s", (old_id,))
+    cur.execute("UPDATE Classroom SET classroom_name=%s WHERE classroom_id=%s", (name, new_id))
+
+
 @app.route("/api/classrooms/<int:classroom_id>", methods=["PUT"])
 def api_update_classroom(classroom_id):
     data = request.get_json(force=True) or {}
@@ -1792,8 +4811,12 @@ def api_update_classroom(classroom_id):
             sql = f"UPDATE Classroom SET {', '.join(sets)} WHERE classroom_id=%s"
             params.append(classroom_id)
             cur.execute(sql, tuple(params))
+            # Enrolled students' rows carry the classroom's name and unit
+            ChangeLog.record_classroom_enrollments(cur, "upsert", classroom_id=classroom_id)
             db.commit()
+            catalog_cache.invalidate("classrooms")
         except mysql.connector.IntegrityError as e:
+            db.rollback()
             if e.errno == 1062:
                 return jsonify({"ok": False, "error": "A classroom with that name already exists for this course."}), 409
             raise
@@ -1802,9 +4825,15 @@ def api_update_classroom(classroom_id):
         cur.execute("SELECT 1 FROM Classroom WHERE classroom_id=%s", (classroom_id_new,))
         if cur.fetchone():
             return jsonify({"ok": False, "error": "Target classroom_id already exists"}), 409
-        cur.execute("UPDATE Classroom SET classroom_id=%s WHERE classroom_id=%s",
-                    (classroom_id_new, classroom_id))
-        db.commit()
+        try:
+            ChangeLog.record_classroom_enrollments(cur, "delete", classroom_id=classroom_id)
+            _rekey_classroom(cur, classroom_id, classroom_id_new)
+            ChangeLog.record_classroom_enrollments(cur, "upsert", classroom_id=classroom_id_new)
+            db.commit()
+        except mysql.connector.Error:
+            db.rollback()
+            raise
+        catalog_cache.invalidate("classrooms")
         classroom_id = classroom_id_new
 
     cur.execute("""
@@ -1823,11 +4852,15 @@ def api_update_classroom(classroom_id):
 
 @app.route("/api/units", methods=["GET"])
 def api_units():
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-    cur.execute("SELECT Unit_id AS unit_id, Title AS title FROM Courses ORDER BY Unit_id")
-    rows = cur.fetchall()
-    return jsonify({"ok": True, "units": rows})
+    return jsonify({"ok": True, "units": _unit_list()})
+
+
+def _unit_list():
+    def load():
+        cur = get_db().cursor(dictionary=True)
+        cur.execute("SELECT Unit_id AS unit_id, Title AS title FROM Courses ORDER BY Unit_id")
+        return cur.fetchall()
+    return catalog_cache.get_or_load("units", load, namespaces=("courses",))
 
 @app.route("/remove_from_all_classes", methods=["DELETE", "POST"])
 def remove_from_all_classes():
@@ -1836,11 +4869,14 @@ def remove_from_all_classes():
     cursor = db.cursor()
 
     try:
+        ChangeLog.record_classroom_enrollments(cursor, "delete", student_id=student_id)
+        ChangeLog.record_student_enrollments(cursor, student_id, "delete")
         cursor.execute("DELETE FROM Classroom_Enrollment WHERE student_id = %s", (student_id,))
         cursor.execute("DELETE FROM Enrollment WHERE student_id = %s",(student_id,))
         cursor.execute("UPDATE Students SET Activity =%s WHERE Student_id = %s",("inactive",student_id,))
         cursor.execute("UPDATE Logins SET activity_status = %s WHERE user_ref_id = %s", ("inactive", student_id))
         db.commit()
+        catalog_cache.invalidate("classrooms")
 
 
         return jsonify({"status": "success", "message": "Successfully removed from all classrooms."})
@@ -2024,6 +5060,7 @@ def create_ins():
         )
 
         db.commit()
+        catalog_cache.invalidate("instructors")
         return jsonify({
             "status": "success", 
             "message": "Instructor created successfully."
@@ -2053,6 +5090,7 @@ def delete_ins():
         cursor.execute("DELETE FROM Logins WHERE user_ref_id = %s",(ins_id,))
         cursor.execute("DELETE FROM Instructors WHERE Ins_id = %s",(ins_id,))
         db.commit()
+        catalog_cache.invalidate("instructors", "courses")
         return jsonify({"status": "success", "message": "Instructor deleted successfully."}), 200
     except mysql.connector.Error as e:
         db.rollback()
@@ -2121,6 +5159,7 @@ def update_ins():
             )
 
         db.commit()
+        catalog_cache.invalidate("instructors")
         return jsonify({"status": "success", "message": "Instructor updated successfully."}), 200
 
     except mysql.connector.IntegrityError as e:
@@ -2142,6 +5181,55 @@ def update_ins():
 def student_report_navigation():
     return render_template("student_report.html")
 
+_REPORT_COUNTERS = ("total_lessons", "completed_lessons", "total_assignments",
+                    "completed_assignments", "total_reading", "completed_reading")
+
+
+def _student_unit_report(cursor, student_id, unit_id=None):
+    """Progress summary for every unit a student is enrolled in, in a single grouped query.
+
+    Material totals come from the lesson catalogue, completion from the materialized
+    Student_Lesson_Progress rows (see ProgressStore); lessons without a row count as untouched.
+    """
+    unit_filter = "AND le.Unit_id = %s" if unit_id else ""
+    outer_filter = "AND u.Unit_id = %s" if unit_id else ""
+    params = (student_id, unit_id, student_id, unit_id) if unit_id else (student_id, student_id)
+
+    cursor.execute(f"""
+        SELECT u.Unit_id, u.Title, u.Course_description, u.Total_credit,
+               COUNT(lt.lesson_id) AS total_lessons,
+               COALESCE(SUM(CASE WHEN COALESCE(p.completed_materials, 0) >= lt.total_materials
+                                 THEN 1 ELSE 0 END), 0) AS completed_lessons,
+               COALESCE(SUM(lt.total_assignments), 0)    AS total_assignments,
+               COALESCE(SUM(p.completed_assignments), 0) AS completed_assignments,
+               COALESCE(SUM(lt.total_reading), 0)        AS total_reading,
+               COALESCE(SUM(p.completed_reading), 0)     AS completed_reading
+        FROM Enrollment e
+        JOIN Courses u ON u.Unit_id = e.Unit_id
+        LEFT JOIN (
+            SELECT l.unit_id, l.lesson_id,
+                   COUNT(lm.material_id) AS total_materials,
+                   COUNT(CASE WHEN lm.material_type = 'assignment' THEN 1 END) AS total_assignments,
+                   COUNT(CASE WHEN lm.material_type = 'reading' THEN 1 END) AS total_reading
+            FROM Enrollment le
+            JOIN Lessons l ON l.unit_id = le.Unit_id
+            LEFT JOIN Lesson_Materials lm ON lm.lesson_id = l.lesson_id
+            WHERE le.Student_id = %s {unit_filter}
+            GROUP BY l.unit_id, l.lesson_id
+        ) lt ON lt.unit_id = u.Unit_id
+        LEFT JOIN Student_Lesson_Progress p ON p.lesson_id = lt.lesson_id AND p.student_id = e.Student_id
+        WHERE e.Student_id = %s {outer_filter}
+        GROUP BY u.Unit_id, u.Title, u.Course_description, u.Total_credit
+        ORDER BY u.Unit_id
+    """, params)
+
+    units = cursor.fetchall()
+    for unit in units:
+        for key in _REPORT_COUNTERS:
+            unit[key] = int(unit[key] or 0)
+    return units
+
+
 @app.route("/student_report_data", methods=["GET"])
 def student_report_data():
     db = get_db()
@@ -2158,25 +5246,7 @@ def student_report_data():
         # ✅ Optional unit filter
         unit_id = request.args.get("unit_id")
 
-        # ✅ Main query (filter if unit_id provided)
-        if unit_id:
-            cursor.execute("""
-                SELECT 
-                u.Unit_id, u.Title, u.Course_description, u.Total_credit 
-                FROM Courses u
-                JOIN Enrollment e ON u.Unit_id = e.Unit_id
-                WHERE e.Student_id = %s AND u.Unit_id = %s
-            """, (student_id, unit_id))
-        else:
-            cursor.execute("""
-                SELECT 
-                u.Unit_id, u.Title, u.Course_description, u.Total_credit 
-                FROM Courses u
-                JOIN Enrollment e ON u.Unit_id = e.Unit_id
-                WHERE e.Student_id = %s
-            """, (student_id,))
-
-        units_enrolled = cursor.fetchall()
+        units_enrolled = _student_unit_report(cursor, student_id, unit_id)
 
         if unit_id and not units_enrolled:
             return jsonify({
@@ -2184,55 +5254,6 @@ def student_report_data():
                 "message": "Unit not found or not enrolled"
             }), 404
 
-        # ✅ For each enrolled unit, collect detailed progress
-        for unit in units_enrolled:
-            uid = unit["Unit_id"]
-
-            cursor.execute("""
-                SELECT lesson_id FROM Lessons
-                WHERE Lessons.Unit_id = %s
-            """, (uid,))
-            lessons_in_unit = cursor.fetchall()
-            
-            total_lessons = len(lessons_in_unit)
-            completed_lessons_count = 0
-
-            if total_lessons > 0:
-                for lesson in lessons_in_unit:
-                    if PrerequisiteManager.check_lesson_completion(student_id, lesson['lesson_id']):
-                        completed_lessons_count += 1
-            
-            unit["total_lessons"] = total_lessons
-            unit["completed_lessons"] = completed_lessons_count
-
-            # ---- ASSIGNMENTS ----
-            cursor.execute("""
-                SELECT COUNT(lm.material_id) AS total_assignments,
-                       SUM(CASE WHEN smc.completed = TRUE THEN 1 ELSE 0 END) AS completed_assignments
-                FROM Lesson_Materials lm
-                JOIN Lessons l ON lm.lesson_id = l.lesson_id
-                LEFT JOIN Student_Material_Completion smc
-                       ON lm.material_id = smc.material_id AND smc.student_id = %s
-                WHERE lm.material_type = 'assignment' AND l.Unit_id = %s
-            """, (student_id, uid,))
-            result = cursor.fetchone()
-            unit["total_assignments"] = int(result["total_assignments"] or 0) if result else 0
-            unit["completed_assignments"] = int(result["completed_assignments"] or 0) if result else 0
-
-            # ---- READINGS ----
-            cursor.execute("""
-                SELECT COUNT(lm.material_id) AS total_reading,
-                       SUM(CASE WHEN smc.completed = TRUE THEN 1 ELSE 0 END) AS completed_reading
-                FROM Lesson_Materials lm
-                JOIN Lessons l ON lm.lesson_id = l.lesson_id
-                LEFT JOIN Student_Material_Completion smc
-                       ON lm.material_id = smc.material_id AND smc.student_id = %s
-                WHERE lm.material_type = 'reading' AND l.Unit_id = %s
-            """, (student_id, uid,))
-            result = cursor.fetchone()
-            unit["total_reading"] = int(result["total_reading"] or 0) if result else 0
-            unit["completed_reading"] = int(result["completed_reading"] or 0) if result else 0
-
         # ✅ Response format: `data` always holds the relevant info
         if unit_id:
             return jsonify({
@@ -2255,6 +5276,90 @@ def student_report_data():
     finally:
         cursor.close()
 
+DASHBOARD_FIELDS = ("courses", "catalog", "classrooms", "progress", "preferences")
+
+
+def _student_enrollments(cursor, student_id):
+    """The student's enrolled units with course title and director, resolved once per dashboard"""
+    cursor.execute("""
+        SELECT e.Unit_id AS unit_id, e.Status AS status, c.Title AS title, c.Course_director AS course_director
+        FROM Enrollment e
+        JOIN Courses c ON e.Unit_id = c.Unit_id
+        WHERE e.Student_id = %s
+        ORDER BY e.Unit_id
+    """, (student_id,))
+    return cursor.fetchall()
+
+
+def _student_dashboard_classrooms(cursor, student_id, unit_ids):
+    """Classrooms the student is in plus those of their enrolled units, each flagged `enrolled`"""
+    scope, params = "ce.student_id IS NOT NULL", [student_id]
+    if unit_ids:
+        scope += f" OR c.unit_id IN ({_placeholders(unit_ids)})"
+        params += list(unit_ids)
+    cursor.execute(f"""
+        SELECT c.classroom_id, c.classroom_name, c.unit_id, c.duration, i.Ins_name,
+               CASE WHEN ce.student_id IS NULL THEN 0 ELSE 1 END AS enrolled
+        FROM Classroom c
+        LEFT JOIN Instructors i ON c.instructor_id = i.Ins_id
+        LEFT JOIN Classroom_Enrollment ce ON ce.classroom_id = c.classroom_id AND ce.student_id = %s
+        WHERE {scope}
+        ORDER BY c.unit_id, c.classroom_id
+    """, tuple(params))
+    return [{**r, "enrolled": bool(r["enrolled"])} for r in cursor.fetchall()]
+
+
+@app.route("/api/student/dashboard", methods=["GET"])
+def student_dashboard():
+    """
+    The signed-in student's landing data in one response: enrolled courses, the visible
+    course catalog, classrooms, per-unit progress and preferences.
+    Optional ?fields=courses,catalog,... picks a subset of DASHBOARD_FIELDS (default: all).
+    The enrollment set is looked up once and shared by every field that needs it.
+    """
+    if session.get("user_type") != "student" or not session.get("user_id"):
+        return jsonify({"status": "error", "message": "User not logged in"}), 401
+    student_id = session["user_id"]
+
+    raw = request.args.get("fields")
+    fields = [x.strip() for x in raw.split(",") if x.strip()] if raw else list(DASHBOARD_FIELDS)
+    unknown = sorted(set(fields) - set(DASHBOARD_FIELDS))
+    if unknown:
+        return jsonify({"status": "error", "message": f"Unknown field(s): {unknown}"}), 400
+
+    cursor = get_db().cursor(dictionary=True)
+    try:
+        dashboard = {"status": "success"}
+        enrollments = []
+        if set(fields) & {"courses", "catalog", "classrooms", "progress"}:
+            enrollments = _student_enrollments(cursor, student_id)
+        enrolled_unit_ids = {e["unit_id"] for e in enrollments}
+
+        if "courses" in fields:
+            dashboard["courses"] = enrollments
+        if "catalog" in fields:
+            ranked = course_search.search(
+                cursor, "",
+                is_visible=lambda course: course["active"] or course["unit_id"] in enrolled_unit_ids,
+                limit=SEARCH_CONFIG['result_cap'],
+            )
+            dashboard["catalog"] = _course_results(ranked, enrolled_unit_ids)
+        if "classrooms" in fields:
+            dashboard["classrooms"] = _student_dashboard_classrooms(cursor, student_id, sorted(enrolled_unit_ids))
+        if "progress" in fields:
+            dashboard["progress"] = _student_unit_report(cursor, student_id) if enrollments else []
+        if "preferences" in fields:
+            cursor.execute("""
+                SELECT font_preference AS font, theme_preference AS theme, activity_status AS status
+                FROM Logins WHERE user_ref_id = %s AND user_type = 'student'
+            """, (student_id,))
+            dashboard["preferences"] = cursor.fetchone() or {"font": None, "theme": None, "status": None}
+        return jsonify(dashboard)
+    except mysql.connector.Error as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        cursor.close()
+
 @app.route("/student_name", methods=["GET"])
 def student_name():
     db = get_db()
@@ -2426,10 +5531,13 @@ def api_update_profile():
 
         # Side-effects on deactivate
         if status == "inactive":
+            ChangeLog.record_classroom_enrollments(cur, "delete", student_id=uid)
+            ChangeLog.record_student_enrollments(cur, uid, "delete")
             cur.execute("DELETE FROM Classroom_Enrollment WHERE student_id=%s", (uid,))
             cur.execute("DELETE FROM Enrollment WHERE student_id=%s", (uid,))
 
         db.commit()
+        catalog_cache.invalidate("students", "classrooms")
 
         # --- Return fresh profile so UI can reflect changes immediately ---
         cur_dict = db.cursor(dictionary=True)
@@ -2592,60 +5700,402 @@ def render_ins_course():
 def render_ins_report_course_students():
     return render_template("instructor_report_course_students.html")
 
+class ProgressMatrix:
+    """Per-student, per-lesson completion for a whole unit.
+
+    Lesson totals are loaded once; each page of students then costs one query for the
+    students (already sorted by completed lessons in SQL) and one for their progress rows.
+    """
+
+    SORTS = {"progress", "name"}
+    MAX_PER_PAGE = 500
+
+    def __init__(self, cursor, unit_id):
+        self.cursor = cursor
+        self.unit_id = unit_id
+        cursor.execute("""
+            SELECT l.lesson_id, l.title, COUNT(lm.material_id) AS total_materials
+            FROM Lessons l
+            LEFT JOIN Lesson_Materials lm ON lm.lesson_id = l.lesson_id
+            WHERE l.unit_id = %s
+            GROUP BY l.lesson_id, l.title
+            ORDER BY l.lesson_id
+        """, (unit_id,))
+        self.lessons = [
+            {"lesson_id": r["lesson_id"], "title": r["title"], "total_materials": int(r["total_materials"])}
+            for r in cursor.fetchall()
+        ]
+        # Lessons without materials are complete for everyone, so they never need a progress row
+        self.free_lessons = sum(1 for lesson in self.lessons if lesson["total_materials"] == 0)
+
+    def count_students(self):
+        self.cursor.execute("SELECT COUNT(*) AS n FROM Enrollment WHERE Unit_id = %s", (self.unit_id,))
+        return int(self.cursor.fetchone()["n"])
+
+    def students(self, sort="name", order="asc", limit=None, offset=0):
+        """One page of enrolled students with completed_lessons, sorted in SQL"""
+        direction = "DESC" if order == "desc" else "ASC"
+        if sort == "progress":
+            order_by = f"completed_lessons {direction}, s.Last_name, s.First_name, s.Student_id"
+        else:
+            order_by = f"s.Last_name {direction}, s.First_name {direction}, s.Student_id"
+        page = ""
+        params = [self.unit_id, self.unit_id]
+        if limit is not None:
+            page = "LIMIT %s OFFSET %s"
+            params += [int(limit), int(offset)]
+
+        self.cursor.execute(f"""
+            SELECT s.Student_id, s.First_name, s.Last_name,
+                   COALESCE(done.completed_lessons, 0) AS completed_lessons
+            FROM Enrollment e
+            JOIN Students s ON s.Student_id = e.Student_id
+            LEFT JOIN (
+                SELECT p.student_id, COUNT(*) AS completed_lessons
+                FROM Student_Lesson_Progress p
+                JOIN (
+                    SELECT l.lesson_id, COUNT(lm.material_id) AS total_materials
+                    FROM Lessons l
+                    JOIN Lesson_Materials lm ON lm.lesson_id = l.lesson_id
+                    WHERE l.unit_id = %s
+                    GROUP BY l.lesson_id
+                ) lt ON lt.lesson_id = p.lesson_id AND p.completed_materials >= lt.total_materials
+                GROUP BY p.student_id
+            ) done ON done.student_id = e.Student_id
+            WHERE e.Unit_id = %s
+            ORDER BY {order_by}
+            {page}
+        """, tuple(params))
+        return self.cursor.fetchall()
+
+    def cells(self, student_ids):
+        """Map (student_id, lesson_id) -> completed materials for the given students"""
+        lesson_ids = [lesson["lesson_id"] for lesson in self.lessons]
+        if not student_ids or not lesson_ids:
+            return {}
+        self.cursor.execute(f"""
+            SELECT student_id, lesson_id, completed_materials
+            FROM Student_Lesson_Progress
+            WHERE student_id IN ({_placeholders(student_ids)})
+              AND lesson_id IN ({_placeholders(lesson_ids)})
+        """, (*student_ids, *lesson_ids))
+        return {(r["student_id"], r["lesson_id"]): int(r["completed_materials"]) for r in self.cursor.fetchall()}
+
+    def progress_percent(self, completed_lessons):
+        total = len(self.lessons)
+        return (completed_lessons / total * 100) if total > 0 else 0
+
+    def rows(self, students, with_cells=True):
+        """Shape student rows for JSON; cell lists line up with self.lessons"""
+        cells = self.cells([s["Student_id"] for s in students]) if with_cells else {}
+        result = []
+        for student in students:
+            sid = student["Student_id"]
+            completed_lessons = int(student["completed_lessons"]) + self.free_lessons
+            row = {
+                "student_id": sid,
+                "full_name": f"{student['First_name']} {student['Last_name']}",
+                "completed_lessons": completed_lessons,
+                "progress": round(self.progress_percent(completed_lessons)),
+            }
+            if with_cells:
+                done = [cells.get((sid, lesson["lesson_id"]), 0) for lesson in self.lessons]
+                row["materials_completed"] = done
+                row["lessons_completed"] = [
+                    count >= lesson["total_materials"] for count, lesson in zip(done, self.lessons)
+                ]
+            result.append(row)
+        return result
+
+    def stream(self, sort, order, chunk_size=MAX_PER_PAGE):
+        """Yield the whole matrix as a JSON document, one chunk of students at a time"""
+        yield '{"status": "success", "unit_id": ' + json.dumps(self.unit_id)
+        yield ', "lessons": ' + json.dumps(self.lessons) + ', "students": ['
+        offset, first = 0, True
+        while True:
+            chunk = self.students(sort, order, limit=chunk_size, offset=offset)
+            for row in self.rows(chunk):
+                yield ("" if first else ", ") + json.dumps(row)
+                first = False
+            if len(chunk) < chunk_size:
+                break
+            offset += chunk_size
+        yield "]}"
+
+
+def _require_instructor():
+    if not session.get("user_id") or session.get("user_type") != "instructor":
+        return jsonify({"status": "error", "message": "Unauthorized"}), 403
+    return None
+
+
+@app.route("/api/instructor/course/<unit_id>/progress_matrix")
+def get_course_progress_matrix(unit_id):
+    """
+    Per-student, per-lesson completion for a unit.
+    Query params: page (1), per_page (50, max 500), sort=name|progress, order=asc|desc,
+    stream=1 to receive every student as a streamed JSON document instead of a page.
+    """
+    denied = _require_instructor()
+    if denied:
+        return denied
+
+    sort = request.args.get("sort", "name")
+    order = request.args.get("order", "asc").lower()
+    if sort not in ProgressMatrix.SORTS or order not in ("asc", "desc"):
+        return jsonify({"status": "error", "message": "sort must be name|progress and order asc|desc"}), 400
+
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        matrix = ProgressMatrix(cursor, unit_id)
+
+        if request.args.get("stream") in ("1", "true"):
+            return Response(stream_with_context(matrix.stream(sort, order)), mimetype="application/json")
+
+        page = max(request.args.get("page", 1, type=int), 1)
+        per_page = min(max(request.args.get("per_page", 50, type=int), 1), ProgressMatrix.MAX_PER_PAGE)
+        students = matrix.students(sort, order, limit=per_page, offset=(page - 1) * per_page)
+
+        return jsonify({
+            "status": "success",
+            "unit_id": unit_id,
+            "lessons": matrix.lessons,
+            "students": matrix.rows(students),
+            "page": page,
+            "per_page": per_page,
+            "total_students": matrix.count_students(),
+        })
+    except mysql.connector.Error as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
 @app.route("/api/instructor/course/<unit_id>/students_progress")
 def get_course_students_progress(unit_id):
-    print(f"Session data: {session}")
-    if not session.get("user_id") or session.get("user_type") != "instructor":
+    denied = _require_instructor()
+    if denied:
         print("Unauthorized access attempt!")
-        return jsonify({"status": "error", "message": "Unauthorized"}), 403
+        return denied
 
     db = get_db()
     cursor = db.cursor(dictionary=True)
     try:
-        cursor.execute("""
-            SELECT lesson_id
-            FROM Lessons
-            WHERE unit_id = %s
+        matrix = ProgressMatrix(cursor, unit_id)
+        student_progress_list = [
+            {"student_id": row["student_id"], "full_name": row["full_name"], "progress": row["progress"]}
+            for row in matrix.rows(matrix.students(sort="name"), with_cells=False)
+        ]
+        return jsonify({"status": "success", "students": student_progress_list})
+    except mysql.connector.Error as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+WORKSPACE_SECTIONS = ("course", "lessons", "progress", "classrooms", "instructors", "units")
+
+
+def _unit_lesson_outline(unit_id):
+    """A unit's lessons with their prerequisite edges (cached)"""
+    def load():
+        cur = get_db().cursor(dictionary=True)
+        cur.execute("""
+            SELECT lesson_id, title, credits, estimated_time_hours, prerequisite_lesson_id, designer_id
+            FROM Lessons WHERE unit_id = %s ORDER BY lesson_id
         """, (unit_id,))
-        course_lessons = cursor.fetchall()
-        total_lessons_in_course = len(course_lessons)
+        return cur.fetchall()
+    return catalog_cache.get_or_load(f"unit_lesson_outline:{unit_id}", load, namespaces=("lessons",))
 
-        cursor.execute("""
-            SELECT s.Student_id, s.First_name, s.Last_name
-            FROM Students s
-            JOIN Enrollment e ON s.Student_id = e.Student_id
-            WHERE e.Unit_id = %s
-            ORDER BY s.Last_name, s.First_name;
+
+def _unit_classrooms(unit_id):
+    """A unit's classrooms with instructor, enrolled-student count and assigned lessons (cached)"""
+    def load():
+        cur = get_db().cursor(dictionary=True)
+        cur.execute("""
+            SELECT c.classroom_id, c.classroom_name, c.instructor_id, c.duration,
+                   COALESCE(i.Ins_name, '') AS instructor_name,
+                   COUNT(ce.student_id) AS student_count
+            FROM Classroom c
+            LEFT JOIN Instructors i ON c.instructor_id = i.Ins_id
+            LEFT JOIN Classroom_Enrollment ce ON ce.classroom_id = c.classroom_id
+            WHERE c.unit_id = %s
+            GROUP BY c.classroom_id, c.classroom_name, c.instructor_id, c.duration, i.Ins_name
+            ORDER BY c.classroom_id
         """, (unit_id,))
-        students = cursor.fetchall()
+        classrooms = [{**r, "student_count": int(r["student_count"]), "lesson_ids": []} for r in cur.fetchall()]
+        cur.execute("""
+            SELECT cl.classroom_id, cl.lesson_id
+            FROM Classroom_Lessons cl JOIN Classroom c ON c.classroom_id = cl.classroom_id
+            WHERE c.unit_id = %s ORDER BY cl.lesson_id
+        """, (unit_id,))
+        by_id = {c["classroom_id"]: c for c in classrooms}
+        for r in cur.fetchall():
+            by_id[r["classroom_id"]]["lesson_ids"].append(r["lesson_id"])
+        return classrooms
+    return catalog_cache.get_or_load(
+        f"unit_classrooms:{unit_id}", load, namespaces=("classrooms", "lessons", "instructors")
+    )
 
-        student_progress_list = []
-        for student in students:
-            completed_lessons_count = 0
-            if total_lessons_in_course > 0:
-                for lesson in course_lessons:
-                    if PrerequisiteManager.check_lesson_completion(student['Student_id'], lesson['lesson_id']):
-                        completed_lessons_count += 1
-            
-            progress_percent = (completed_lessons_count / total_lessons_in_course * 100) if total_lessons_in_course > 0 else 0
 
-            student_progress_list.append({
-                "student_id": student['Student_id'],
-                "full_name": f"{student['First_name']} {student['Last_name']}",
-                "progress": round(progress_percent) 
-            })
+@app.route("/api/instructor/workspace/<unit_id>")
+def get_instructor_workspace(unit_id):
+    """
+    Everything the instructor course and lesson pages load for a unit, in one request.
+    Optional ?sections=course,lessons,... picks a subset of WORKSPACE_SECTIONS (default: all).
+    Catalog sections come from the cache; "progress" (enrolled students with their progress
+    and per-lesson completion stats) is live and costs three set-based queries.
+    """
+    denied = _require_instructor()
+    if denied:
+        return denied
 
-        return jsonify({"status": "success", "students": student_progress_list})
+    raw = request.args.get("sections")
+    sections = [x.strip() for x in raw.split(",") if x.strip()] if raw else list(WORKSPACE_SECTIONS)
+    unknown = sorted(set(sections) - set(WORKSPACE_SECTIONS))
+    if unknown:
+        return jsonify({"status": "error", "message": f"Unknown section(s): {unknown}"}), 400
+
+    try:
+        course = _course_details(unit_id)
+        if not course:
+            return jsonify({"status": "error", "message": f"Course '{unit_id}' not found"}), 404
+
+        workspace = {"status": "success", "unit_id": unit_id}
+        if "course" in sections:
+            workspace["course"] = course[0]
+        if "lessons" in sections:
+            workspace["lessons"] = _unit_lesson_outline(unit_id)
+        if "progress" in sections:
+            cursor = get_db().cursor(dictionary=True)
+            matrix = ProgressMatrix(cursor, unit_id)
+            stats = _lesson_completion_stats(cursor, unit_id=unit_id)
+            workspace["progress"] = {
+                "students": matrix.rows(matrix.students(sort="name"), with_cells=False),
+                "lessons": [
+                    {"lesson_id": lesson["lesson_id"], "total_materials": lesson["total_materials"],
+                     **stats.get(lesson["lesson_id"], {})}
+                    for lesson in matrix.lessons
+                ],
+            }
+        if "classrooms" in sections:
+            workspace["classrooms"] = _unit_classrooms(unit_id)
+        if "instructors" in sections:
+            workspace["instructors"] = _instructor_list()
+        if "units" in sections:
+            workspace["units"] = _unit_list()
+        return jsonify(workspace)
     except mysql.connector.Error as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# ================== MAINTENANCE COMMANDS ==================
+@app.cli.command("rebuild-progress")
+@click.option("--student-id", type=int, default=None, help="Only rebuild this student's rows.")
+def rebuild_progress_command(student_id):
+    """Backfill Student_Lesson_Progress from Student_Material_Completion.
+
+    Usage: flask --app app rebuild-progress [--student-id N]
+    """
+    db = get_db()
+    cur = db.cursor()
+    try:
+        rows = ProgressStore.rebuild(cur, student_id)
+        db.commit()
+        click.echo(f"✅ Rebuilt {ProgressStore.TABLE}: {rows} rows written.")
+    except mysql.connector.Error as e:
+        db.rollback()
+        raise click.ClickException(f"Rebuild failed ({e.errno}): {e.msg}")
+    finally:
+        cur.close()
+
+@app.cli.command("prune-changelog")
+@click.option("--days", type=int, default=None, help="Keep this many days (default CHANGE_LOG_RETENTION_DAYS).")
+def prune_changelog_command(days):
+    """Delete Change_Log rows past the retention window; clients older than that resync fully.
+
+    Usage: flask --app app prune-changelog [--days N]
+    """
+    db = get_db()
+    cur = db.cursor(dictionary=True)
+    try:
+        rows = ChangeLog.prune(cur, days if days is not None else SYNC_CONFIG['retention_days'])
+        db.commit()
+        click.echo(f"✅ Pruned {rows} Change_Log rows.")
+    except mysql.connector.Error as e:
+        db.rollback()
+        raise click.ClickException(f"Prune failed ({e.errno}): {e.msg}")
+    finally:
+        cur.close()
+
+# Representative statements for the hot routes; check-indexes EXPLAINs each one.
+HOT_QUERY_PLANS = [
+    ("lessons by unit", "SELECT lesson_id, title FROM Lessons WHERE unit_id = %s ORDER BY lesson_id", ("FIT0001",)),
+    ("dependent lessons", "SELECT title FROM Lessons WHERE prerequisite_lesson_id = %s", (1,)),
+    ("materials by lesson and type",
+     "SELECT material_id, title FROM Lesson_Materials WHERE lesson_id = %s AND material_type = %s", (1, "reading")),
+    ("students of a unit",
+     "SELECT Student_id FROM Enrollment WHERE Unit_id = %s AND Status = 'active'", ("FIT0001",)),
+    ("classrooms by instructor",
+     "SELECT classroom_id, classroom_name FROM Classroom WHERE instructor_id = %s ORDER BY classroom_id", (1,)),
+    ("login", "SELECT user_ref_id, user_type FROM Logins WHERE email = %s AND password_hash = %s",
+     ("admin@example.com", "x")),
+    ("preferences", "SELECT font_preference FROM Logins WHERE user_ref_id = %s AND user_type = %s", (1, "student")),
+    ("progress by lesson", "SELECT student_id FROM Student_Lesson_Progress WHERE lesson_id = %s", (1,)),
+    ("completion by material", "SELECT student_id FROM Student_Material_Completion WHERE material_id = %s", (1,)),
+]
+
+
+def check_index_usage(cursor):
+    """EXPLAIN every HOT_QUERY_PLANS entry; returns [(name, table, problem)]
+
+    A table scanned with no usable index is a failure. An index that exists but was not
+    picked (common on tiny tables, where a scan is cheaper) is reported as a warning.
+    """
+    problems = []
+    for name, sql, params in HOT_QUERY_PLANS:
+        cursor.execute("EXPLAIN " + sql, params)
+        if db_backend.name == "sqlite":
+            # EXPLAIN QUERY PLAN rows read like "SCAN Lessons" or "SEARCH Lessons USING INDEX ..."
+            for row in cursor.fetchall():
+                detail = row.get("detail") or ""
+                if detail.startswith("SCAN ") and " USING " not in detail:
+                    problems.append((name, detail.split()[1], f"error: no usable index ({detail})"))
+            continue
+        for row in cursor.fetchall():
+            table = row.get("table") or ""
+            if table.startswith("<"):       # derived tables / unions
+                continue
+            if row.get("key"):
+                continue
+            if row.get("possible_keys"):
+                problems.append((name, table, f"warning: index available ({row['possible_keys']}) but not chosen"))
+            else:
+                problems.append((name, table, f"error: no usable index (access type {row.get('type')})"))
+    return problems
+
+
+@app.cli.command("check-indexes")
+def check_indexes_command():
+    """EXPLAIN the hot-path queries and fail if any of them cannot use an index.
+
+    Usage: flask --app app check-indexes
+    """
+    cur = get_db().cursor(dictionary=True)
+    try:
+        problems = check_index_usage(cur)
+    finally:
+        cur.close()
+
+    for name, table, problem in problems:
+        click.echo(f"  {name} [{table}]: {problem}")
+    errors = [p for p in problems if p[2].startswith("error")]
+    if errors:
+        raise click.ClickException(f"{len(errors)} hot query path(s) have no usable index.")
+    click.echo(f"✅ All {len(HOT_QUERY_PLANS)} hot query paths can use an index.")
+
 # ============================================================
 # 🔚 APP ENTRY POINT
 # ============================================================
 if __name__ == "__main__":
     # Run setup locally to build DB schema
-    setup_database()
+    bootstrap.start()
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", 10000)), debug=True)
 else:
-    # When deployed (e.g., on Railway), this runs on import
-    setup_database()
+    # When deployed (e.g., on Railway): returns immediately, the schema check runs in the background
+    bootstrap.start()
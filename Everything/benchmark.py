@@ -0,0 +1,285 @@
+"""
+Endpoint benchmarks: drive the hot routes through Flask's test_client on seeded datasets.
+
+Each dataset size runs in its own process against a fresh SQLite file built by
+generate_data.py, so results do not depend on a MySQL server. Per endpoint we record
+p50/p95/p99 latency, queries per request (from the X-Query-Count header) and peak Python
+memory (tracemalloc, measured in a separate pass so it does not skew the timings).
+
+    python benchmark.py --sizes tiny,small                  # compare against the baseline
+    python benchmark.py --sizes tiny,small --update-baseline
+    python benchmark.py --threshold 0.5 --output run.json
+
+The exit status is 1 when any endpoint regresses past --threshold (relative) compared
+with the stored baseline: slower p50/p95, more peak memory, or more queries per request.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "benchmarks", "baseline.json")
+
+# Latency differences below this are noise on any machine, whatever the relative change
+MIN_LATENCY_DELTA_MS = 1.0
+MIN_MEMORY_DELTA_KIB = 64
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def pick_targets(app):
+    """Ids to benchmark with: the busiest unit and a student, instructor, lesson and classroom in it"""
+    conn = app.db_backend.connect()
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute("""
+            SELECT Unit_id, COUNT(*) AS n FROM Enrollment
+            WHERE Status = 'active' GROUP BY Unit_id ORDER BY n DESC, Unit_id LIMIT 1
+        """)
+        unit_id = cur.fetchone()["Unit_id"]
+        cur.execute("""
+            SELECT e.Student_id, l.email FROM Enrollment e
+            JOIN Logins l ON l.user_ref_id = e.Student_id AND l.user_type = 'student'
+            WHERE e.Unit_id = %s AND e.Status = 'active'
+            ORDER BY e.Student_id LIMIT 1
+        """, (unit_id,))
+        student = cur.fetchone()
+        cur.execute("""
+            SELECT l.email FROM Courses c
+            JOIN Logins l ON l.user_ref_id = c.Course_made_by AND l.user_type = 'instructor'
+            WHERE c.Unit_id = %s
+        """, (unit_id,))
+        instructor = cur.fetchone()
+        cur.execute("SELECT MIN(lesson_id) AS lesson_id FROM Lessons WHERE unit_id = %s", (unit_id,))
+        lesson_id = cur.fetchone()["lesson_id"]
+        cur.execute("SELECT MIN(classroom_id) AS classroom_id FROM Classroom WHERE unit_id = %s", (unit_id,))
+        classroom_id = cur.fetchone()["classroom_id"]
+        cur.execute("SELECT Title FROM Courses WHERE Unit_id = %s", (unit_id,))
+        search_word = cur.fetchone()["Title"].split()[-2]
+    finally:
+        cur.close()
+        conn.close()
+    return {
+        "unit_id": unit_id,
+        "student_email": student["email"],
+        "instructor_email": instructor["email"],
+        "lesson_id": lesson_id,
+        "classroom_id": classroom_id,
+        "q": search_word,
+    }
+
+
+def build_cases(t):
+    """(name, role, method, url, json_body) for every benchmarked endpoint"""
+    return [
+        ("logins", None, "POST", "/logins", {"email": t["student_email"], "password": "password123"}),
+        ("fetch_lessons_and_students_2", "student", "GET",
+         f"/fetch_lessons_and_students_2?unit_id={t['unit_id']}", None),
+        ("student_report_data", "student", "GET", "/student_report_data", None),
+        ("courses_search", "student", "GET", f"/courses?q={t['q']}", None),
+        ("indi_classroom", "student", "GET", f"/indi_classroom?classroom_id={t['classroom_id']}", None),
+        ("students_progress", "instructor", "GET",
+         f"/api/instructor/course/{t['unit_id']}/students_progress", None),
+        ("lesson_completion_stats", "instructor", "GET",
+         f"/api/lessons/{t['lesson_id']}/completion-stats", None),
+    ]
+
+
+def _login(app, email):
+    client = app.app.test_client()
+    resp = client.post("/logins", json={"email": email, "password": "password123"})
+    if resp.status_code != 200:
+        raise RuntimeError(f"Login as {email} failed: {resp.status_code} {resp.get_data(as_text=True)[:200]}")
+    return client
+
+
+def prepare(size):
+    """Seed the `size` dataset into a temp SQLite file and log in; must run in a fresh process
+
+    Returns (app module, targets, {role: test client}, seconds spent seeding).
+    """
+    workdir = tempfile.mkdtemp(prefix=f"bench-{size}-")
+    os.environ.update({
+        "DB_BACKEND": "sqlite",
+        "SQLITE_PATH": os.path.join(workdir, "bench.db"),
+        "QUERY_DEBUG_HEADER": "1",
+        "SLOW_QUERY_MS": "1e9",          # keep the per-query log quiet
+        "N_PLUS_ONE_THRESHOLD": "1000000",
+    })
+    sys.path.insert(0, HERE)
+    import generate_data
+    import app
+
+    if not app.ensure_database():
+        raise RuntimeError("Could not bootstrap the benchmark database")
+    conn = app.db_backend.connect()
+    try:
+        started = time.perf_counter()
+        generate_data.generate(conn, generate_data.PRESETS[size], report=lambda line: None)
+        seed_seconds = time.perf_counter() - started
+    finally:
+        conn.close()
+
+    targets = pick_targets(app)
+    clients = {
+        None: app.app.test_client(),
+        "student": _login(app, targets["student_email"]),
+        "instructor": _login(app, targets["instructor_email"]),
+    }
+    return app, targets, clients, seed_seconds
+
+
+def run_size(size, iterations, warmup):
+    """Benchmark every case against the `size` dataset (runs in a child process)"""
+    app, targets, clients, seed_seconds = prepare(size)
+
+    results = {}
+    for name, role, method, url, body in build_cases(targets):
+        client = clients[role]
+
+        def call():
+            resp = client.open(url, method=method, json=body)
+            resp.get_data()            # drain streamed bodies inside the timing
+            return resp
+
+        for _ in range(warmup):
+            call()
+        timings, queries, status = [], [], None
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            resp = call()
+            timings.append((time.perf_counter() - t0) * 1000)
+            queries.append(int(resp.headers.get("X-Query-Count", 0)))
+            status = resp.status_code
+
+        tracemalloc.start()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        timings.sort()
+        results[name] = {
+            "url": url,
+            "status": status,
+            "p50_ms": round(_percentile(timings, 50), 3),
+            "p95_ms": round(_percentile(timings, 95), 3),
+            "p99_ms": round(_percentile(timings, 99), 3),
+            "queries": max(queries),
+            "peak_kib": round(peak / 1024, 1),
+        }
+    return {"seed_seconds": round(seed_seconds, 2), "targets": targets, "endpoints": results}
+
+
+RESULT_MARKER = "BENCHMARK-RESULT "
+
+
+def run_in_child(script, size, *extra_args):
+    """Run `script --_worker size ...` in a fresh interpreter and return the JSON it reports"""
+    cmd = [sys.executable, script, "--_worker", size, *extra_args]
+    proc = subprocess.run(cmd, cwd=HERE, capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    raise RuntimeError(f"Worker for '{size}' failed:\n{proc.stdout[-2000:]}\n{proc.stderr[-4000:]}")
+
+
+def compare(baseline, current, threshold):
+    """[(size, endpoint, message)] for every metric that got worse by more than `threshold`"""
+    regressions = []
+    for size, run in current.items():
+        base_run = baseline.get(size)
+        if not base_run:
+            continue
+        for name, now in run["endpoints"].items():
+            before = base_run["endpoints"].get(name)
+            if not before:
+                continue
+            if now["status"] != before["status"]:
+                regressions.append((size, name, f"status {before['status']} -> {now['status']}"))
+            if now["queries"] > before["queries"]:
+                regressions.append((size, name, f"queries/request {before['queries']} -> {now['queries']}"))
+            for metric in ("p50_ms", "p95_ms"):
+                if (now[metric] > before[metric] * (1 + threshold)
+                        and now[metric] - before[metric] > MIN_LATENCY_DELTA_MS):
+                    regressions.append((size, name, f"{metric} {before[metric]:.2f} -> {now[metric]:.2f}"))
+            if (now["peak_kib"] > before["peak_kib"] * (1 + threshold)
+                    and now["peak_kib"] - before["peak_kib"] > MIN_MEMORY_DELTA_KIB):
+                regressions.append((size, name, f"peak_kib {before['peak_kib']:.0f} -> {now['peak_kib']:.0f}"))
+    return regressions
+
+
+def print_table(size, run):
+    print(f"\n📊 {size} (seeded in {run['seed_seconds']} s, unit {run['targets']['unit_id']})")
+    print(f"  {'endpoint':<30}{'status':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'peak KiB':>10}")
+    for name, r in run["endpoints"].items():
+        print(f"  {name:<30}{r['status']:>7}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+              f"{r['queries']:>9}{r['peak_kib']:>10.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hot endpoints against seeded datasets.")
+    parser.add_argument("--sizes", default="tiny,small", help="comma-separated generate_data presets")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression (0.25 = 25%%)")
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    parser.add_argument("--_worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args._worker:
+        result = run_size(args._worker, args.iterations, args.warmup)
+        print(RESULT_MARKER + json.dumps(result))
+        return 0
+
+    current = {}
+    for size in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        current[size] = run_in_child(os.path.abspath(__file__), size,
+                                     "--iterations", str(args.iterations), "--warmup", str(args.warmup))
+        print_table(size, current[size])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(current)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n💾 Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ️  No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for size, name, message in regressions:
+            print(f"  [{size}] {name}: {message}")
+        return 1
+    print(f"\n✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ SET FOREIGN_KEY_CHECKS = 0;
 DROP TABLE IF EXISTS Classroom_Lessons;
 DROP TABLE IF EXISTS Classroom_Enrollment;
 DROP TABLE IF EXISTS Classroom;
+DROP TABLE IF EXISTS Student_Lesson_Progress;
 DROP TABLE IF EXISTS Student_Material_Completion; 
 DROP TABLE IF EXISTS Lesson_Materials;
 DROP TABLE IF EXISTS Lessons;
@@ -15,6 +16,9 @@ DROP TABLE IF EXISTS Instructors;
 DROP TABLE IF EXISTS Courses;
 DROP TABLE IF EXISTS Logins;
 DROP TABLE IF EXISTS Admins;
+DROP TABLE IF EXISTS Change_Log;
+DROP TABLE IF EXISTS Cache_Generation;
+DROP TABLE IF EXISTS schema_version;  -- recreated tables need their migrations again
 SET FOREIGN_KEY_CHECKS = 1;
 
 -- ----------------------------
@@ -132,6 +136,21 @@ CREATE TABLE IF NOT EXISTS Student_Material_Completion (
     FOREIGN KEY (material_id) REFERENCES Lesson_Materials(material_id) ON DELETE CASCADE
 );
 
+-- Denormalized per-(student, lesson) material counts, kept current by the write routes in app.py
+CREATE TABLE IF NOT EXISTS Student_Lesson_Progress (
+    student_id INT NOT NULL,
+    lesson_id INT NOT NULL,
+    completed_materials INT NOT NULL DEFAULT 0,
+    total_materials INT NOT NULL DEFAULT 0,
+    completed_assignments INT NOT NULL DEFAULT 0,
+    completed_reading INT NOT NULL DEFAULT 0,
+    date_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (student_id, lesson_id),
+    KEY `idx_progress_lesson` (lesson_id, student_id),
+    FOREIGN KEY (student_id) REFERENCES Students(Student_id) ON DELETE CASCADE,
+    FOREIGN KEY (lesson_id) REFERENCES Lessons(lesson_id) ON DELETE CASCADE
+);
+
 CREATE TABLE IF NOT EXISTS Logins (
     login_id INT PRIMARY KEY AUTO_INCREMENT,
     user_type ENUM('student', 'instructor', 'admin') NOT NULL,
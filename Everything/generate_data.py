@@ -0,0 +1,323 @@
+"""
+Synthetic data generator: scales the c.sql dummy data up to production-size cohorts.
+
+The same --seed always produces the same rows. Everything is bulk-loaded with multi-row
+INSERTs through app.py's own database backend, so it works against MySQL or SQLite:
+
+    # MySQL (DB_* env vars as for the app)
+    python generate_data.py --preset production
+
+    # Local SQLite file (WAL mode), recreated from c.sql first
+    python generate_data.py --sqlite bench.db --fresh --students 20000 --units 400
+
+Generated ids continue after whatever is already in the tables, so the c.sql rows
+(and their logins) stay usable. Student_Lesson_Progress is rebuilt at the end.
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+PRESETS = {
+    "tiny": dict(students=200, units=10, lessons_per_unit=6, materials_per_lesson=3),
+    "small": dict(students=2000, units=50, lessons_per_unit=10, materials_per_lesson=5),
+    "medium": dict(students=20000, units=400, lessons_per_unit=25, materials_per_lesson=8),
+    "production": dict(students=100000, units=2000, lessons_per_unit=50, materials_per_lesson=10),
+}
+
+DEFAULT_SPEC = {
+    **PRESETS["small"],
+    "instructors": None,            # default: one per 10 units (at least 5)
+    "enrollments_per_student": 3,   # mean; the actual number per student varies 1..2x this
+    "classrooms_per_unit": 2,
+    "prerequisite_ratio": 0.8,      # share of lessons that require the previous lesson
+    "popularity_skew": 1.1,         # Zipf exponent for how enrollments spread over units
+    "batch_size": 1000,             # rows per multi-row INSERT
+    "seed": 42,
+}
+
+MATERIAL_TYPES = ("reading", "video", "file", "link", "assignment")
+MATERIAL_WEIGHTS = (40, 25, 10, 10, 15)
+FIRST_NAMES = ("Aiden", "Bella", "Chen", "Dara", "Elif", "Farah", "Gabe", "Hana", "Ivan", "Jia",
+               "Kofi", "Lena", "Mateo", "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Sami", "Tara")
+LAST_NAMES = ("Ng", "Tan", "Lim", "Ong", "Lee", "Chen", "Wong", "Smith", "Garcia", "Patel",
+              "Kim", "Nguyen", "Brown", "Silva", "Khan", "Ito", "Müller", "Rossi", "Cohen", "Ali")
+TOPICS = ("Algorithms", "Databases", "Networks", "Security", "Machine Learning", "Graphics",
+          "Compilers", "Operating Systems", "Web Development", "Statistics", "Cloud Computing",
+          "Human-Computer Interaction", "Software Testing", "Distributed Systems", "Robotics")
+LEVELS = ("Introduction to", "Foundations of", "Applied", "Advanced", "Topics in")
+
+
+def _app():
+    """app.py, imported on first use so --sqlite can set DB_BACKEND before it loads"""
+    import app
+    return app
+
+
+def bulk_insert(cursor, table, columns, rows, batch_size):
+    """INSERT `rows` (any iterable) as multi-row statements; returns the number of rows written"""
+    batch_size = max(1, min(batch_size, 30000 // len(columns)))   # stay under SQLite's bound-variable cap
+    row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    prefix = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+    full_batch_sql = prefix + ", ".join([row_sql] * batch_size)   # same text every batch: translated once
+    written = 0
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return written
+        sql = full_batch_sql if len(batch) == batch_size else prefix + ", ".join([row_sql] * len(batch))
+        cursor.execute(sql, [value for row in batch for value in row])
+        written += len(batch)
+
+
+def _next_id(cursor, table, column):
+    cursor.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}")
+    return int(cursor.fetchone()[0]) + 1
+
+
+class DataGenerator:
+    """Deterministic rows for one spec; every table is a generator so memory stays flat"""
+
+    def __init__(self, spec, first_ids):
+        self.spec = spec
+        self.rng = random.Random(spec["seed"])
+        self.ids = first_ids
+        self.n_instructors = spec["instructors"] or max(5, spec["units"] // 10)
+
+        s, ids = spec, first_ids
+        self.instructor_ids = range(ids["instructor"], ids["instructor"] + self.n_instructors)
+        self.student_ids = range(ids["student"], ids["student"] + s["students"])
+        self.unit_ids = [f"GEN{i:05d}" for i in range(s["units"])]
+        # Unit popularity follows a Zipf curve: a few huge units, a long tail of small ones
+        weights = [1 / (rank + 1) ** s["popularity_skew"] for rank in range(s["units"])]
+        self.rng.shuffle(weights)
+        self.unit_cum_weights = list(itertools.accumulate(weights))
+
+    def lesson_id(self, unit_index, position):
+        return self.ids["lesson"] + unit_index * self.spec["lessons_per_unit"] + position
+
+    def material_id(self, lesson_id, position):
+        return self.ids["material"] + (lesson_id - self.ids["lesson"]) * self.spec["materials_per_lesson"] + position
+
+    def classroom_id(self, unit_index, position):
+        return self.ids["classroom"] + unit_index * self.spec["classrooms_per_unit"] + position
+
+    def instructors(self):
+        for ins_id in self.instructor_ids:
+            yield (ins_id, f"Dr. {self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)} {ins_id}")
+
+    def students(self):
+        for sid in self.student_ids:
+            activity = "inactive" if self.rng.random() < 0.08 else "active"
+            # The index keeps (First_name, Last_name) unique, as idx_student_name requires
+            yield (sid, self.rng.choice(FIRST_NAMES), f"{self.rng.choice(LAST_NAMES)}-{sid}", activity)
+
+    def logins(self):
+        for ins_id in self.instructor_ids:
+            yield ("instructor", ins_id, f"gen.instructor{ins_id}@example.com", "password123", "light", "active", "medium")
+        for sid in self.student_ids:
+            yield ("student", sid, f"gen.student{sid}@example.com", "password123",
+                   self.rng.choice(("light", "dark")), "active", self.rng.choice(("small", "medium", "big")))
+
+    def courses(self):
+        for i, unit_id in enumerate(self.unit_ids):
+            topic = TOPICS[i % len(TOPICS)]
+            title = f"{LEVELS[(i // len(TOPICS)) % len(LEVELS)]} {topic} {i // (len(TOPICS) * len(LEVELS)) + 1}"
+            director = self.rng.choice(self.instructor_ids)
+            yield (unit_id, title, f"Generated course on {topic.lower()}.", self.rng.choice((3, 4, 6)),
+                   director, f"Dr. Director {director}", self.spec["classrooms_per_unit"])
+
+    def lessons(self):
+        for u, unit_id in enumerate(self.unit_ids):
+            for pos in range(self.spec["lessons_per_unit"]):
+                lid = self.lesson_id(u, pos)
+                # Mostly a chain (each lesson unlocks the next), with some free-standing lessons
+                prereq = lid - 1 if pos and self.rng.random() < self.spec["prerequisite_ratio"] else None
+                yield (lid, unit_id, f"Lesson {pos + 1}", f"Generated lesson {pos + 1} of {unit_id}.",
+                       "Complete every material.", self.rng.randint(1, 6), prereq,
+                       self.rng.choice(self.instructor_ids))
+
+    def materials(self):
+        for u in range(len(self.unit_ids)):
+            for pos in range(self.spec["lessons_per_unit"]):
+                lid = self.lesson_id(u, pos)
+                for m in range(self.spec["materials_per_lesson"]):
+                    mtype = self.rng.choices(MATERIAL_TYPES, MATERIAL_WEIGHTS)[0]
+                    yield (self.material_id(lid, m), lid, f"{mtype.title()} {m + 1}", mtype,
+                           f"https://example.com/materials/{lid}/{m}", self.rng.choice((10, 20, 30, 45, 60, 90)))
+
+    def classrooms(self):
+        for u, unit_id in enumerate(self.unit_ids):
+            for pos in range(self.spec["classrooms_per_unit"]):
+                yield (self.classroom_id(u, pos), unit_id, f"{unit_id} - Group {chr(65 + pos % 26)}{pos // 26 or ''}",
+                       self.rng.choice(self.instructor_ids), "4 weeks")
+
+    def classroom_lessons(self):
+        for u in range(len(self.unit_ids)):
+            for pos in range(self.spec["classrooms_per_unit"]):
+                cid = self.classroom_id(u, pos)
+                for lesson in range(self.spec["lessons_per_unit"]):
+                    yield (cid, self.lesson_id(u, lesson))
+
+    def enrollments(self):
+        """(student_id, unit_index, status) for every enrollment, in a reproducible order"""
+        mean = self.spec["enrollments_per_student"]
+        rng = random.Random(self.spec["seed"] + 1)     # its own stream: replayed by several tables
+        for sid in self.student_ids:
+            wanted = min(len(self.unit_ids), rng.randint(max(1, mean // 2), max(1, mean * 2 - mean // 2)))
+            picked = set()
+            while len(picked) < wanted:
+                picked.update(rng.choices(range(len(self.unit_ids)), cum_weights=self.unit_cum_weights,
+                                          k=wanted - len(picked)))
+            for u in sorted(picked):
+                yield sid, u, "inactive" if rng.random() < 0.05 else "active"
+
+    def enrollment_rows(self):
+        for sid, u, status in self.enrollments():
+            yield (sid, self.unit_ids[u], status)
+
+    def classroom_enrollments(self):
+        if not self.spec["classrooms_per_unit"]:
+            return
+        for sid, u, _ in self.enrollments():
+            yield (sid, self.classroom_id(u, sid % self.spec["classrooms_per_unit"]))
+
+    def completions(self):
+        """Material completions with a realistic skew: most students stall early, few finish.
+
+        Students work through a unit's lessons in order; everything before their stopping
+        point is complete and the lesson they stopped in is partially done.
+        """
+        lessons, materials = self.spec["lessons_per_unit"], self.spec["materials_per_lesson"]
+        rng = random.Random(self.spec["seed"] + 2)
+        for sid, u, _ in self.enrollments():
+            progress = 0.0 if rng.random() < 0.15 else rng.betavariate(0.9, 1.8)
+            done_lessons = int(progress * lessons)
+            for pos in range(min(done_lessons + 1, lessons)):
+                lid = self.lesson_id(u, pos)
+                done = materials if pos < done_lessons else rng.randrange(materials)
+                for m in range(done):
+                    yield (sid, self.material_id(lid, m), 1)
+                if pos == done_lessons and done < materials and rng.random() < 0.3:
+                    yield (sid, self.material_id(lid, done), 0)    # ticked, then unticked again
+
+
+TABLES = [
+    # (table, columns, generator method)
+    ("Instructors", ("Ins_id", "Ins_name"), "instructors"),
+    ("Students", ("Student_id", "First_name", "Last_name", "Activity"), "students"),
+    ("Logins", ("user_type", "user_ref_id", "email", "password_hash", "theme_preference",
+                "activity_status", "font_preference"), "logins"),
+    ("Courses", ("Unit_id", "Title", "Course_description", "Total_credit", "Course_made_by",
+                 "Course_director", "Active_Classrooms_Count"), "courses"),
+    ("Lessons", ("lesson_id", "unit_id", "title", "description", "objectives", "estimated_time_hours",
+                 "prerequisite_lesson_id", "designer_id"), "lessons"),
+    ("Lesson_Materials", ("material_id", "lesson_id", "title", "material_type", "content_url",
+                          "estimated_time_minutes"), "materials"),
+    ("Enrollment", ("Student_id", "Unit_id", "Status"), "enrollment_rows"),
+    ("Classroom", ("classroom_id", "unit_id", "classroom_name", "instructor_id", "duration"), "classrooms"),
+    ("Classroom_Enrollment", ("student_id", "classroom_id"), "classroom_enrollments"),
+    ("Classroom_Lessons", ("classroom_id", "lesson_id"), "classroom_lessons"),
+    ("Student_Material_Completion", ("student_id", "material_id", "completed"), "completions"),
+]
+
+
+def generate(conn, spec=None, report=print):
+    """Load one synthetic dataset through `conn`; returns {table: (rows, seconds)}"""
+    spec = {**DEFAULT_SPEC, **(spec or {})}
+    app = _app()
+    cur = conn.cursor()
+    try:
+        first_ids = {
+            "instructor": _next_id(cur, "Instructors", "Ins_id"),
+            "student": _next_id(cur, "Students", "Student_id"),
+            "lesson": _next_id(cur, "Lessons", "lesson_id"),
+            "material": _next_id(cur, "Lesson_Materials", "material_id"),
+            "classroom": _next_id(cur, "Classroom", "classroom_id"),
+        }
+        cur.execute("SELECT COUNT(*) FROM Courses WHERE Unit_id LIKE %s", ("GEN%",))
+        if cur.fetchone()[0]:
+            raise RuntimeError("Generated courses already exist; re-run with --fresh to start over.")
+
+        gen = DataGenerator(spec, first_ids)
+        results = {}
+        cur.execute("SET FOREIGN_KEY_CHECKS=0")      # every reference is generated consistently
+        for table, columns, method in TABLES:
+            started = time.perf_counter()
+            rows = bulk_insert(cur, table, columns, getattr(gen, method)(), spec["batch_size"])
+            conn.commit()
+            results[table] = (rows, time.perf_counter() - started)
+            report(_throughput_line(table, *results[table]))
+
+        started = time.perf_counter()
+        rows = app.ProgressStore.rebuild(cur)
+        conn.commit()
+        results[app.ProgressStore.TABLE] = (rows, time.perf_counter() - started)
+        report(_throughput_line(app.ProgressStore.TABLE, *results[app.ProgressStore.TABLE]))
+        cur.execute("SET FOREIGN_KEY_CHECKS=1")
+        return results
+    finally:
+        cur.close()
+
+
+def _throughput_line(table, rows, seconds):
+    rate = rows / seconds if seconds > 0 else float("inf")
+    return f"  {table:<28} {rows:>10,} rows  {seconds:8.2f} s  {rate:>12,.0f} rows/s"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--students", type=int)
+    parser.add_argument("--units", type=int)
+    parser.add_argument("--lessons-per-unit", type=int)
+    parser.add_argument("--materials-per-lesson", type=int)
+    parser.add_argument("--instructors", type=int)
+    parser.add_argument("--enrollments-per-student", type=int)
+    parser.add_argument("--classrooms-per-unit", type=int)
+    parser.add_argument("--prerequisite-ratio", type=float)
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--sqlite", metavar="PATH", help="load into this SQLite file instead of MySQL")
+    parser.add_argument("--fresh", action="store_true", help="recreate every table from c.sql first")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = args.sqlite
+    spec = {**DEFAULT_SPEC, **PRESETS[args.preset]}
+    for key in DEFAULT_SPEC:
+        value = getattr(args, key, None)
+        if value is not None:
+            spec[key] = value
+
+    app = _app()
+    if not app.ensure_database():       # joins the app's own background bootstrap
+        return 1
+    conn = app.db_backend.connect()
+    try:
+        if args.fresh:
+            cur = conn.cursor()
+            app.load_schema(cur)
+            conn.commit()
+            cur.close()
+            app.run_migrations(conn)
+        print(f"🧪 Generating {spec['students']:,} students, {spec['units']:,} units, "
+              f"{spec['lessons_per_unit']} lessons/unit, {spec['materials_per_lesson']} materials/lesson "
+              f"(seed {spec['seed']}) into {app.db_backend.label}")
+        started = time.perf_counter()
+        results = generate(conn, spec)
+    finally:
+        conn.close()
+
+    total_rows = sum(rows for rows, _ in results.values())
+    total_seconds = time.perf_counter() - started
+    print(_throughput_line("TOTAL", total_rows, total_seconds))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+-- ----------------------------
+-- Covering indexes for the hot query paths in app.py
+-- (the foreign-key indexes MySQL creates on its own only cover the first column)
+-- ----------------------------
+
+-- Lesson lists, prerequisite graph and reports: WHERE unit_id = ? ORDER BY lesson_id
+CREATE INDEX idx_lessons_unit ON Lessons (unit_id, lesson_id);
+
+-- "Which lessons depend on this one?" before deleting a lesson
+CREATE INDEX idx_lessons_prerequisite ON Lessons (prerequisite_lesson_id, lesson_id);
+
+-- /assignment_get, /reading_get and per-type report counts
+CREATE INDEX idx_materials_lesson_type ON Lesson_Materials (lesson_id, material_type);
+
+-- Students of a unit (the unique key on Enrollment leads with Student_id)
+CREATE INDEX idx_enrollment_unit ON Enrollment (Unit_id, Student_id, Status);
+
+-- /classrooms?instructorId= and /drop_down_class
+CREATE INDEX idx_classroom_instructor ON Classroom (instructor_id, classroom_id);
+
+-- Preference and profile lookups: WHERE user_ref_id = ? [AND user_type = ?]
+CREATE INDEX idx_logins_user_ref ON Logins (user_ref_id, user_type);
+
+-- Lesson-wide completion scans start from the material, not the student
+CREATE INDEX idx_smc_material ON Student_Material_Completion (material_id, student_id, completed);
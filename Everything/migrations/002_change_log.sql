@@ -0,0 +1,16 @@
+-- ----------------------------
+-- Append-only change log behind /api/sync/changes
+-- (the write routes in app.py add a row per changed entity in the same transaction)
+-- ----------------------------
+
+CREATE TABLE IF NOT EXISTS Change_Log (
+    change_id BIGINT PRIMARY KEY AUTO_INCREMENT,     -- the sync cursor
+    entity VARCHAR(40) NOT NULL,                     -- enrollments, classroom_enrollments, lessons, materials, completions
+    entity_id VARCHAR(255) NOT NULL,
+    op ENUM('upsert', 'delete') NOT NULL,
+    unit_id VARCHAR(255),                            -- course the change belongs to, if any
+    student_id INT,                                  -- set for per-student rows; NULL = visible to the whole unit
+    date_changed DATETIME DEFAULT CURRENT_TIMESTAMP,
+    KEY `idx_changelog_student` (student_id, change_id),
+    KEY `idx_changelog_unit` (unit_id, change_id)
+);
@@ -0,0 +1,6 @@
+-- ----------------------------
+-- Latest unit-wide change of a unit in one index probe
+-- (lesson bundle validators: MAX(change_id) WHERE unit_id = ? AND student_id IS NULL)
+-- ----------------------------
+
+CREATE INDEX idx_changelog_unit_scope ON Change_Log (unit_id, student_id, change_id);
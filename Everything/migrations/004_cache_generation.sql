@@ -0,0 +1,9 @@
+-- ----------------------------
+-- Catalog cache generations shared by every worker when CACHE_URL is not set
+-- (a write bumps its namespace's row; cache keys embed the current generations)
+-- ----------------------------
+
+CREATE TABLE IF NOT EXISTS Cache_Generation (
+    name VARCHAR(64) PRIMARY KEY,
+    generation BIGINT NOT NULL DEFAULT 0
+);
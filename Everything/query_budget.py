@@ -0,0 +1,129 @@
+"""
+Query budgets: the most SQL statements each hot route may issue, whatever the data size.
+
+Every route in QUERY_BUDGETS is requested against a small and a larger seeded dataset
+(same setup as benchmark.py). The statements are counted by the QueryStats that get_db()
+attaches to each request, i.e. the app's own cursor path. A route fails when it exceeds its
+budget, when it does not answer 2xx/304 (an expired session or a wrong fixture id would
+otherwise pass on the cheap error path), or when it issues more statements on the larger
+dataset than on the smaller one (a query inside a loop over lessons, students or units).
+
+    python query_budget.py                      # tiny vs small
+    python query_budget.py --sizes tiny,medium
+
+Caches are invalidated before every request so the cold path is what gets counted.
+"""
+import argparse
+import json
+import os
+import sys
+
+from flask import appcontext_tearing_down, g
+
+import benchmark
+
+# name -> (role, url template, max statements). Templates use benchmark.pick_targets() keys.
+QUERY_BUDGETS = {
+    "fetch_lessons_and_students_2": ("student", "/fetch_lessons_and_students_2?unit_id={unit_id}", 3),
+    "student_report_data": ("student", "/student_report_data", 3),
+    "courses_search": ("student", "/courses?q={q}", 3),
+    "indi_classroom": ("student", "/indi_classroom?classroom_id={classroom_id}", 6),
+    "fetch_classroom_lessons": ("student", "/fetch_classroom_lessons?classroom_id={classroom_id}", 3),
+    "fetch_course_details": ("student", "/fetch_course_details?unit_id={unit_id}", 3),
+    "course_lessons_status": ("student", "/api/courses/{unit_id}/lessons/status/{student_id}", 4),
+    "students_progress": ("instructor", "/api/instructor/course/{unit_id}/students_progress", 4),
+    "progress_matrix": ("instructor", "/api/instructor/course/{unit_id}/progress_matrix", 4),
+    "lesson_completion_stats": ("instructor", "/api/lessons/{lesson_id}/completion-stats", 2),
+    "unit_completion_stats": ("instructor", "/api/lessons/completion-stats?unit_id={unit_id}", 2),
+    "unit_materials": ("student", "/materials_get?unit_id={unit_id}", 1),
+    "lesson_bundle": ("student", "/api/lessons/{lesson_id}/bundle", 3),
+    "lesson_details": ("student", "/get_lesson_details?lesson_id={lesson_id}", 1),
+    "instructor_workspace": ("instructor", "/api/instructor/workspace/{unit_id}", 9),
+    "student_dashboard": ("student", "/api/student/dashboard", 6),
+}
+
+CACHE_NAMESPACES = ("courses", "lessons", "classrooms", "instructors", "students")
+
+
+def count_queries(size):
+    """{name: (status, statements)} for every budgeted route (runs in a child process)"""
+    app, targets, clients, _ = benchmark.prepare(size)
+    targets = {**targets, "student_id": _student_id(app, targets["student_email"])}
+
+    counted = []
+
+    def _record(sender, **extra):
+        stats = g.get("query_stats")
+        counted.append(stats.count if stats is not None else 0)
+
+    # A signal, not a teardown hook: the app has already served the logins by now
+    appcontext_tearing_down.connect(_record, app.app)
+
+    results = {}
+    for name, (role, template, _) in QUERY_BUDGETS.items():
+        app.catalog_cache.invalidate(*CACHE_NAMESPACES)
+        resp = clients[role].get(template.format(**targets))
+        resp.get_data()
+        resp.close()
+        results[name] = (resp.status_code, counted[-1])
+    return results
+
+
+def _student_id(app, email):
+    conn = app.db_backend.connect()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT user_ref_id FROM Logins WHERE email = %s", (email,))
+        return cur.fetchone()[0]
+    finally:
+        cur.close()
+        conn.close()
+
+
+def check(counts_by_size):
+    """[(name, message)] for every route over budget or growing with the data"""
+    failures = []
+    sizes = list(counts_by_size)
+    for name, (_, _, budget) in QUERY_BUDGETS.items():
+        seen = [(size, *counts_by_size[size][name]) for size in sizes]
+        for size, status, n in seen:
+            # A 401/403/404 runs fewer queries than the real page and would pass any budget
+            if not (200 <= status < 300 or status == 304):
+                failures.append((name, f"[{size}] HTTP {status}, expected 2xx or 304"))
+            if n > budget:
+                failures.append((name, f"[{size}] {n} statements, budget is {budget}"))
+        for (small, _, n_small), (large, _, n_large) in zip(seen, seen[1:]):
+            if n_large > n_small:
+                failures.append((name, f"grows with data: {n_small} on {small} -> {n_large} on {large}"))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check per-route SQL statement budgets.")
+    parser.add_argument("--sizes", default="tiny,small", help="comma-separated generate_data presets, small first")
+    parser.add_argument("--_worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args._worker:
+        print(benchmark.RESULT_MARKER + json.dumps(count_queries(args._worker)))
+        return 0
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    counts = {size: benchmark.run_in_child(os.path.abspath(__file__), size) for size in sizes}
+
+    print(f"  {'route':<30}{'budget':>8}" + "".join(f"{size:>10}" for size in sizes))
+    for name, (_, _, budget) in QUERY_BUDGETS.items():
+        print(f"  {name:<30}{budget:>8}" + "".join(f"{counts[size][name][1]:>10}" for size in sizes))
+
+    failures = check(counts)
+    if failures:
+        print(f"\n❌ {len(failures)} query budget violation(s):")
+        for name, message in failures:
+            print(f"  {name}: {message}")
+        return 1
+    print(f"\n✅ All {len(QUERY_BUDGETS)} routes within budget and flat across {', '.join(sizes)}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,13 +6,11 @@ const classroomCardTemplate = document.querySelector("[data-card-template]");
 let classrooms = [];
 
 function fetchClassrooms() {
-  const urlParams = new URLSearchParams(window.location.search);
-  const lessonId = urlParams.get("lesson_id");
-  fetch(`/available_classrooms?lesson_id=${lessonId}`)
+  fetch(`/api/student/dashboard?fields=classrooms`)
     .then((res) => res.json())
     .then((data) => {
-      if (data.found && Array.isArray(data.results)) {
-        classrooms = data.results; 
+      if (Array.isArray(data.classrooms) && data.classrooms.length > 0) {
+        classrooms = data.classrooms.map((c) => ({ ...c, is_enrolled: c.enrolled }));
         renderClassrooms(classrooms); 
       } else {
         classroomCardContainer.innerHTML =
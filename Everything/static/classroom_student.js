@@ -65,18 +65,19 @@ document.addEventListener("DOMContentLoaded", async () => {
     listContainer.appendChild(listClone);
   }
 
-  // Dummy classroom data (replace with database fetch later)
+  // Classrooms the student is enrolled in, from the dashboard
   async function student_classrooms() {
     try{
-      const res = await fetch(`/student_classroom`)
+      const res = await fetch(`/api/student/dashboard?fields=classrooms`)
       const data = await res.json()
 
-      if (data.found && data.results.length > 0){
-        return data.results;
-      } 
+      if (res.ok) {
+        return data.classrooms.filter(c => c.enrolled);
+      }
     }catch(err){
       console.error("Failed to fetch classrooms",err);
-    } 
+    }
+    return [];
   }
   const dummyClassrooms = await student_classrooms();
 
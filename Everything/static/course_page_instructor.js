@@ -5,67 +5,19 @@ function getQueryParam(param) {
   return urlParams.get(param);
 }
 
-async function fetchCourseDetail(unitId) {
-  if (!unitId) return null;
-
-  try {
-    const response = await fetch(`${API_BASE_URL}/fetch_course_details?unit_id=${unitId}`);
-    console.log(response)
-    const data = await response.json();
-
-    if (!data.found || data.results.length === 0) return null;
-    return data.results[0]; // single course
-  } catch (err) {
-    console.error("Failed to fetch course details:", err);
-    return null;
-  }
-}
-
-async function fetch_student_details(unitId) {
-  if (!unitId) return null;
-
-  try {
-    const response = await fetch(`${API_BASE_URL}/fetch_students?unit_id=${unitId}`)
-    const data = await response.json();
-    console.log(data)
-    if (!data.found || data.students.length === 0) return null;
-    return data.students
-  } catch (err) {
-    console.error("ERRRROORRR", err)
-    return null
-  }
-}
-
-async function fetchCourseDetailWithStats(insId = 1, unitId) {
+// Course details, lessons and enrolled students for the page in one request
+async function fetchWorkspace(unitId) {
   if (!unitId) return null;
 
   try {
     const response = await fetch(
-      `${API_BASE_URL}/fetch_instructor_details?insId=${insId}&unit_id=${unitId}`
+      `${API_BASE_URL}/api/instructor/workspace/${unitId}?sections=course,lessons,progress`
     );
     const data = await response.json();
-
-    if (!data.found || data.results.length === 0) return null;
-
-    // For each lesson, get completion statistics
-    const course = data.results[0];
-    if (course.lessons) {
-      for (let lesson of course.lessons) {
-        try {
-          const statsResponse = await fetch(`${API_BASE_URL}/api/lessons/${lesson.lesson_id}/completion-stats`);
-          const stats = await statsResponse.json();
-          if (stats.ok) {
-            lesson.completionStats = stats.stats;
-          }
-        } catch (err) {
-          console.error("Failed to fetch lesson stats:", err);
-        }
-      }
-    }
-
-    return course;
+    if (data.status !== "success") return null;
+    return data;
   } catch (err) {
-    console.error("Failed to fetch course details:", err);
+    console.error("Failed to fetch course workspace:", err);
     return null;
   }
 }
@@ -91,22 +43,11 @@ async function deleteLesson(lessonId, lessonElement) {
   }
 }
 
-async function get_lessons(unitId) {
-  try {
-    const response = await fetch(`${API_BASE_URL}/fetch_lessons_and_students?unit_id=${unitId}`)
-    const data = await response.json();
-    console.log(data.lessons)
-    if (!data.found) return null
-    return data.lessons
-  } catch (err) {
-    console.log(err)
-    return null
-  }
-}
 document.addEventListener("DOMContentLoaded", async () => {
   const unitId = getQueryParam("unitId");
 
-  const course = await fetchCourseDetail(unitId);
+  const workspace = await fetchWorkspace(unitId);
+  const course = workspace && workspace.course;
   if (!course) {
     alert("Course not found!");
     return;
@@ -128,14 +69,11 @@ document.addEventListener("DOMContentLoaded", async () => {
   // Populate students if available
   const studentListElem = document.getElementById("studentList");
   studentListElem.innerHTML = ""; // clear existing
-  const student_list = await fetch_student_details(unitId); // assuming this returns the students list
-  console.log("HAPPENS")
-  console.log("Student List:", student_list);
-  // Check if there are students in the li  st
-  if (student_list && student_list.length > 0) {
+  const student_list = workspace.progress.students;
+  if (student_list.length > 0) {
     student_list.forEach((student) => {
       const li = document.createElement("li");
-      li.textContent = student.name; // Assuming the student object has a 'name' property
+      li.textContent = student.full_name;
       studentListElem.appendChild(li);
     });
   }
@@ -151,9 +89,8 @@ document.addEventListener("DOMContentLoaded", async () => {
 
   cardContainer.innerHTML = "";
   listContainer.innerHTML = "";
-  const lessons_list = await get_lessons(unitId);
-  console.log(lessons_list);
-  if (lessons_list && lessons_list.length > 0) {
+  const lessons_list = workspace.lessons;
+  if (lessons_list.length > 0) {
     lessons_list.forEach((lesson, index) => {
       const num = lessons_list.length;
       // --- Card view ---
@@ -161,7 +98,7 @@ document.addEventListener("DOMContentLoaded", async () => {
       const card = cardFragment.children[0];
       card.querySelector("[data-lesson-header]").textContent = `Lesson ${index + 1
         }`;
-      card.querySelector("[data-lesson-body]").textContent = lesson.name;
+      card.querySelector("[data-lesson-body]").textContent = lesson.title;
       card.querySelector("[data-lesson-credit]").textContent =
         30 / num;
 
@@ -181,7 +118,7 @@ document.addEventListener("DOMContentLoaded", async () => {
       const listItem = listFragment.children[0];
       listItem.querySelector("[data-lesson-header]").textContent = `Lesson ${index + 1
         }`;
-      listItem.querySelector("[data-lesson-body]").textContent = lesson.name;
+      listItem.querySelector("[data-lesson-body]").textContent = lesson.title;
       listItem.querySelector("[data-lesson-credit]").textContent =
         30 / num;
 
@@ -18,6 +18,7 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
 
   let availablePrerequisites = [];
   let currentPrerequisite = null;
+  let workspace = null;
 
   // Escape HTML for safe rendering
   function escapeHtml(str) {
@@ -29,47 +30,36 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
       .replace(/'/g, "&#039;");
   }
 
-  // Load instructors for the dropdown, and pre-select current
-  async function loadInstructors(selectedId) {
+  // Lessons, classrooms and instructors of the lesson's unit, from one cached request
+  async function loadWorkspace(unitId) {
     try {
-      const res = await fetch(`${API_BASE_URL}/api/instructors`);
+      const res = await fetch(
+        `${API_BASE_URL}/api/instructor/workspace/${unitId}?sections=lessons,classrooms,instructors`
+      );
       const data = await res.json();
-      if (!data.ok) return;
-
-      const sel = $("designer");
-      sel.innerHTML = "";
-      data.instructors.forEach(ins => {
-        const opt = document.createElement("option");
-        opt.value = String(ins.id);
-        opt.textContent = ins.name;
-        if (selectedId != null && String(ins.id) === String(selectedId)) {
-          opt.selected = true;
-        }
-        sel.appendChild(opt);
-      });
+      if (data.status !== "success") {
+        console.error("Failed to load workspace:", data.message);
+        return;
+      }
+      workspace = data;
     } catch (e) {
-      console.error("Error loading instructors:", e);
+      console.error("Error loading workspace:", e);
     }
   }
 
-  // Load available prerequisite lessons
-  async function loadPrerequisites(lessonId) {
-    try {
-      const res = await fetch(`${API_BASE_URL}/api/lessons/${lessonId}/prerequisites`);
-      const data = await res.json();
-
-      if (!data.ok) {
-        console.error("Failed to load prerequisites:", data.error);
-        return;
+  // Fill the designer dropdown, and pre-select current
+  function populateDesignerDropdown(selectedId) {
+    const sel = $("designer");
+    sel.innerHTML = "";
+    workspace.instructors.forEach(ins => {
+      const opt = document.createElement("option");
+      opt.value = String(ins.id);
+      opt.textContent = ins.name;
+      if (selectedId != null && String(ins.id) === String(selectedId)) {
+        opt.selected = true;
       }
-
-      availablePrerequisites = data.available_lessons || [];
-      currentPrerequisite = data.current_prerequisite;
-
-      populatePrerequisiteDropdown();
-    } catch (e) {
-      console.error("Error loading prerequisites:", e);
-    }
+      sel.appendChild(opt);
+    });
   }
 
   // Populate the prerequisite dropdown
@@ -167,11 +157,13 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
         currentPrerequisite = detail.prerequisite_lesson_id;
         updatePrerequisiteDisplay();
 
-        // Populate designer dropdown
-        await loadInstructors(detail.designer_id);
-
-        // Load prerequisites after we have lesson details
-        await loadPrerequisites(lessonId);
+        // Designer and prerequisite choices come from the lesson's unit
+        await loadWorkspace(detail.unit_id);
+        if (workspace) {
+          populateDesignerDropdown(detail.designer_id);
+          availablePrerequisites = workspace.lessons.filter(l => String(l.lesson_id) !== String(lessonId));
+          populatePrerequisiteDropdown();
+        }
 
         setEditable(false);
       }
@@ -251,11 +243,11 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
   // --- Fetch lesson materials ---
   async function fetchLessonMaterials(lessonId) {
     try {
-      const assignmentsRes = await fetch(`${API_BASE_URL}/assignment_get?lesson_id=${lessonId}`);
-      lesson.assignments = assignmentsRes.ok ? await assignmentsRes.json() : [];
-
-      const readingsRes = await fetch(`${API_BASE_URL}/reading_get?lesson_id=${lessonId}`);
-      lesson.reading_list = readingsRes.ok ? await readingsRes.json() : [];
+      const res = await fetch(`${API_BASE_URL}/materials_get?lesson_id=${lessonId}&types=assignment,reading`);
+      const data = res.ok ? await res.json() : null;
+      const materials = data?.lessons?.[0]?.materials ?? {};
+      lesson.assignments = materials.assignment ?? [];
+      lesson.reading_list = materials.reading ?? [];
     } catch (err) {
       console.error("Error fetching materials:", err);
       lesson.assignments = [];
@@ -365,19 +357,12 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
     }
   }
 
-  async function fetch_classroom() {
-    try {
-      const res = await fetch(`${API_BASE_URL}/classrooms?lesson_id=${lessonId}`);
-      console.log(lessonId)
-      const data = await res.json();
-
-      if (data.found && data.results.length > 0) {
-        return data.results;
-      }
-    } catch (err) {
-      console.error("Failed to fetch classrooms", err);
-    }
+  // The unit's classrooms that do not have this lesson yet
+  function availableClassrooms() {
+    if (!workspace) return [];
+    return workspace.classrooms.filter(c => !c.lesson_ids.some(id => String(id) === String(lessonId)));
   }
+
   async function addLessonToClassroom(classroomName, lessonId) {
     try {
       const response = await fetch(`${API_BASE_URL}/add_lesson_to_classroom`, {
@@ -415,11 +400,9 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
   async function initPage() {
     const classroomBox = document.getElementById("classroomBox");
     const classroomDropdown = document.getElementById("classroomDropdown");
-    const classrooms = await fetch_classroom();
+    await fetchLessonDetails(lessonId);
 
-    const classroomsList = classrooms || [];
-    console.log(classroomsList)
-    classroomsList.forEach(c => {
+    availableClassrooms().forEach(c => {
       const li = document.createElement("li");
       li.textContent = c.classroom_name;
       li.dataset.id = c.classroom_id;
@@ -444,7 +427,6 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
       }
     });
 
-    await fetchLessonDetails(lessonId);
     await fetchLessonMaterials(lessonId);
 
     renderList("assignmentsList", lesson.assignments, "assignment");
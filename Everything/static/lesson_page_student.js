@@ -7,6 +7,9 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
   const urlParams = new URLSearchParams(window.location.search);
   const lessonId = urlParams.get("lesson_id");
 
+  let syncCursor = null;
+  let liveUpdates = false;
+
   let lesson = {
     assignments: [],
     reading_list: []
@@ -63,7 +66,7 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
       const timer = setInterval(() => {
         if (popup.closed) {
           clearInterval(timer);
-          refreshAllData();
+          if (!liveUpdates) refreshAllData(); // with a live stream the enrollment arrives as an event
         }
       }, 500);
     });
@@ -88,17 +91,23 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
     window.location.href = `/sidebar_classroom_std_2?classroom_id=${id}`
   }
 
-  // Check lesson status and display appropriate UI
-  async function checkLessonStatus() {
+  // Lesson details, prerequisite lock state and materials in one (conditional) request
+  async function fetchLessonBundle() {
     try {
-      const res = await fetch(`${API_BASE_URL}/api/lessons/status/${lessonId}`);
+      const res = await fetch(`${API_BASE_URL}/api/lessons/${lessonId}/bundle`);
       const data = await res.json();
-
-      if (data.ok) {
-        updateLessonStatus(data);
+      if (data.status !== "success") {
+        console.error("Error loading lesson:", data.message);
+        return;
       }
+      showLessonDetails(data.lesson);
+      lesson.assignments = data.materials.assignment ?? [];
+      lesson.reading_list = data.materials.reading ?? [];
+      renderAssignments();
+      renderReadingList();
+      updateLessonStatus(data.lesson);
     } catch (err) {
-      console.error("Error checking lesson status:", err);
+      console.error("Error loading lesson:", err);
     }
   }
 
@@ -196,41 +205,34 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
     window.location.href = `/lesson_page_student?lesson_id=${prerequisiteLessonId}`;
   };
 
-  async function fetchLessonDetails() {
-    try {
-      const res = await fetch(`${API_BASE_URL}/get_lesson_details?lesson_id=${lessonId}`);
-      const data = await res.json();
-      if (data.status === "success" && data.lessons.length > 0) {
-        lesson = data.lessons[0];
-
-        $("lessonId").textContent = lesson.lesson_id;
-        $("lessonTitle").textContent = lesson.title;
-        $("estimatedTime").value = lesson.estimated_time;
-        $("objective").value = lesson.objective;
-        $("description").value = lesson.description;
-        $("designer").value = lesson.instructor;
-        $("dateCreated").textContent = lesson.date_created;
-        $("lastUpdated").textContent = lesson.last_updated;
-
-        // Disable all form fields for students
-        [$("objective"), $("description"), $("designer"), $("estimatedTime")].forEach(f => f.disabled = true);
-
-        // Display prerequisite information if exists
-        displayPrerequisiteInfo(lesson);
-
-        const enrollClassroomBtn = $("enrollClassroomBtn");
-        if (enrollClassroomBtn) {
-          enrollClassroomBtn.addEventListener("click", () => {
-            window.open(
-              `/classroom_enrol_popup?unitId=${lesson.unit_id}`,
-              "ClassroomEnrollment",
-              "width=800,height=600"
-            );
-          });
-        }
-      }
-    } catch (err) {
-      console.error(err);
+  function showLessonDetails(details) {
+    lesson = { ...details, assignments: lesson.assignments, reading_list: lesson.reading_list };
+
+    $("lessonId").textContent = lesson.lesson_id;
+    $("lessonTitle").textContent = lesson.title;
+    $("estimatedTime").value = lesson.estimated_time;
+    $("objective").value = lesson.objective;
+    $("description").value = lesson.description;
+    $("designer").value = lesson.instructor;
+    $("dateCreated").textContent = lesson.date_created;
+    $("lastUpdated").textContent = lesson.last_updated;
+
+    // Disable all form fields for students
+    [$("objective"), $("description"), $("designer"), $("estimatedTime")].forEach(f => f.disabled = true);
+
+    // Display prerequisite information if exists
+    displayPrerequisiteInfo(lesson);
+
+    const enrollClassroomBtn = $("enrollClassroomBtn");
+    if (enrollClassroomBtn) {
+      // onclick, not addEventListener: this runs again on every refresh
+      enrollClassroomBtn.onclick = () => {
+        window.open(
+          `/classroom_enrol_popup?unitId=${lesson.unit_id}`,
+          "ClassroomEnrollment",
+          "width=800,height=600"
+        );
+      };
     }
   }
 
@@ -266,20 +268,6 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
     lessonInfo.insertAdjacentElement("beforebegin", info);
   }
 
-  async function fetchLessonMaterials() {
-    try {
-      const assignRes = await fetch(`${API_BASE_URL}/assignment_get?lesson_id=${lessonId}`);
-      lesson.assignments = assignRes.ok ? await assignRes.json() : [];
-
-      const readRes = await fetch(`${API_BASE_URL}/reading_get?lesson_id=${lessonId}`);
-      lesson.reading_list = readRes.ok ? await readRes.json() : [];
-    } catch (err) {
-      console.error(err);
-      lesson.assignments = [];
-      lesson.reading_list = [];
-    }
-  }
-
   function renderList(containerId, list) {
     const container = $(containerId);
     if (!container) return;
@@ -312,7 +300,7 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
 
             if (checkAllCompleted()) {
               setTimeout(() => {
-                checkLessonStatus();
+                fetchLessonBundle();
               }, 500);
             }
           } else {
@@ -347,31 +335,58 @@ const API_BASE_URL = "https://edubridge-94lr.onrender.com";
   async function initPage() {
     if (!lessonId) return console.error("No lesson_id in URL");
 
-    await fetchLessonDetails();
-    await fetchLessonMaterials();
+    await fetchChanges(); // take the sync cursor before the full load so nothing is missed
+
+    await fetchLessonBundle();
     await fetchClassrooms();
 
-    renderAssignments();
-    renderReadingList();
+    listenForChanges();
+  }
 
-    await checkLessonStatus();
+  // Live updates: every server event (or a reconnect) triggers one delta sync.
+  // liveUpdates is only true while the stream is actually open (not on 401/503 or a dropped connection).
+  function listenForChanges() {
+    if (!window.EventSource) return;
+    const source = new EventSource(`${API_BASE_URL}/api/events`, { withCredentials: true });
+    source.onopen = () => { liveUpdates = true; };
+    source.onerror = () => { liveUpdates = false; };
+    let pending = null;
+    const onChange = () => {
+      clearTimeout(pending);
+      pending = setTimeout(refreshAllData, 200); // one refresh for a burst of events
+    };
+    ["enrollments", "classroom_enrollments", "lessons", "materials", "completions", "resync", "ready"]
+      .forEach(name => source.addEventListener(name, onChange));
+  }
+  // Entities changed since the last call, or null when everything must be reloaded
+  async function fetchChanges() {
+    try {
+      const res = await fetch(`${API_BASE_URL}/api/sync/changes${syncCursor === null ? "" : `?since=${syncCursor}`}`);
+      if (!res.ok) return null;
+      const data = await res.json();
+      syncCursor = data.cursor;
+      if (data.full_resync || data.has_more) return null;
+      return new Set(Object.keys(data.changes));
+    } catch (err) {
+      console.error("Error fetching changes:", err);
+      return null;
+    }
   }
-  function refreshAllData() {
-    // Refresh the lesson materials and assignments
-    fetchLessonMaterials()
-      .then(() => {
-        renderAssignments();
-        renderReadingList();
-      })
-      .catch(err => console.error("Error refreshing lesson materials:", err));
 
-    // Refresh the classrooms
-    fetchClassrooms()
-      .catch(err => console.error("Error refreshing classrooms:", err));
+  async function refreshAllData() {
+    const changed = await fetchChanges();
+    const any = (...entities) => changed === null || entities.some(e => changed.has(e));
+
+    // Refresh the lesson, its materials and its lock state (a 304 when nothing changed)
+    if (any("lessons", "materials", "completions", "enrollments")) {
+      fetchLessonBundle();
+    }
 
-    // Refresh the lesson status
-    checkLessonStatus()
-      .catch(err => console.error("Error refreshing lesson status:", err));
+    // Refresh the classrooms
+    if (any("classroom_enrollments")) {
+      fetchClassrooms()
+        .catch(err => console.error("Error refreshing classrooms:", err));
+    }
   }
 
 
@@ -16,25 +16,6 @@ const progressValue = document.getElementById("progressValue"); // <span>0</span
 const statusText = document.getElementById("statusText");
 let isActive = true; // whether student can enroll/unenroll
 
-async function fetchStatus() {
-  try {
-    const res = await fetch(`${API_BASE_URL}/api/profile`, { credentials: "include" });
-    const data = await res.json();
-    if (res.ok && data.status === "success") {
-      const status = (data.profile.status || "").toLowerCase();
-      isActive = status === "active";
-      updateStatusDisplay();
-    } else {
-      isActive = true;
-      updateStatusDisplay();
-    }
-  } catch (err) {
-    console.error("Error fetching status:", err);
-    isActive = true;
-    updateStatusDisplay();
-  }
-}
-
 function updateStatusDisplay() {
   if (!statusText) return;
   statusText.textContent = isActive ? "Active" : "Inactive";
@@ -99,10 +80,52 @@ function createCard(course) {
   return cardClone;
 }
 
-function refreshAllCourseData() {
-  fetchCourses();
-  fetchEnrolledCourses();
-  console.log("WTFFFFF")
+let syncCursor = null;
+let liveUpdates = false;
+
+let enrolledCourses = [];
+
+// Enrolled courses, the course catalog and account status from one dashboard request
+async function refreshAllCourseData() {
+  try {
+    const res = await fetch(`${API_BASE_URL}/api/student/dashboard?fields=courses,catalog,preferences`, { credentials: "include" });
+    const data = await res.json();
+    if (!res.ok) throw new Error(data.message);
+
+    isActive = (data.preferences.status || "active").toLowerCase() === "active";
+    updateStatusDisplay();
+
+    courses = data.catalog;
+    if (searchInput && searchInput.value) {
+      fetchCourses(searchInput.value);
+    } else if (courses.length > 0) {
+      renderCourses(courses);
+    } else {
+      userCardContainer.innerHTML =
+        '<p style="text-align: center; color: red;">No courses found.</p>';
+    }
+
+    enrolledCourses = data.courses;
+    renderEnrolledCourses(enrolledCourses);
+  } catch (err) {
+    console.error("Error fetching dashboard:", err);
+    userCardContainer.innerHTML =
+      '<p style="text-align: center; color: red;">Failed to load courses.</p>';
+  }
+}
+
+// Re-download the course lists only if an enrollment changed since the last sync
+async function refreshChangedCourseData() {
+  try {
+    const res = await fetch(`${API_BASE_URL}/api/sync/changes${syncCursor === null ? "" : `?since=${syncCursor}`}`, { credentials: "include" });
+    const data = await res.json();
+    if (!res.ok) throw new Error(data.message);
+    syncCursor = data.cursor;
+    if (!data.full_resync && !data.has_more && !data.changes.enrollments) return;
+  } catch (err) {
+    console.error("Error fetching changes:", err);
+  }
+  refreshAllCourseData();
 }
 
 function renderCourses(filteredCourses) {
@@ -192,13 +215,13 @@ function renderEnrolledCourses(courses) {
     const activeClone = activeTemplate.content.cloneNode(true);
     const courseElement = activeClone.firstElementChild;
 
-    courseElement.dataset.unitId = course.Unit_id;
+    courseElement.dataset.unitId = course.unit_id;
 
     const header = activeClone.querySelector("[data-enroll-header]");
     const body = activeClone.querySelector("[data-enroll-body]");
 
-    header.textContent = course.Title;
-    body.textContent = course.Unit_id;
+    header.textContent = course.title;
+    body.textContent = course.unit_id;
 
     activeContainer.appendChild(activeClone);
   });
@@ -240,26 +263,25 @@ function fetchCourses(query = "") {
     });
 }
 
-function fetchEnrolledCourses() {
-
-  fetch(`${API_BASE_URL}/find_enrollment?studentId=${encodeURIComponent(studentId = 1)}`)
-    .then((res) => res.json())
-    .then((data) => {
-      if (data.found) {
-        renderEnrolledCourses(data.results);
-      } else {
-        renderEnrolledCourses([]);
-      }
-    })
-    .catch((err) => console.error("Fetch error:", err));
+// Live updates: enrollment events (or a reconnect) trigger one delta sync.
+// liveUpdates is only true while the stream is actually open (not on 401/503 or a dropped connection).
+function listenForChanges() {
+  if (!window.EventSource) return;
+  const source = new EventSource(`${API_BASE_URL}/api/events`, { withCredentials: true });
+  source.onopen = () => { liveUpdates = true; };
+  source.onerror = () => { liveUpdates = false; };
+  let pending = null;
+  const onChange = () => {
+    clearTimeout(pending);
+    pending = setTimeout(refreshChangedCourseData, 200);
+  };
+  ["enrollments", "resync", "ready"].forEach((name) => source.addEventListener(name, onChange));
 }
 
-
-
 // --- Init ---
 document.addEventListener("DOMContentLoaded", function () {
-  fetchStatus(); // 🔹 Load current student status (Active/Inactive)
-  refreshAllCourseData();
+  refreshChangedCourseData(); // first call takes the sync cursor and loads everything, status included
+  listenForChanges();
 
   if (searchInput) {
     searchInput.addEventListener("input", (e) => {
@@ -285,7 +307,7 @@ document.addEventListener("DOMContentLoaded", function () {
         if (listView) listView.style.display = "none";
         viewToggle.innerHTML = '<i class="fas fa-list"></i> List View';
       }
-      fetchEnrolledCourses();
+      renderEnrolledCourses(enrolledCourses);
     });
   }
 
@@ -299,7 +321,7 @@ document.addEventListener("DOMContentLoaded", function () {
     const timer = setInterval(() => {
       if (popup.closed) {
         clearInterval(timer);
-        refreshAllCourseData();
+        if (!liveUpdates) refreshChangedCourseData(); // with a live stream the enrollment arrives as an event
       }
     }, 500);
   };
@@ -0,0 +1,152 @@
+"""
+Sync checks: routes that remove a student's enrollments must show up in /api/sync/changes.
+
+Each check logs in as a different seeded student (same setup as benchmark.py), takes a sync
+cursor, runs one write route and asserts that the next /api/sync/changes call reports the
+enrollments and classroom enrollments that route removed or re-keyed.
+
+    python sync_check.py
+    python sync_check.py --size small
+"""
+import argparse
+import json
+import os
+import sys
+
+import benchmark
+
+
+def pick_students(app, n):
+    """n students, each enrolled in a unit and in a classroom of their own (no two share one)"""
+    conn = app.db_backend.connect()
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute("""
+            SELECT l.email, ce.student_id, ce.classroom_id
+            FROM Classroom_Enrollment ce
+            JOIN Logins l ON l.user_ref_id = ce.student_id AND l.user_type = 'student'
+            WHERE ce.student_id IN (SELECT Student_id FROM Enrollment)
+            ORDER BY ce.classroom_id, ce.student_id
+        """)
+        picked, used_classrooms, used_students = [], set(), set()
+        for row in cur.fetchall():
+            if row["classroom_id"] in used_classrooms or row["student_id"] in used_students:
+                continue
+            picked.append(row)
+            used_classrooms.add(row["classroom_id"])
+            used_students.add(row["student_id"])
+            if len(picked) == n:
+                return picked
+        raise RuntimeError(f"Need {n} students in distinct classrooms, found {len(picked)}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _state(app, student_id):
+    """(enrolled unit ids, classroom ids) straight from the database"""
+    conn = app.db_backend.connect()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT Unit_id FROM Enrollment WHERE Student_id = %s", (student_id,))
+        units = {r[0] for r in cur.fetchall()}
+        cur.execute("SELECT classroom_id FROM Classroom_Enrollment WHERE student_id = %s", (student_id,))
+        return units, {r[0] for r in cur.fetchall()}
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _changes(client, since):
+    data = client.get(f"/api/sync/changes?since={since}").get_json()
+    changes = data["changes"]
+    get = lambda entity, kind: changes.get(entity, {}).get(kind, [])
+    return {
+        "units_deleted": set(get("enrollments", "deleted")),
+        "classrooms_deleted": set(get("classroom_enrollments", "deleted")),
+        "classrooms_upserted": {r["classroom_id"] for r in get("classroom_enrollments", "upserted")},
+    }
+
+
+def _withdraw_all(client, student, app):
+    return client.post("/remove_from_all_classes")
+
+
+def _deactivate_profile(client, student, app):
+    return client.put("/api/profile", json={"status": "inactive"})
+
+
+def _delete_classroom(client, student, app):
+    return app.app.test_client().delete(f"/del_classrooms/{student['classroom_id']}")
+
+
+def _rekey_classroom(client, student, app):
+    return app.app.test_client().put(f"/api/classrooms/{student['classroom_id']}",
+                                     json={"classroom_id_new": student["classroom_id"] + 100000})
+
+
+# name -> (route call, expected change sets given (units, classrooms) before and after)
+CHECKS = {
+    "remove_from_all_classes": (_withdraw_all, lambda s, before, after: {
+        "units_deleted": before[0], "classrooms_deleted": before[1]}),
+    "profile_deactivate": (_deactivate_profile, lambda s, before, after: {
+        "units_deleted": before[0], "classrooms_deleted": before[1]}),
+    "delete_classroom": (_delete_classroom, lambda s, before, after: {
+        "classrooms_deleted": {s["classroom_id"]}}),
+    "classroom_id_change": (_rekey_classroom, lambda s, before, after: {
+        "classrooms_deleted": {s["classroom_id"]}, "classrooms_upserted": {s["classroom_id"] + 100000}}),
+}
+
+
+def run_checks(size):
+    """{name: [failure messages]} for every check (runs in a child process)"""
+    app, _, _, _ = benchmark.prepare(size)
+    students = pick_students(app, len(CHECKS))
+
+    results = {}
+    for (name, (call, expect)), student in zip(CHECKS.items(), students):
+        client = benchmark._login(app, student["email"])
+        cursor = client.get("/api/sync/changes").get_json()["cursor"]
+        before = _state(app, student["student_id"])
+        resp = call(client, student, app)
+        after = _state(app, student["student_id"])
+        failures = []
+        if not 200 <= resp.status_code < 300:
+            failures.append(f"route returned HTTP {resp.status_code}")
+        if after == before:
+            failures.append("route changed nothing for the student")
+        seen = _changes(client, cursor)
+        for key, wanted in expect(student, before, after).items():
+            missing = set(wanted) - seen[key]
+            if missing:
+                failures.append(f"{key} is missing {sorted(missing)}")
+        results[name] = failures
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that enrollment removals reach /api/sync/changes.")
+    parser.add_argument("--size", default="tiny", help="generate_data preset")
+    parser.add_argument("--_worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args._worker:
+        print(benchmark.RESULT_MARKER + json.dumps(run_checks(args._worker)))
+        return 0
+
+    results = benchmark.run_in_child(os.path.abspath(__file__), args.size)
+    failed = 0
+    for name, failures in results.items():
+        print(f"  {'❌' if failures else '✅'} {name}")
+        for message in failures:
+            print(f"      {message}")
+        failed += bool(failures)
+    if failed:
+        print(f"\n❌ {failed} of {len(results)} sync check(s) failed.")
+        return 1
+    print(f"\n✅ All {len(results)} sync checks passed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())